@@ -14,10 +14,8 @@ __email__ = "franciscoaucar@ajconsultingit.com"
 __license__ = "MIT"
 __description__ = "Dashboard interactivo para análisis de infraestructura de telecomunicaciones"
 
-# Imports principales
-import streamlit as st
-import pandas as pd
-import plotly.express as px
+# Sin imports de dependencias pesadas: la metadata y la configuración se
+# leen sin cargar Streamlit, pandas ni Plotly (los importa sólo app.py)
 
 # Configuración por defecto
 DEFAULT_CONFIG = {
@@ -3,11 +3,19 @@ TechComView SA - Dashboard Interactivo
 Aplicación completa con todas las funcionalidades en una sola página
 """
 
+import hmac
+import os
+import time
+
 import streamlit as st
 import pandas as pd
-import plotly.express as px
-import plotly.graph_objects as go
-from typing import List, Dict, Union, cast
+
+import charts
+from instrumentation import REGISTRY
+from data import (add_derived_columns, apply_compact_schema, list_partitions, load_shared_data,
+                  memory_report)
+from data.engine import TECH_FILTERS, TREND_MONTHS, make_filter_spec
+from data.refresh import EngineRefresher
 
 
 # Configuración de la página
@@ -18,64 +26,109 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
-# Cargar datos con caché
-@st.cache_data
-def load_data():
+# Inicio de la ejecución completa del script (etapa "rerun" del registro)
+rerun_started = time.perf_counter()
+
+# Clave del panel de administración (?admin=<clave>); sin ella el panel no existe
+ADMIN_TOKEN_ENV = 'TECHCOM_ADMIN_TOKEN'
+
+# Claves de session_state del selector de países y de las opciones con que se armó
+COUNTRIES_KEY = 'selected_countries'
+COUNTRY_OPTIONS_KEY = 'country_options'
+
+# Dataset original de 10 países, usado si no está el expandido
+FALLBACK_DATA = {
+    'country': ['Argentina', 'Bolivia', 'Brasil', 'Chile', 'Colombia',
+               'Ecuador', 'Paraguay', 'Perú', 'Uruguay', 'Venezuela'],
+    'total_cells': [327143, 56487, 1903025, 208660, 285266,
+                   85699, 50093, 204598, 28974, 101353],
+    'gsm': [55074, 11131, 330817, 32244, 68817,
+           23942, 8737, 43202, 6376, 27667],
+    'umts': [211738, 36367, 1268672, 140895, 178647,
+            52415, 36814, 121898, 18716, 69319],
+    'lte': [60331, 8987, 303366, 35521, 37798,
+           9337, 4542, 39498, 3882, 4108],
+    'nr': [0, 2, 170, 0, 2,
+          0, 0, 0, 0, 0],
+    'population_millions': [45.4, 11.8, 215.3, 19.1, 51.5,
+                           17.6, 7.3, 33.0, 3.4, 28.4],
+    'latitude': [-34.6118, -16.2902, -14.2350, -35.6751, 4.7110,
+                -1.8312, -23.4425, -9.1900, -32.5228, 6.4238],
+    'longitude': [-58.3960, -63.5887, -51.9253, -71.5430, -74.0721,
+                 -78.1834, -58.4438, -75.0152, -55.7658, -66.5897],
+    'region': ['South America'] * 10
+}
+
+
+@REGISTRY.timed('load_data')
+def load_data(signature=None, regions=None):
     """Carga datos expandidos de torres celulares de América Latina"""
-    try:
-        # Intentar cargar dataset expandido
-        df = pd.read_csv('data/expanded_telecom_data.csv')
-        st.success(f"✅ Dataset expandido cargado: {len(df)} países")
+    # Intentar cargar dataset expandido (compartido por el módulo data, una
+    # vez por firma de los datos y conjunto de regiones)
+    df = load_shared_data(version=signature, regions=regions)
+    if df is not None:
         return df
-    except FileNotFoundError:
-        # Fallback a datos hardcodeados originales
-        st.info("📊 Usando dataset original (10 países)")
-        data = {
-            'country': ['Argentina', 'Bolivia', 'Brasil', 'Chile', 'Colombia',
-                       'Ecuador', 'Paraguay', 'Perú', 'Uruguay', 'Venezuela'],
-            'total_cells': [327143, 56487, 1903025, 208660, 285266,
-                           85699, 50093, 204598, 28974, 101353],
-            'gsm': [55074, 11131, 330817, 32244, 68817,
-                   23942, 8737, 43202, 6376, 27667],
-            'umts': [211738, 36367, 1268672, 140895, 178647,
-                    52415, 36814, 121898, 18716, 69319],
-            'lte': [60331, 8987, 303366, 35521, 37798,
-                   9337, 4542, 39498, 3882, 4108],
-            'nr': [0, 2, 170, 0, 2,
-                  0, 0, 0, 0, 0],
-            'population_millions': [45.4, 11.8, 215.3, 19.1, 51.5,
-                                   17.6, 7.3, 33.0, 3.4, 28.4],
-            'latitude': [-34.6118, -16.2902, -14.2350, -35.6751, 4.7110,
-                        -1.8312, -23.4425, -9.1900, -32.5228, 6.4238],
-            'longitude': [-58.3960, -63.5887, -51.9253, -71.5430, -74.0721,
-                         -78.1834, -58.4438, -75.0152, -55.7658, -66.5897],
-            'region': ['South America'] * 10
-        }
-        return pd.DataFrame(data)
-
-# Calcular métricas globales
-@st.cache_data
-def calculate_metrics(dataframe):
-    """Calcula estadísticas agregadas"""
-    total_towers = dataframe['total_cells'].sum()
-    total_5g = dataframe['nr'].sum()
-    total_4g = dataframe['lte'].sum()
-    total_3g = dataframe['umts'].sum()
-    total_2g = dataframe['gsm'].sum()
-
-    return {
-        'total': total_towers,
-        '5g': total_5g,
-        '4g': total_4g,
-        '3g': total_3g,
-        '2g': total_2g,
-        '5g_pct': (total_5g / total_towers * 100) if total_towers > 0 else 0,
-        '4g_pct': (total_4g / total_towers * 100) if total_towers > 0 else 0
+    # Fallback a datos hardcodeados originales
+    df = add_derived_columns(apply_compact_schema(pd.DataFrame(FALLBACK_DATA)))
+    df.attrs['fallback'] = True
+    return df
+
+
+def figure_key(engine, key):
+    """Clave de caché de una figura: versión de los datos del motor y dependencias"""
+    return (engine.dataset_version(),) + tuple(key)
+
+
+def warm_figures(engine):
+    """Figuras de la selección inicial, construidas antes de publicar el motor"""
+    spec = engine.default_spec()
+    builders = {
+        'top': lambda: charts.build_figure('top', engine.top_countries(spec)),
+        'pie': lambda: charts.build_figure('pie', engine.tech_distribution(spec)),
+        'total': lambda: charts.build_figure('total', engine.comparison_rows(spec))
     }
+    for chart_id, builder in builders.items():
+        charts.cached_figure(chart_id, figure_key(engine, (spec,)), builder)
+
+
+# Motores de análisis (cubo, índice y estructuras por celda) del proceso.
+# Cuando cambian los datos (delta, ingesta o archivo reemplazado) se
+# reconstruye y precalienta en segundo plano y se publica ya completo.
+@st.cache_resource
+def load_refresher():
+    """Motor vigente del proceso y su reconstrucción en segundo plano"""
+    refresher = EngineRefresher(load_data, warm=warm_figures).start()
+    # Aciertos de las cachés de los motores y de figuras (leídos sólo al
+    # exportar), registrados una vez por proceso y no por sesión
+    REGISTRY.register_cache('engine', refresher.cache_stats)
+    REGISTRY.register_cache('figures', lambda: {'all': dict(charts.FIGURE_CACHE.stats)})
+    return refresher
+
+
+# Con el dataset particionado por región, las regiones salen del listado de
+# particiones (sin leer datos) y sólo se cargan las elegidas en el sidebar
+refresher = load_refresher()
+partition_regions = list(list_partitions())
+
+
+def load_engine(regions=None):
+    """Motor vigente para las regiones elegidas, sin esperar reconstrucciones en curso"""
+    if not partition_regions or set(regions or ()) >= set(partition_regions):
+        regions = None
+    with REGISTRY.timer('engine.build'):
+        return refresher.engine(regions)
 
 
-# Cargar datos
-df = load_data()
+def apply_quick_selection(engine, kind):
+    """Callback de los botones de análisis rápido: fija los países del selector"""
+    options = st.session_state.get(COUNTRY_OPTIONS_KEY, [])
+    st.session_state[COUNTRIES_KEY] = [
+        country for country in engine.quick_selection(kind) if country in options
+    ]
+
+
+# Mensaje de carga, completado cuando se conoce el motor de la selección
+load_status = st.empty()
 
 # ========== INTERFAZ PRINCIPAL ==========
 
@@ -100,36 +153,43 @@ with st.sidebar:
     st.markdown("### 🔍 Filtros Avanzados")
 
     # Filtro por región
-    if 'region' in df.columns:
-        available_regions = df['region'].unique()
+    available_regions = partition_regions or load_engine().regions()
+    if available_regions:
         selected_regions = st.multiselect(
             "🌎 Seleccionar Regiones:",
             options=available_regions,
             default=available_regions,
             help="Selecciona las regiones a analizar"
         )
-        
-        # Filtrar países por región seleccionada
-        if selected_regions:
-            available_countries = df[df['region'].isin(selected_regions)]['country'].unique()
-        else:
-            available_countries = df['country'].unique()
     else:
-        available_countries = df['country'].unique()
         selected_regions = []
 
-    # Filtro por país
+    # Cargar datos: sólo las particiones de las regiones elegidas
+    engine = load_engine(selected_regions)
+    df = engine.dataframe
+    if df.attrs.get('fallback'):
+        load_status.info("📊 Usando dataset original (10 países)")
+    else:
+        load_status.success(f"✅ Dataset expandido cargado: {len(df)} países")
+
+    # Filtrar países por región seleccionada
+    available_countries = engine.countries(selected_regions)
+
+    # Filtro por país: al cambiar las regiones vuelve a todos los disponibles
+    if st.session_state.get(COUNTRY_OPTIONS_KEY) != available_countries:
+        st.session_state[COUNTRY_OPTIONS_KEY] = available_countries
+        st.session_state[COUNTRIES_KEY] = available_countries
     selected_countries = st.multiselect(
         "🌍 Seleccionar Países:",
         options=available_countries,
-        default=available_countries,
+        key=COUNTRIES_KEY,
         help="Selecciona los países a analizar"
     )
 
     # Filtro por tecnología
     tech_filter = st.selectbox(
         "📡 Tecnología Principal:",
-        options=['Todas', '2G (GSM)', '3G (UMTS)', '4G (LTE)', '5G (NR)'],
+        options=list(TECH_FILTERS),
         help="Filtrar por tecnología específica"
     )
 
@@ -139,17 +199,12 @@ with st.sidebar:
     # Análisis rápido
     st.markdown("### ⚡ Análisis Rápido")
 
-    if st.button("🏆 Top 3 Países", help="Mostrar solo los 3 países con más torres"):
-        selected_countries = df.nlargest(3, 'total_cells')['country'].tolist()
-        st.rerun()
-
-    if st.button("🚀 Solo 5G", help="Mostrar países con infraestructura 5G"):
-        selected_countries = df[df['nr'] > 0]['country'].tolist()
-        st.rerun()
-
-    if st.button("📊 Todos", help="Mostrar todos los países"):
-        selected_countries = df['country'].unique().tolist()
-        st.rerun()
+    st.button("🏆 Top 3 Países", help="Mostrar solo los 3 países con más torres",
+              on_click=apply_quick_selection, args=(engine, 'top3'))
+    st.button("🚀 Solo 5G", help="Mostrar países con infraestructura 5G",
+              on_click=apply_quick_selection, args=(engine, '5g'))
+    st.button("📊 Todos", help="Mostrar todos los países",
+              on_click=apply_quick_selection, args=(engine, 'all'))
 
     st.markdown("---")
 
@@ -164,13 +219,22 @@ with st.sidebar:
         **Tecnologías:** 2G, 3G, 4G, 5G
         **Precisión:** Datos de torres lógicas
         """)
+        st.caption(f"Versión de datos: {engine.data_version}")
+
+    with st.expander("🧠 Uso de Memoria", expanded=False):
+        memory_df = memory_report(df)
+        st.caption(f"Dataset en memoria: {memory_df['bytes'].iloc[-1] / 1024:,.1f} KB "
+                   f"({memory_df['bytes_per_row'].iloc[-1]:,.0f} B por fila)")
+        st.dataframe(memory_df[['column', 'dtype', 'bytes', 'share']],
+                     use_container_width=True, hide_index=True)
 
     with st.expander("📈 Métricas Clave", expanded=False):
-        sidebar_5g = df['nr'].sum()
-        sidebar_4g = df['lte'].sum()
-        sidebar_3g = df['umts'].sum()
-        sidebar_2g = df['gsm'].sum()
-        total_cells = df['total_cells'].sum()
+        sidebar_metrics = engine.overall_metrics()
+        sidebar_5g = sidebar_metrics['5g']
+        sidebar_4g = sidebar_metrics['4g']
+        sidebar_3g = sidebar_metrics['3g']
+        sidebar_2g = sidebar_metrics['2g']
+        total_cells = sidebar_metrics['total']
 
         st.metric("5G", f"{sidebar_5g:,}", 
                  f"{sidebar_5g/total_cells*100:.2f}%")
@@ -191,386 +255,456 @@ with st.sidebar:
     </div>
     """, unsafe_allow_html=True)
 
-# Aplicar filtros del sidebar
-filtered_df = df[df['country'].isin(selected_countries)].copy()
+# Clave de filtros del sidebar: la única dependencia de cada sección
+filter_spec = make_filter_spec(selected_regions, selected_countries, tech_filter)
+with REGISTRY.timer('filter'):
+    engine.rows(filter_spec)
 
-# Aplicar filtro por región si está disponible
-if selected_regions and 'region' in df.columns:
-    filtered_df = filtered_df[filtered_df['region'].isin(selected_regions)].copy()
+# ========== SECCIONES ==========
+# Cada sección recibe la clave de filtros como única dependencia. Las que
+# tienen widgets propios (mapa y comparativas) son fragmentos: al cambiar esos
+# widgets sólo se vuelve a ejecutar y enviar esa sección, no toda la página.
 
+def show_figure(chart_id, key, builder):
+    """Dibuja una figura cacheada por (gráfico, versión del dataset, filtros, ...)"""
+    with REGISTRY.timer(f'figure.{chart_id}'):
+        fig = charts.cached_figure(chart_id, figure_key(engine, key), builder)
+    with REGISTRY.timer(f'plotly_chart.{chart_id}'):
+        st.plotly_chart(fig, use_container_width=True, config=charts.PLOTLY_CONFIG)
 
-# Recalcular métricas con datos filtrados
-filtered_metrics = calculate_metrics(filtered_df)
 
 # ========== MÉTRICAS PRINCIPALES ==========
-st.markdown("## 📊 Resumen Regional")
-
-col1, col2, col3, col4 = st.columns(4)
+@REGISTRY.timed('section.summary')
+def render_summary(spec):
+    """Tarjetas de resumen de la selección"""
+    st.markdown("## 📊 Resumen Regional")
+
+    with REGISTRY.timer('calculate_metrics'):
+        filtered_metrics = engine.metrics(spec)
+    filtered_leader = engine.leader(spec)
+    col1, col2, col3, col4 = st.columns(4)
+
+    with col1:
+        st.metric(
+            label="🗼 Total Torres",
+            value=f"{filtered_metrics['total']:,}",
+            delta=f"{len(engine.rows(spec))} países"
+        )
 
-with col1:
-    st.metric(
-        label="🗼 Total Torres",
-        value=f"{filtered_metrics['total']:,}",
-        delta=f"{len(filtered_df)} países"
-    )
+    with col2:
+        st.metric(
+            label="📶 Cobertura 5G",
+            value=f"{filtered_metrics['5g']:,}",
+        )
 
-with col2:
-    st.metric(
-        label="📶 Cobertura 5G",
-        value=f"{filtered_metrics['5g']:,}",   
-    )
+    with col3:
+        st.metric(
+            label="📡 Cobertura 4G",
+            value=f"{filtered_metrics['4g']:,}",
+        )
 
-with col3:
-    st.metric(
-        label="📡 Cobertura 4G",
-        value=f"{filtered_metrics['4g']:,}",
-    )
+    with col4:
+        if filtered_leader is not None:
+            leader_country = filtered_leader['country']
+            leader_towers = filtered_leader['total']
+        else:
+            leader_country = "N/A"
+            leader_towers = 0
 
-with col4:
-    if not filtered_df.empty and len(filtered_df) > 0:
-        max_idx = filtered_df['total_cells'].idxmax()
-        leader_country = filtered_df.loc[max_idx, 'country']
-        leader_towers = filtered_df['total_cells'].max()
-    else:
-        leader_country = "N/A"
-        leader_towers = 0
+        st.metric(
+            label="🏆 Líder Regional",
+            value=leader_country,
+            delta=f"{leader_towers:,} torres"
+        )
 
-    st.metric(
-        label="🏆 Líder Regional",
-        value=leader_country,
-        delta=f"{leader_towers:,} torres"
-    )
+    st.markdown("---")
 
-st.markdown("---")
 
 # ========== VISUALIZACIONES ==========
+@REGISTRY.timed('section.overview')
+def render_overview(spec):
+    """Top de países y distribución por tecnología"""
+    col_left, col_right = st.columns(2)
 
-col_left, col_right = st.columns(2)
+    with col_left:
+        st.markdown("### 🏅 Top Países - Total de Torres")
 
-with col_left:
-    st.markdown("### 🏅 Top Países - Total de Torres")
+        # Top países (máximo 5)
+        top_countries = engine.top_countries(spec)
 
-    # Ordenar y tomar top países (máximo 5)
-    top_countries = filtered_df.nlargest(min(5, len(filtered_df)), 'total_cells')
+        if top_countries:
+            # Gráfico de barras
+            show_figure('top', (spec,), lambda: charts.build_figure('top', top_countries))
+        else:
+            st.info("No hay datos que coincidan con los filtros seleccionados")
 
-    if not top_countries.empty:
-        # Gráfico de barras
-        fig_bar = px.bar(
-            top_countries,
-            x='total_cells',
-            y='country',
-            orientation='h',
-            color='total_cells',
-            color_continuous_scale='Blues',
-            labels={'total_cells': 'Antenas', 'country': 'País'}
-        )
-        fig_bar.update_layout(
-            showlegend=False,
-            height=400,
-            yaxis={'categoryorder': 'total ascending'},
-            width=None  # Eliminar width explícitamente
-        )
-        st.plotly_chart(fig_bar, use_container_width=True, config={
-            'displayModeBar': True,
-            'displaylogo': False,
-            'modeBarButtonsToRemove': ['pan2d', 'lasso2d', 'select2d']
-        })
-    else:
-        st.info("No hay datos que coincidan con los filtros seleccionados")
+    with col_right:
+        st.markdown("### 📡 Distribución por Tecnología")
 
-with col_right:
-    st.markdown("### 📡 Distribución por Tecnología")
+        # Gráfico de torta
+        show_figure('pie', (spec,),
+                    lambda: charts.build_figure('pie', engine.tech_distribution(spec)))
 
-    # Preparar datos para gráfico de torta
-    tech_data = {
-        'Tecnología': ['2G (GSM)', '3G (UMTS)', '4G (LTE)', '5G (NR)'],
-        'Torres': [filtered_metrics['2g'], filtered_metrics['3g'], filtered_metrics['4g'], filtered_metrics['5g']]
-    }
-    tech_df = pd.DataFrame(tech_data)
-
-    # Gráfico de torta
-    fig_pie = px.pie(
-        tech_df,
-        values='Torres',
-        names='Tecnología',
-        color_discrete_sequence=px.colors.sequential.RdBu
-    )
-    fig_pie.update_traces(textposition='inside', textinfo='percent+label')
-    fig_pie.update_layout(height=400, width=None)  # Eliminar width explícitamente
-    st.plotly_chart(fig_pie, use_container_width=True, config={
-        'displayModeBar': True,
-        'displaylogo': False,
-        'modeBarButtonsToRemove': ['pan2d', 'lasso2d', 'select2d']
-    })
+    st.markdown("---")
 
-st.markdown("---")
 
 # ========== MAPA INTERACTIVO ==========
-st.markdown("## 🗺️ Mapa Interactivo")
-
-# Configuración fija del mapa
-color_scale = 'Turbo'
-map_style = 'carto-darkmatter'
-
-if not filtered_df.empty and 'latitude' in filtered_df.columns and 'longitude' in filtered_df.columns:
-    # Determinar columna de datos según filtro
-    size_col = 'total_cells'
-    title_suffix = 'Total de Antenas'
-
-    if tech_filter == '2G (GSM)':
-        size_col = 'gsm'
-        title_suffix = 'Antenas 2G'
-    elif tech_filter == '3G (UMTS)':
-        size_col = 'umts'
-        title_suffix = 'Antenas 3G'
-    elif tech_filter == '4G (LTE)':
-        size_col = 'lte'
-        title_suffix = 'Antenas 4G'
-    elif tech_filter == '5G (NR)':
-        size_col = 'nr'
-        title_suffix = 'Antenas 5G'
-
-    # Crear gráfico de dispersión geográfico
-    fig_map = px.scatter_mapbox(
-        filtered_df,
-        lat='latitude',
-        lon='longitude',
-        size=size_col,
-        color=size_col,
-        hover_name='country',
-        hover_data={
-            'total_cells': True,
-            'gsm': True,
-            'umts': True,
-            'lte': True,
-            'nr': True,
-            'latitude': False,
-            'longitude': False
+@st.fragment
+@REGISTRY.timed('section.map')
+def render_map(spec, regions):
+    """Mapa de la selección; modo y zoom sólo vuelven a ejecutar este fragmento"""
+    st.markdown("## 🗺️ Mapa Interactivo")
+
+    columns = engine.dataframe.columns
+    if not len(engine.rows(spec)) or 'latitude' not in columns or 'longitude' not in columns:
+        st.info("No hay datos de coordenadas disponibles para mostrar el mapa")
+        return
+
+    # Con puntos de celda se envían bins agregados según el zoom, o teselas
+    # de densidad; sin ellos, un marcador por centroide de país
+    map_mode = 'Marcadores'
+    map_zoom = 3
+    if engine.pyramid() is not None:
+        map_mode = st.radio("🧭 Modo de mapa:", options=['Marcadores', 'Densidad'],
+                            horizontal=True,
+                            help="Densidad: imagen rasterizada de todas las celdas")
+        map_zoom = st.slider("🔎 Zoom del mapa:", min_value=2, max_value=12, value=map_zoom,
+                             help="Mayor zoom = bins más finos sobre un área menor")
+
+    map_view = engine.map_view(spec, map_zoom)
+    title_suffix = map_view['title_suffix']
+    map_scope = ", ".join(regions) if regions else "la selección"
+
+    if map_mode == 'Densidad':
+        # Teselas PNG como capas de imagen: el navegador no recibe puntos
+        title = f"Densidad de {title_suffix} (escala logarítmica)"
+        show_figure('density', (spec, map_zoom, title), lambda: charts.build_figure(
+            'density', map_view, title=title,
+            layers=engine.density_layers(spec, map_zoom, charts.MAP_COLOR_SCALE)
+        ))
+    else:
+        title = f"Mapa de {title_suffix} en {map_scope}"
+        show_figure('map', (spec, map_zoom, title),
+                    lambda: charts.build_figure('map', map_view, title=title))
+
+
+# ========== COMPARATIVAS ==========
+def render_coverage_table(coverage_rows):
+    """Tabla de cobertura estimada por país"""
+    st.dataframe(
+        pd.DataFrame(coverage_rows)[[
+            'country', 'population_millions', 'population_covered_millions',
+            'coverage_pct', 'coverage_km2', 'coverage_pct_gsm',
+            'coverage_pct_umts', 'coverage_pct_lte', 'coverage_pct_nr',
+            'towers_per_million']],
+        column_config={
+            'country': 'País',
+            'population_millions': 'Población (M)',
+            'population_covered_millions': 'Población cubierta (M, estimada)',
+            'coverage_pct': 'Territorio cubierto (%)',
+            'coverage_km2': 'Área cubierta (km²)',
+            'coverage_pct_gsm': '2G (%)',
+            'coverage_pct_umts': '3G (%)',
+            'coverage_pct_lte': '4G (%)',
+            'coverage_pct_nr': '5G (%)',
+            'towers_per_million': 'Antenas por millón'
         },
-        color_continuous_scale=color_scale,
-        size_max=60,
-        mapbox_style=map_style,
-        zoom=3,
-        center={'lat': -15, 'lon': -60},
-        title=f"Mapa de {title_suffix} en {selected_regions[0]}",
-        labels={size_col: 'Antenas'}
+        use_container_width=True,
+        hide_index=True
     )
-
-    fig_map.update_layout(
-        height=600,
-        width=None,  # Eliminar width explícitamente
-        margin={'r': 0, 't': 30, 'l': 0, 'b': 0},
-        coloraxis_colorbar=dict(
-            title="Antenas",
-            tickmode="linear",
-            tick0=0,
-            dtick=50000,
-            len=0.8,
-            thickness=20,
-            bgcolor="rgba(255,255,255,0.8)",
-            bordercolor="rgba(0,0,0,0.2)",
-            borderwidth=1
-        )
+    st.caption("Cobertura: radio de cada celda rasterizado en grilla de ~1 km², recortado al "
+               "rectángulo de cada país; población cubierta asumiendo densidad uniforme "
+               "por país")
+    capped = [row['country'] for row in coverage_rows if row.get('coverage_capped')]
+    if capped:
+        st.caption(f"⚠️ Topeado en 100 % (el área estimada supera la superficie del país): "
+                   f"{', '.join(capped)}")
+
+
+@st.fragment
+@REGISTRY.timed('section.comparisons')
+def render_comparisons(spec):
+    """Comparativas entre países; el tipo elegido sólo vuelve a ejecutar este fragmento"""
+    st.markdown("## 📈 Comparativas entre Países")
+
+    comparison_type = st.selectbox(
+        "Tipo de comparación:",
+        options=['Total de Torres', 'Por Tecnología', 'Por Población', 'Ranking 5G']
     )
 
-    st.plotly_chart(fig_map, use_container_width=True, config={
-        'displayModeBar': True,
-        'displaylogo': False,
-        'modeBarButtonsToRemove': ['pan2d', 'lasso2d', 'select2d']
-    })
-else:
-    st.info("No hay datos de coordenadas disponibles para mostrar el mapa")
+    if comparison_type == 'Total de Torres':
+        st.markdown("### 📊 Comparativa Total de Torres")
+        chart_id, payload = 'total', engine.comparison_rows(spec)
+    elif comparison_type == 'Por Tecnología':
+        st.markdown("### 📡 Comparativa por Tecnología")
+        chart_id, payload = 'tech', engine.comparison_rows(spec)
+    elif comparison_type == 'Por Población':
+        st.markdown("### 👥 Análisis por Población")
+        if 'population_millions' not in engine.dataframe.columns:
+            st.info("No hay datos de población disponibles")
+            return
+        # Densidad de torres por millón de habitantes, calculada por el motor
+        chart_id, payload = 'population', engine.comparison_rows(spec)
+    else:
+        st.markdown("### 🚀 Ranking de Infraestructura 5G")
+        chart_id, payload = 'ranking5g', engine.ranking(spec, 'nr')
 
-st.markdown("---")
+    show_figure(chart_id, (spec,), lambda: charts.build_figure(chart_id, payload))
 
-# ========== COMPARATIVAS ==========
-st.markdown("## 📈 Comparativas entre Países")
+    # Cobertura real (área y población) junto a la población, si hay datos por celda
+    if comparison_type == 'Por Población':
+        coverage_rows = engine.coverage_rows(spec)
+        if coverage_rows:
+            render_coverage_table(coverage_rows)
 
-comparison_type = st.selectbox(
-    "Tipo de comparación:",
-    options=['Total de Torres', 'Por Tecnología', 'Por Población', 'Ranking 5G']
-)
 
-if comparison_type == 'Total de Torres':
-    st.markdown("### 📊 Comparativa Total de Torres")
-
-    # Gráfico de barras
-    fig = px.bar(
-        filtered_df,
-        x='country',
-        y='total_cells',
-        title="Total de Antenas por País",
-        color='total_cells',
-        color_continuous_scale='Blues',
-        labels={'total_cells': 'Total de Antenas', 'country': 'País'}
-    )
-    fig.update_layout(height=500, width=None)  # Eliminar width explícitamente
-    st.plotly_chart(fig, use_container_width=True, config={
-        'displayModeBar': True,
-        'displaylogo': False,
-        'modeBarButtonsToRemove': ['pan2d', 'lasso2d', 'select2d']
-    })
-
-elif comparison_type == 'Por Tecnología':
-    st.markdown("### 📡 Comparativa por Tecnología")
-
-    # Gráfico de barras apiladas
-    tech_data = filtered_df[['country', 'gsm', 'umts', 'lte', 'nr']].set_index('country')
-
-    fig = px.bar(
-        tech_data.T,
-        title="Distribución de Tecnologías por País",
-        labels={'value': 'Número de Antenas', 'index': 'Tecnología'},
-        color_discrete_sequence=px.colors.qualitative.Set2
-    )
-    fig.update_layout(height=500, width=None)  # Eliminar width explícitamente
-    st.plotly_chart(fig, use_container_width=True, config={
-        'displayModeBar': True,
-        'displaylogo': False,
-        'modeBarButtonsToRemove': ['pan2d', 'lasso2d', 'select2d']
-    })
-
-elif comparison_type == 'Por Población':
-    st.markdown("### 👥 Análisis por Población")
-    
-    if 'population_millions' in filtered_df.columns:
-        # Calcular densidad de torres por millón de habitantes
-        filtered_df['towers_per_million'] = (filtered_df['total_cells'] / filtered_df['population_millions']).round(0)
-
-        # Gráfico de dispersión
-        fig = px.scatter(
-            filtered_df,
-            x='population_millions',
-            y='towers_per_million',
-            size='total_cells',
-            color='country',
-            title="Densidad de Antenas vs Población",
-            labels={
-                'population_millions': 'Población (millones)',
-                'towers_per_million': 'Antenas por millón de habitantes'
-            },
-            hover_data=['total_cells', 'gsm', 'umts', 'lte', 'nr']
-        )
-        fig.update_layout(height=500, width=None)  # Eliminar width explícitamente
-        st.plotly_chart(fig, use_container_width=True, config={
-        'displayModeBar': True,
-        'displaylogo': False,
-        'modeBarButtonsToRemove': ['pan2d', 'lasso2d', 'select2d']
-    })
-    else:
-        st.info("No hay datos de población disponibles")
-
-elif comparison_type == 'Ranking 5G':
-    st.markdown("### 🚀 Ranking de Infraestructura 5G")
-
-    # Ordenar por 5G
-    g5_ranking = filtered_df.sort_values('nr', ascending=False)
-
-    # Gráfico de barras 5G
-    fig = px.bar(
-        g5_ranking,
-        x='country',
-        y='nr',
-        title="Infraestructura 5G por País",
-        color='nr',
-        color_continuous_scale='Purples',
-        labels={'nr': 'Antenas 5G', 'country': 'País'}
-    )
-    fig.update_layout(height=500, width=None)  # Eliminar width explícitamente
-    st.plotly_chart(fig, use_container_width=True, config={
-        'displayModeBar': True,
-        'displaylogo': False,
-        'modeBarButtonsToRemove': ['pan2d', 'lasso2d', 'select2d']
-    })
+# ========== TENDENCIAS ==========
+# Ventanas de crecimiento ofrecidas (meses hacia atrás desde la última foto)
+TREND_WINDOWS = [3, 6, 12, 24]
+
+
+@st.fragment
+@REGISTRY.timed('section.trends')
+def render_trends(spec):
+    """Crecimiento entre fotos de ingesta; la ventana sólo vuelve a ejecutar este fragmento"""
+    st.markdown("## 📆 Tendencias de Crecimiento")
+
+    if engine.snapshot_history() is None:
+        st.info("Se necesitan al menos dos fotos de ingesta para ver tendencias "
+                "(`python -m data.snapshots`)")
+        return
+
+    months = st.select_slider("Ventana (meses):", options=TREND_WINDOWS, value=TREND_MONTHS)
+    trends = engine.trends(spec, months)
+
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        st.metric(f"Altas - {trends['title']}", f"{trends['added']:,}")
+    with col2:
+        growth = trends['growth_pct']
+        st.metric("Crecimiento", "-" if growth is None else f"{growth:+.1f}%")
+    with col3:
+        st.metric("Período", f"{trends['since']} → {trends['until']}")
+
+    col_left, col_right = st.columns(2)
+    with col_left:
+        show_figure('trend', (spec, months), lambda: charts.build_figure('trend', trends))
+    with col_right:
+        show_figure('growth', (spec, months), lambda: charts.build_figure('growth', trends))
 
-st.markdown("---")
 
 # ========== TABLA DETALLADA ==========
-st.markdown("### 📋 Datos Detallados por País")
-
-if not filtered_df.empty:
-    # Preparar tabla para mostrar
-    display_df = filtered_df.copy()
-    
-    # Seleccionar columnas base que siempre existen
-    base_columns = ['country', 'total_cells', 'gsm', 'umts', 'lte', 'nr']
-    columns_to_show = [col for col in base_columns if col in display_df.columns]
-    
-    # Agregar población si está disponible
-    if 'population_millions' in display_df.columns:
-        columns_to_show.append('population_millions')
-    
-    # Crear DataFrame con solo las columnas disponibles
-    display_df = display_df[columns_to_show].copy()
-    
-    # Crear nombres de columnas dinámicamente
-    column_names = ['País', 'Total de Antenas', '2G', '3G', '4G', '5G']
-    if 'population_millions' in columns_to_show:
-        column_names.append('Población (M)')
-    
-    display_df.columns = column_names
-    display_df = display_df.sort_values('Total de Antenas', ascending=False)
-    
-    # Formatear números con separadores de miles
-    for col in ['Total de Antenas', '2G', '3G', '4G', '5G']:
-        if col in display_df.columns:
-            display_df[col] = display_df[col].apply(lambda x: f"{x:,}")
-    
-    # Formatear población si existe
-    if 'Población (M)' in display_df.columns:
-        display_df['Población (M)'] = display_df['Población (M)'].apply(lambda x: f"{x:.1f}M")
-    
-    
-    st.dataframe(
-        display_df,
-        use_container_width=True,
-        hide_index=True
-    )
-else:
-    st.warning("⚠️ No hay datos que coincidan con los filtros seleccionados")
-    st.info("💡 Intenta ajustar los filtros en el sidebar para ver más países")
+# Encabezados de la tabla detallada
+TABLE_LABELS = {
+    'country': 'País',
+    'total_cells': 'Total de Antenas',
+    'gsm': '2G',
+    'umts': '3G',
+    'lte': '4G',
+    'nr': '5G',
+    'population_millions': 'Población (M)'
+}
+
+# Formato numérico en el navegador (sin convertir cada celda a texto en Python)
+TABLE_COLUMN_CONFIG = {
+    column: st.column_config.NumberColumn(label, format='localized')
+    for column, label in TABLE_LABELS.items()
+}
+TABLE_COLUMN_CONFIG['country'] = TABLE_LABELS['country']
+TABLE_COLUMN_CONFIG['population_millions'] = st.column_config.NumberColumn(
+    TABLE_LABELS['population_millions'], format='%.1fM'
+)
+
+
+@st.fragment
+@REGISTRY.timed('section.table')
+def render_table(spec):
+    """Tabla detallada por país; orden y página sólo vuelven a ejecutar este fragmento"""
+    st.markdown("### 📋 Datos Detallados por País")
+
+    if not len(engine.rows(spec)):
+        st.warning("⚠️ No hay datos que coincidan con los filtros seleccionados")
+        st.info("💡 Intenta ajustar los filtros en el sidebar para ver más países")
+        return
+
+    # Orden y paginación del lado del servidor: sólo se envía la página visible
+    columns = engine.table_columns()
+    col_sort, col_order, col_size, col_page = st.columns([3, 2, 2, 2])
+    sort_by = col_sort.selectbox("Ordenar por:", options=columns,
+                                 index=columns.index('total_cells'),
+                                 format_func=TABLE_LABELS.get)
+    descending = col_order.radio("Orden:", options=['Desc', 'Asc'], horizontal=True) == 'Desc'
+    page_size = col_size.selectbox("Filas por página:", options=[25, 50, 100], index=1)
+    pages = max(1, -(-len(engine.rows(spec)) // page_size))
+    page = col_page.number_input("Página:", min_value=1, max_value=pages, value=1, step=1)
+
+    with REGISTRY.timer('table.page'):
+        table = engine.table_page(spec, sort_by, descending, page, page_size)
+        table_df = pd.DataFrame(table['rows'], columns=columns)
+    with REGISTRY.timer('table.render'):
+        st.dataframe(
+            table_df,
+            column_config=TABLE_COLUMN_CONFIG,
+            use_container_width=True,
+            hide_index=True
+        )
+    st.caption(f"Página {table['page']} de {table['pages']} · {table['total_rows']:,} países")
+
+
+# Columnas del detalle por operador y área (participaciones como barras 0-1)
+DRILLDOWN_COLUMN_CONFIG = {
+    **TABLE_COLUMN_CONFIG,
+    'operator': 'Operador (MCC-MNC)',
+    'area': st.column_config.NumberColumn('Área (LAC/TAC)', format='%d'),
+    'areas': st.column_config.NumberColumn('Áreas', format='localized'),
+    **{f'{tech}_share': st.column_config.ProgressColumn(
+        f'Participación {label}', format='%.2f', min_value=0.0, max_value=1.0)
+       for tech, label in [('gsm', '2G'), ('umts', '3G'), ('lte', '4G'), ('nr', '5G')]}
+}
+
+
+@st.fragment
+@REGISTRY.timed('section.drilldown')
+def render_drilldown(spec):
+    """Detalle de un país por operador y área (los selectores sólo reejecutan el fragmento)"""
+    st.markdown("### 🏢 Detalle por Operador y Área")
+
+    countries = engine.drilldown_countries(spec)
+    if not countries:
+        st.info("Sin agregados por operador: se generan en la ingesta "
+                "(`python -m data.ingest`) o desde las celdas (`python -m data.rollups`)")
+        return
+
+    col_country, col_operator = st.columns(2)
+    country = col_country.selectbox("País:", options=countries)
+    operators = engine.operators(country)
+    st.dataframe(pd.DataFrame(operators), column_config=DRILLDOWN_COLUMN_CONFIG,
+                 use_container_width=True, hide_index=True)
+    show_figure('operators', (country,), lambda: charts.build_figure('operators', operators))
+
+    operator = col_operator.selectbox("Operador:", options=[row['operator'] for row in operators])
+    areas = engine.operator_areas(country, operator)
+    st.caption(f"Áreas de {operator}: {len(areas['rows']):,} de {areas['total']:,}, "
+               "de mayor a menor cantidad de antenas")
+    st.dataframe(pd.DataFrame(areas['rows']), column_config=DRILLDOWN_COLUMN_CONFIG,
+                 use_container_width=True, hide_index=True)
+
 
 # ========== INSIGHTS ==========
-st.markdown("---")
-st.markdown("### 💡 Insights Clave")
-
-col1, col2, col3 = st.columns(3)
-
-with col1:
-    if not filtered_df.empty and len(filtered_df) > 0:
-        # Obtener el índice del país con más torres
-        max_idx = filtered_df['total_cells'].idxmax()
-        leader = filtered_df.loc[max_idx]
-        leader_pct = (leader['total_cells'] / filtered_metrics['total'] * 100) if filtered_metrics['total'] > 0 else 0
-        st.success(f"""
-        **{leader['country']} domina la selección**
-        - {leader_pct:.1f}% del total de antenas
-        - {leader['nr']:,} antenas 5G
-        """)
-    else:
-        st.info("No hay datos para mostrar")
-
-with col2:
-    if filtered_metrics['5g'] > 0:
-        st.warning(f"""
-        **5G en desarrollo**
-        - {filtered_metrics['5g']:,} antenas 5G en selección
-        - {filtered_metrics['5g_pct']:.2f}% del total
+@REGISTRY.timed('section.insights')
+def render_insights(spec):
+    """Insights de la selección"""
+    st.markdown("---")
+    st.markdown("### 💡 Insights Clave")
+
+    filtered_metrics = engine.metrics(spec)
+    filtered_leader = engine.leader(spec)
+    col1, col2, col3 = st.columns(3)
+
+    with col1:
+        if filtered_leader is not None:
+            # Participación del país líder, precalculada desde el cubo
+            st.success(f"""
+            **{filtered_leader['country']} domina la selección**
+            - {filtered_leader['share']:.1f}% del total de antenas
+            - {filtered_leader['5g']:,} antenas 5G
+            """)
+        else:
+            st.info("No hay datos para mostrar")
+
+    with col2:
+        if filtered_metrics['5g'] > 0:
+            st.warning(f"""
+            **5G en desarrollo**
+            - {filtered_metrics['5g']:,} antenas 5G en selección
+            - {filtered_metrics['5g_pct']:.2f}% del total
+            """)
+        else:
+            st.warning("**Sin infraestructura 5G** en la selección actual")
+
+    with col3:
+        dominant_tech = max(['2g', '3g', '4g', '5g'], key=lambda x: filtered_metrics[x])
+        total = filtered_metrics['total']
+        dominant_pct = (filtered_metrics[dominant_tech] / total * 100) if total > 0 else 0
+        tech_names = {'2g': '2G', '3g': '3G', '4g': '4G', '5g': '5G'}
+        st.info(f"""
+        **{tech_names[dominant_tech]} es dominante**
+        - {dominant_pct:.1f}% de la infraestructura
+        - Tecnología más desplegada
         """)
-    else:
-        st.warning("**Sin infraestructura 5G** en la selección actual")
-
-with col3:
-    dominant_tech = max(['2g', '3g', '4g', '5g'], key=lambda x: filtered_metrics[x])
-    dominant_pct = (filtered_metrics[dominant_tech] / filtered_metrics['total'] * 100) if filtered_metrics['total'] > 0 else 0
-    tech_names = {'2g': '2G', '3g': '3G', '4g': '4G', '5g': '5G'}
-    st.info(f"""
-    **{tech_names[dominant_tech]} es dominante**
-    - {dominant_pct:.1f}% de la infraestructura
-    - Tecnología más desplegada
-    """)
+
+
+# Dibujar secciones con la selección actual del sidebar
+render_summary(filter_spec)
+render_overview(filter_spec)
+render_map(filter_spec, selected_regions)
+st.markdown("---")
+render_comparisons(filter_spec)
+st.markdown("---")
+render_trends(filter_spec)
+st.markdown("---")
+render_table(filter_spec)
+render_drilldown(filter_spec)
+render_insights(filter_spec)
 
 # ========== FOOTER ==========
 st.markdown("---")
 st.caption("📡 TechComView SA | Datos: OpenCelliD | Dashboard Unificado v2.1.0")
 st.caption("Todas las funcionalidades integradas en una sola interfaz interactiva")
+
+REGISTRY.observe('rerun', time.perf_counter() - rerun_started)
+
+
+# ========== PANEL DE RENDIMIENTO ==========
+def render_performance_panel():
+    """Tiempos por etapa, payloads y cachés del proceso (sólo con ?admin=<clave>)"""
+    st.markdown("---")
+    st.markdown("### ⏱️ Rendimiento")
+
+    REGISTRY.enabled = st.toggle("Registrar métricas", value=REGISTRY.enabled,
+                                 help="Afecta a todas las sesiones del proceso")
+    if st.button("🧹 Reiniciar métricas"):
+        REGISTRY.reset()
+
+    st.caption("Etapas (ms)")
+    timings = ['total_ms', 'mean_ms', 'p50_ms', 'p95_ms', 'max_ms']
+    st.dataframe(pd.DataFrame(REGISTRY.stage_rows()), use_container_width=True, hide_index=True,
+                 column_config={column: st.column_config.NumberColumn(format='%.2f')
+                                for column in timings})
+    st.caption("Payloads enviados (KB)")
+    st.dataframe(pd.DataFrame(REGISTRY.size_rows()), use_container_width=True, hide_index=True,
+                 column_config={column: st.column_config.NumberColumn(format='%.1f')
+                                for column in ['last_kb', 'mean_kb', 'max_kb']})
+    st.caption("Cachés")
+    st.dataframe(pd.DataFrame(REGISTRY.cache_rows()), use_container_width=True, hide_index=True,
+                 column_config={'hit_rate': st.column_config.ProgressColumn(
+                     'hit_rate', format='%.2f', min_value=0.0, max_value=1.0)})
+
+    st.download_button("📥 Métricas (texto Prometheus)", REGISTRY.to_prometheus(),
+                       file_name="techcom_metrics.prom", mime="text/plain")
+
+    st.caption("Motor")
+    status = refresher.status
+    st.write(f"Versión {status['data_version']} · {status['engines']} motores · "
+             f"{status['builds']} construcciones · "
+             f"última {status['last_build_s'] or 0:.2f} s"
+             + (" (incremental)" if status['incremental'] else ""))
+    if status['last_error']:
+        st.warning(f"Última reconstrucción fallida: {status['last_error']}")
+    if st.button("🔄 Reconstruir ahora", help="Se publica al terminar; las sesiones no esperan"):
+        refresher.check(force=True)
+
+
+def is_admin():
+    """La URL trae la clave de TECHCOM_ADMIN_TOKEN (panel desactivado si no está definida)"""
+    token = os.environ.get(ADMIN_TOKEN_ENV, '')
+    given = st.query_params.get('admin', '')
+    return bool(token) and hmac.compare_digest(given.encode('utf-8'), token.encode('utf-8'))
+
+
+if is_admin():
+    with st.sidebar:
+        render_performance_panel()
+
+# Volcado para scraping, si TECHCOM_METRICS_PATH está definida (cada 10 s como mucho)
+REGISTRY.dump()
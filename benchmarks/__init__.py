@@ -0,0 +1,11 @@
+"""
+Benchmarks de TechComView SA
+
+Suite de rendimiento sobre datasets sintéticos a varias escalas (desde los
+28 países reales hasta millones de puntos de celda). Los resultados se
+guardan en JSON para comparar versiones.
+
+Uso:
+    python -m benchmarks.run
+    python -m benchmarks.compare benchmarks/results/base.json benchmarks/results/nuevo.json
+"""
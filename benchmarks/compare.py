@@ -0,0 +1,103 @@
+"""
+Comparación de dos corridas de benchmarks
+
+Empareja resultados por (benchmark, escala) y reporta la razón entre
+medianas. Sale con código 1 si algún benchmark empeoró más que el umbral,
+para poder usarlo en CI.
+
+Uso:
+    python -m benchmarks.compare base.json nuevo.json --threshold 0.2
+"""
+
+import argparse
+import json
+import sys
+from typing import Any, Dict, List, Optional, Tuple
+
+# Empeoramiento relativo de la mediana considerado regresión (20 %)
+DEFAULT_THRESHOLD = 0.20
+
+# Diferencias absolutas menores a esto se consideran ruido
+NOISE_FLOOR_S = 0.001
+
+
+def load_results(path: str) -> Dict[str, Any]:
+    """Lee un JSON generado por ``python -m benchmarks.run``."""
+    with open(path, encoding="utf-8") as handle:
+        return json.load(handle)
+
+
+def compare(base: Dict[str, Any], new: Dict[str, Any],
+            threshold: float = DEFAULT_THRESHOLD) -> List[Dict[str, Any]]:
+    """
+    Compara las medianas de dos corridas.
+
+    Args:
+        base: Resultados de referencia
+        new: Resultados a evaluar
+        threshold: Empeoramiento relativo tolerado
+
+    Returns:
+        Lista de filas con name, scale, base_s, new_s, ratio y status
+        ('regression', 'improvement', 'ok', 'new' o 'missing')
+    """
+    def index(report: Dict[str, Any]) -> Dict[Tuple[str, str], float]:
+        return {(item["name"], item["scale"]): item["median_s"] for item in report["results"]}
+
+    base_index, new_index = index(base), index(new)
+    rows = []
+    for key in sorted(set(base_index) | set(new_index)):
+        base_s, new_s = base_index.get(key), new_index.get(key)
+        ratio: Optional[float] = None
+        if base_s is None:
+            status = "new"
+        elif new_s is None:
+            status = "missing"
+        else:
+            ratio = new_s / base_s if base_s > 0 else None
+            status = "ok"
+            if abs(new_s - base_s) >= NOISE_FLOOR_S and ratio is not None:
+                if ratio > 1 + threshold:
+                    status = "regression"
+                elif ratio < 1 / (1 + threshold):
+                    status = "improvement"
+        rows.append({"name": key[0], "scale": key[1], "base_s": base_s, "new_s": new_s,
+                     "ratio": ratio, "status": status})
+    return rows
+
+
+def _format_ms(value: Optional[float]) -> str:
+    """Milisegundos con dos decimales, o '-' si falta."""
+    return "-" if value is None else f"{value * 1000:.2f}"
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Punto de entrada de línea de comandos."""
+    parser = argparse.ArgumentParser(description="Compara dos corridas de benchmarks")
+    parser.add_argument("base", help="JSON de referencia")
+    parser.add_argument("new", help="JSON a evaluar")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="Empeoramiento relativo tolerado (0.2 = 20 %%)")
+    args = parser.parse_args(argv)
+
+    base, new = load_results(args.base), load_results(args.new)
+    rows = compare(base, new, args.threshold)
+    icons = {"regression": "🔴", "improvement": "🟢", "ok": "  ", "new": "🆕",
+             "missing": "❔"}
+
+    print(f"{base.get('version')} ({base.get('commit')}) -> "
+          f"{new.get('version')} ({new.get('commit')})")
+    print(f"{'':2} {'benchmark':<28} {'escala':<16} {'base ms':>11} {'nuevo ms':>11} "
+          f"{'razón':>7}")
+    for row in rows:
+        ratio = "-" if row["ratio"] is None else f"{row['ratio']:.2f}x"
+        print(f"{icons[row['status']]} {row['name']:<28} {row['scale']:<16} "
+              f"{_format_ms(row['base_s']):>11} {_format_ms(row['new_s']):>11} {ratio:>7}")
+
+    regressions = [row for row in rows if row["status"] == "regression"]
+    print(f"\n{len(regressions)} regresiones sobre {len(rows)} benchmarks")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,85 @@
+"""
+Tiempo de importación en frío de los módulos del proyecto
+
+Cada medición corre en un intérprete nuevo (sin módulos en memoria), así que
+refleja el arranque de un worker de Streamlit o de un trabajo batch.
+
+Uso:
+    python -m benchmarks.import_time
+    python -m benchmarks.import_time --repeat 10 --modules data,data.engine
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+from typing import Dict, List, Optional
+
+# Raíz del repositorio (los módulos se importan desde ahí, como lo hace app.py)
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Módulos medidos por defecto; "techcomview" es el __init__.py raíz (metadata)
+DEFAULT_MODULES = ["techcomview", "data", "data.engine", "charts", "streamlit"]
+
+# Mediciones por módulo
+DEFAULT_REPEAT = 5
+
+# Código ejecutado en el intérprete nuevo; imprime segundos y módulos pesados cargados
+_PROBE = """
+import importlib, importlib.util, sys, time
+name = sys.argv[1]
+start = time.perf_counter()
+if name == "techcomview":
+    spec = importlib.util.spec_from_file_location(name, sys.argv[2])
+    spec.loader.exec_module(importlib.util.module_from_spec(spec))
+else:
+    importlib.import_module(name)
+elapsed = time.perf_counter() - start
+heavy = [m for m in ("pandas", "numpy", "plotly", "streamlit", "scipy", "pyarrow", "torch")
+         if m in sys.modules]
+print(elapsed, ",".join(heavy))
+"""
+
+
+def import_time(module: str, repeat: int = DEFAULT_REPEAT) -> Dict[str, object]:
+    """
+    Mide la importación en frío de un módulo.
+
+    Args:
+        module: Nombre del módulo ('techcomview' para el __init__.py raíz)
+        repeat: Intérpretes nuevos a lanzar
+
+    Returns:
+        Diccionario con min_s, median_s y las dependencias pesadas cargadas
+    """
+    timings = []
+    heavy = ""
+    for _ in range(repeat):
+        output = subprocess.run(
+            [sys.executable, "-c", _PROBE, module, os.path.join(ROOT, "__init__.py")],
+            capture_output=True, text=True, check=True, cwd=ROOT
+        ).stdout.split()
+        timings.append(float(output[0]))
+        heavy = output[1] if len(output) > 1 else ""
+    return {"min_s": min(timings), "median_s": statistics.median(timings),
+            "mean_s": statistics.fmean(timings), "loaded": heavy.split(",") if heavy else []}
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """Punto de entrada de línea de comandos."""
+    parser = argparse.ArgumentParser(description="Tiempo de importación en frío")
+    parser.add_argument("--modules", default=",".join(DEFAULT_MODULES),
+                        help="Módulos separados por coma")
+    parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT)
+    args = parser.parse_args(argv)
+
+    print(f"{'módulo':<14} {'mediana ms':>11}  dependencias cargadas")
+    for module in args.modules.split(","):
+        result = import_time(module, args.repeat)
+        print(f"{module:<14} {result['median_s'] * 1000:>11.1f}  "
+              f"{', '.join(result['loaded']) or '-'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,306 @@
+"""
+Prueba de carga con sesiones concurrentes
+
+Ejecuta app.py sin navegador con la API de pruebas de Streamlit (AppTest):
+cada sesión simulada corre en su propio hilo y reproduce interacciones
+típicas (regiones, países, botones de análisis rápido, tecnología y tipo de
+comparación). Como en el servidor real, todas las sesiones comparten el
+proceso y las cachés (cache_resource, motor, figuras).
+
+Reporta latencia por rerun (p50/p95/p99), reruns por segundo y RSS máximo
+del proceso, para estimar cuántos analistas atiende un contenedor.
+
+AppTest está pensado para una sesión por proceso: instala un Runtime simulado
+global al empezar cada rerun y lo quita al terminar, y compila el script en
+cada rerun (compile() concurrente falla en algunos CPython 3.11). Antes de
+lanzar los hilos, _allow_concurrent_sessions() mantiene disponible el último
+Runtime simulado y serializa sólo la compilación.
+
+Uso:
+    python -m benchmarks.load_test
+    python -m benchmarks.load_test --sessions 1,5,10,20 --actions 30 --output carga.json
+"""
+
+import argparse
+import json
+import logging
+import os
+import random
+import sys
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+try:
+    import resource
+except ImportError:  # Windows: sin getrusage
+    resource = None
+
+# Raíz del repositorio (app.py se ejecuta desde ahí)
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+APP_PATH = os.path.join(ROOT, "app.py")
+
+# Sesiones concurrentes a probar por defecto
+DEFAULT_SESSIONS = [1, 5, 10]
+
+# Interacciones por sesión
+DEFAULT_ACTIONS = 20
+
+# Espera máxima de un rerun antes de darlo por fallido
+RERUN_TIMEOUT_S = 120
+
+# Percentiles reportados
+PERCENTILES = (50, 95, 99)
+
+# Opciones reproducidas (etiquetas de los widgets de app.py)
+QUICK_BUTTONS = ["🏆 Top 3 Países", "🚀 Solo 5G", "📊 Todos"]
+TECH_OPTIONS = ["Todas", "5G (NR)", "4G (LTE)", "3G (UMTS)", "2G (GSM)"]
+COMPARISON_OPTIONS = ["Total de Torres", "Por Tecnología", "Por Población", "Ranking 5G"]
+
+# Interacción: (tipo, valor)
+Action = Tuple[str, Any]
+
+
+def _widget(widgets, label: str):
+    """Primer widget cuya etiqueta contiene ``label``."""
+    return next(widget for widget in widgets if label in widget.label)
+
+
+def plan_actions(at, count: int, rng: random.Random) -> List[Action]:
+    """
+    Secuencia aleatoria de interacciones para una sesión.
+
+    Args:
+        at: AppTest ya ejecutado (de él salen las regiones y países disponibles)
+        count: Cantidad de interacciones
+        rng: Generador de la sesión
+
+    Returns:
+        Lista de (tipo, valor)
+    """
+    regions = list(_widget(at.multiselect, "Regiones").options)
+    countries = list(_widget(at.multiselect, "Países").options)
+    kinds = ["regions", "countries", "button", "tech", "comparison"]
+    actions = []
+    for _ in range(count):
+        kind = rng.choice(kinds)
+        if kind == "regions":
+            value = rng.sample(regions, rng.randint(1, len(regions)))
+        elif kind == "countries":
+            value = rng.sample(countries, rng.randint(1, min(8, len(countries))))
+        elif kind == "button":
+            value = rng.choice(QUICK_BUTTONS)
+        elif kind == "tech":
+            value = rng.choice(TECH_OPTIONS)
+        else:
+            value = rng.choice(COMPARISON_OPTIONS)
+        actions.append((kind, value))
+    return actions
+
+
+def apply_action(at, action: Action) -> None:
+    """Aplica una interacción y ejecuta el rerun correspondiente."""
+    kind, value = action
+    if kind == "regions":
+        _widget(at.multiselect, "Regiones").set_value(value)
+    elif kind == "countries":
+        # Sólo los países disponibles para las regiones elegidas
+        widget = _widget(at.multiselect, "Países")
+        widget.set_value([country for country in value if country in widget.options])
+    elif kind == "button":
+        _widget(at.button, value).click()
+    elif kind == "tech":
+        _widget(at.selectbox, "Tecnología").select(value)
+    else:
+        _widget(at.selectbox, "Tipo de comparación").select(value)
+    at.run(timeout=RERUN_TIMEOUT_S)
+
+
+def run_session(seed: int, actions: int, barrier: threading.Barrier,
+                results: Dict[str, list]) -> None:
+    """
+    Una sesión simulada: carga inicial y luego ``actions`` interacciones.
+
+    Args:
+        seed: Semilla de la sesión
+        actions: Cantidad de interacciones
+        barrier: Sincroniza el inicio de todas las sesiones
+        results: Latencias y errores compartidos (se agregan con append)
+    """
+    from streamlit.testing.v1 import AppTest
+
+    rng = random.Random(seed)
+    at = AppTest.from_file(APP_PATH, default_timeout=RERUN_TIMEOUT_S)
+    barrier.wait()
+
+    start = time.perf_counter()
+    at.run()
+    results["latencies"].append(("initial", time.perf_counter() - start))
+    for action in plan_actions(at, actions, rng):
+        start = time.perf_counter()
+        try:
+            apply_action(at, action)
+        except Exception as error:  # noqa: BLE001 - se reporta, no corta la prueba
+            results["errors"].append(f"{action[0]}: {error}")
+            continue
+        results["latencies"].append((action[0], time.perf_counter() - start))
+        results["errors"].extend(f"{action[0]}: {item.value}" for item in at.exception)
+
+
+def _allow_concurrent_sessions() -> None:
+    """Adapta AppTest para varias sesiones en hilos (ver docstring del módulo)."""
+    from streamlit.runtime import Runtime
+    from streamlit.runtime.scriptrunner.script_cache import ScriptCache
+
+    if getattr(Runtime, "_load_test_shared", False):
+        return
+    last: Dict[str, Any] = {}
+
+    def instance(cls):
+        if cls._instance is not None:
+            last["runtime"] = cls._instance
+        if "runtime" not in last:
+            raise RuntimeError("Runtime hasn't been created!")
+        return last["runtime"]
+
+    def exists(cls) -> bool:
+        return cls._instance is not None or "runtime" in last
+
+    compile_lock = threading.Lock()
+    get_bytecode = ScriptCache.get_bytecode
+
+    def locked_get_bytecode(self, script_path: str) -> Any:
+        with compile_lock:
+            return get_bytecode(self, script_path)
+
+    Runtime.instance = classmethod(instance)
+    Runtime.exists = classmethod(exists)
+    ScriptCache.get_bytecode = locked_get_bytecode
+    Runtime._load_test_shared = True
+
+
+def warm_up() -> float:
+    """
+    Rerun inicial de una sola sesión: llena las cachés del proceso y deja
+    registrado el Runtime simulado compartido.
+
+    Returns:
+        Segundos del arranque en frío
+    """
+    from streamlit.testing.v1 import AppTest
+
+    _allow_concurrent_sessions()
+    start = time.perf_counter()
+    AppTest.from_file(APP_PATH, default_timeout=RERUN_TIMEOUT_S).run()
+    return time.perf_counter() - start
+
+
+def peak_rss_mb() -> Optional[float]:
+    """
+    RSS máximo del proceso en MB desde su inicio (None si la plataforma no lo
+    informa); en un barrido de concurrencias es acumulado, no por nivel.
+    """
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux informa KB; macOS, bytes
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def _summary(latencies: List[float]) -> Dict[str, float]:
+    """Percentiles y media de una lista de latencias, en segundos."""
+    if not latencies:
+        return {}
+    values = np.asarray(latencies)
+    summary = {f"p{p}_s": float(np.percentile(values, p)) for p in PERCENTILES}
+    summary["mean_s"] = float(values.mean())
+    return summary
+
+
+def load_test(sessions: int, actions: int = DEFAULT_ACTIONS, seed: int = 0) -> Dict[str, Any]:
+    """
+    Ejecuta ``sessions`` sesiones concurrentes.
+
+    Args:
+        sessions: Sesiones simultáneas (un hilo cada una)
+        actions: Interacciones por sesión
+        seed: Semilla base (la sesión i usa seed + i)
+
+    Returns:
+        Diccionario con reruns, reruns_per_s, percentiles globales y por
+        tipo de interacción, errores y peak_rss_mb
+    """
+    results: Dict[str, list] = {"latencies": [], "errors": []}
+    barrier = threading.Barrier(sessions)
+    threads = [threading.Thread(target=run_session, args=(seed + i, actions, barrier, results),
+                                daemon=True) for i in range(sessions)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    by_kind: Dict[str, List[float]] = {}
+    for kind, latency in results["latencies"]:
+        by_kind.setdefault(kind, []).append(latency)
+    interactions = [latency for kind, latency in results["latencies"] if kind != "initial"]
+    return {
+        "sessions": sessions,
+        "reruns": len(results["latencies"]),
+        "elapsed_s": elapsed,
+        "reruns_per_s": len(results["latencies"]) / elapsed if elapsed else 0.0,
+        **_summary(interactions),
+        "by_action": {kind: _summary(values) for kind, values in sorted(by_kind.items())},
+        "errors": results["errors"],
+        "peak_rss_mb": peak_rss_mb()
+    }
+
+
+def _print_report(report: Dict[str, Any]) -> None:
+    """Una línea por nivel de concurrencia."""
+    rss = "-" if report["peak_rss_mb"] is None else f"{report['peak_rss_mb']:.0f}"
+    print(f"{report['sessions']:>8} {report['reruns']:>7} {report['reruns_per_s']:>9.1f} "
+          + " ".join(f"{report.get(f'p{p}_s', 0) * 1000:>9.0f}" for p in PERCENTILES)
+          + f" {rss:>9} {len(report['errors']):>7}")
+    for error in report["errors"][:5]:
+        print(f"         ⚠️ {error}")
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """Punto de entrada de línea de comandos."""
+    parser = argparse.ArgumentParser(description="Prueba de carga con sesiones concurrentes")
+    parser.add_argument("--sessions", default=",".join(map(str, DEFAULT_SESSIONS)),
+                        help="Niveles de concurrencia separados por coma")
+    parser.add_argument("--actions", type=int, default=DEFAULT_ACTIONS,
+                        help="Interacciones por sesión")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="Archivo JSON con los resultados")
+    args = parser.parse_args(argv)
+
+    # app.py importa charts y data desde la raíz del repositorio
+    os.chdir(ROOT)
+    if ROOT not in sys.path:
+        sys.path.insert(0, ROOT)
+    # Los avisos de Streamlit por rerun taparían el reporte
+    logging.disable(logging.WARNING)
+
+    print(f"Arranque en frío: {warm_up():.2f} s")
+    print(f"{'sesiones':>8} {'reruns':>7} {'reruns/s':>9} "
+          + " ".join(f"{f'p{p} ms':>9}" for p in PERCENTILES) + f" {'RSS MB':>9} {'errores':>7}")
+    reports = []
+    for sessions in [int(item) for item in args.sessions.split(",") if item.strip()]:
+        report = load_test(sessions, args.actions, args.seed)
+        _print_report(report)
+        reports.append(report)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as handle:
+            json.dump({"actions": args.actions, "seed": args.seed, "results": reports},
+                      handle, indent=2, ensure_ascii=False)
+
+
+if __name__ == "__main__":
+    main()
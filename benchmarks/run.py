@@ -0,0 +1,389 @@
+"""
+Suite de benchmarks del dashboard
+
+Mide importación en frío, carga de datos (CSV único y particionado por
+región), métricas, filtrado del sidebar, orden y página de la tabla,
+construcción de cada gráfico y tendencias sobre datasets sintéticos por
+país, la carga, agregación del mapa, teselas de densidad y consultas
+espaciales sobre puntos de celda, y el costo de la instrumentación.
+Escribe un JSON por corrida para comparar versiones con
+``python -m benchmarks.compare``.
+
+Uso:
+    python -m benchmarks.run
+    python -m benchmarks.run --quick
+    python -m benchmarks.run --country-scales 28,2800 --cell-scales 10000000 --repeat 3
+"""
+
+import argparse
+import json
+import os
+import platform
+import re
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+import plotly
+
+import charts
+from data import apply_compact_schema, cache, load_expanded_data, partitions, snapshots, sql
+from data.engine import DashboardEngine, make_filter_spec
+from data.query import CellTree
+from data.raster import DensityRasterizer
+from data.spatial import GridPyramid, viewport_bounds
+from instrumentation import MetricsRegistry
+
+from .import_time import DEFAULT_MODULES, import_time
+from .synthetic import REGIONS, make_cell_points, make_country_data
+
+# Escalas por defecto: filas por país y puntos de celda
+COUNTRY_SCALES = [28, 280, 2_800]
+CELL_SCALES = [100_000, 1_000_000, 10_000_000]
+
+# Repeticiones por benchmark (se reporta mínimo, mediana y media)
+DEFAULT_REPEAT = 5
+
+# Directorio de resultados
+RESULTS_DIR = os.path.join(os.path.dirname(__file__), "results")
+
+# Versión del formato del JSON de resultados
+RESULTS_FORMAT_VERSION = 1
+
+# Gráficos medidos por escala (identificadores de charts.build_figure)
+COUNTRY_CHARTS = ["top", "pie", "map", "total", "tech", "population", "ranking5g"]
+
+# Consultas por lote en el benchmark de vecinos más cercanos
+NEAREST_QUERIES = 1_000
+
+# Celdas de baja y de alta en el delta de la pirámide
+DELTA_CELLS = 10_000
+
+# Puntos de medición por corrida del benchmark de instrumentación
+INSTRUMENTATION_CALLS = 10_000
+
+# Fotos mensuales de la historia usadas en los benchmarks de tendencias
+SNAPSHOT_MONTHS = 24
+
+
+def measure(func: Callable[[Any], Any], repeat: int,
+            setup: Optional[Callable[[], Any]] = None) -> Dict[str, float]:
+    """
+    Mide una función varias veces.
+
+    Args:
+        func: Función a medir; recibe lo que devuelve ``setup``
+        repeat: Cantidad de mediciones
+        setup: Preparación no medida, ejecutada antes de cada medición
+
+    Returns:
+        Diccionario con min_s, median_s y mean_s
+    """
+    timings = []
+    for _ in range(repeat):
+        state = setup() if setup is not None else None
+        start = time.perf_counter()
+        func(state)
+        timings.append(time.perf_counter() - start)
+    return {"min_s": min(timings), "median_s": statistics.median(timings),
+            "mean_s": statistics.fmean(timings)}
+
+
+class BenchmarkRun:
+    """Acumula las mediciones de una corrida."""
+
+    def __init__(self, repeat: int, verbose: bool = True):
+        self.repeat = repeat
+        self.verbose = verbose
+        self.results: List[Dict[str, Any]] = []
+
+    def add(self, name: str, scale: str, rows: int, func: Callable[[Any], Any],
+            setup: Optional[Callable[[], Any]] = None, repeat: Optional[int] = None) -> None:
+        """Mide un benchmark y guarda el resultado."""
+        repeat = repeat or self.repeat
+        self.record(name, scale, rows, repeat, measure(func, repeat, setup))
+
+    def record(self, name: str, scale: str, rows: int, repeat: int,
+               timing: Dict[str, Any]) -> None:
+        """Guarda una medición hecha fuera de ``add`` (p. ej. en otro proceso)."""
+        self.results.append(dict(name=name, scale=scale, rows=rows, repeat=repeat, **timing))
+        if self.verbose:
+            print(f"  {name:<28} {scale:<14} {timing['median_s'] * 1000:>11.2f} ms")
+
+
+def _selection(engine: DashboardEngine) -> Dict[str, List[str]]:
+    """Selección típica del sidebar: todas las regiones y la mitad de los países."""
+    regions = engine.regions()
+    countries = engine.countries(regions)
+    return {"regions": regions, "countries": countries[::2]}
+
+
+def bench_country_scale(run: BenchmarkRun, rows: int, workdir: str) -> None:
+    """Benchmarks sobre un dataset por país de ``rows`` filas."""
+    scale = f"countries={rows}"
+    df = make_country_data(rows)
+    source = os.path.join(workdir, f"countries-{rows}.csv")
+    df.to_csv(source, index=False)
+
+    # Carga desde CSV: en frío (parseo + escritura de caché) y con Parquet vigente
+    run.add("load_data.cold", scale, rows, lambda _: cache.read_csv_cached(source),
+            setup=lambda: shutil.rmtree(cache.CACHE_DIR, ignore_errors=True))
+    run.add("load_data.warm", scale, rows, lambda _: cache.read_csv_cached(source))
+
+    # Layout particionado por región: todas las particiones en paralelo y una sola
+    partition_dir = os.path.join(workdir, f"partitions-{rows}")
+    partitions.write_partitions(df, partition_dir)
+    run.add("load_partitioned.all", scale, rows,
+            lambda _: partitions.load_partitioned_data(root=partition_dir))
+    run.add("load_partitioned.region", scale, rows,
+            lambda _: partitions.load_partitioned_data([REGIONS[0]], root=partition_dir))
+
+    run.add("engine.build", scale, rows, lambda _: DashboardEngine(df, cells_loader=lambda: None))
+    engine = DashboardEngine(df, cells_loader=lambda: None)
+    selection = _selection(engine)
+
+    run.add("calculate_metrics", scale, rows,
+            lambda _: engine.cube.metrics(selection["regions"], selection["countries"]))
+    run.add("sidebar.filter", scale, rows, lambda _: (
+        engine.countries(selection["regions"]),
+        engine.index.take(engine.dataframe, countries=selection["countries"],
+                          regions=selection["regions"])
+    ))
+
+    spec = make_filter_spec(selection["regions"], selection["countries"], "Todas")
+    # Orden sin memorizar y página ya ordenada (lo que se envía al navegador)
+    run.add("table.sort", scale, rows, lambda _: DashboardEngine.table_order.__wrapped__(
+        engine, spec, "total_cells", True))
+    run.add("table.page", scale, rows,
+            lambda _: pd.DataFrame(engine.table_page(spec, page=2)["rows"]))
+
+    payloads = {
+        "top": engine.top_countries(spec), "pie": engine.tech_distribution(spec),
+        "map": engine.map_view(spec), "total": engine.comparison_rows(spec),
+        "tech": engine.comparison_rows(spec), "population": engine.comparison_rows(spec),
+        "ranking5g": engine.ranking(spec, "nr")
+    }
+    figure_cache = charts.FigureCache()
+    for chart_id in COUNTRY_CHARTS:
+        def build(c=chart_id):
+            return charts.build_figure(c, payloads[c], title="benchmark")
+
+        run.add(f"figure.{chart_id}", scale, rows, lambda _, f=build: f())
+        # Acierto de caché: reconstrucción desde el JSON serializado
+        charts.cached_figure(chart_id, spec, build, cache=figure_cache)
+        run.add(f"figure.{chart_id}.cached", scale, rows, lambda _, c=chart_id, f=build:
+                charts.cached_figure(c, spec, f, cache=figure_cache))
+
+    # Historia de fotos mensuales: alta de una foto y crecimiento desde los agregados
+    snapshot_dir = os.path.join(workdir, f"snapshots-{rows}")
+    months = pd.date_range(end="2025-10-01", periods=SNAPSHOT_MONTHS, freq="MS")
+    for seed, day in enumerate(months[:-1]):
+        snapshots.append_snapshot(make_country_data(rows, seed=seed), day, root=snapshot_dir)
+    run.add("snapshot.append", scale, rows, lambda _: snapshots.append_snapshot(
+        df, months[-1], root=snapshot_dir, replace=True))
+    history = snapshots.load_history(snapshot_dir)
+    trend_engine = DashboardEngine(df, cells_loader=lambda: None, snapshots_loader=lambda: history)
+    run.add("trends", scale, rows, lambda _: DashboardEngine.trends.__wrapped__(
+        trend_engine, spec, 6))
+
+
+def bench_cell_scale(run: BenchmarkRun, rows: int, workdir: str) -> None:
+    """Benchmarks sobre ``rows`` puntos de celda (mapa, densidad y consultas)."""
+    scale = f"cells={rows}"
+    cells = make_cell_points(rows)
+    source = os.path.join(workdir, f"cells-{rows}.parquet")
+    cells.to_parquet(source, index=False)
+    repeat = max(1, min(run.repeat, 3)) if rows >= 1_000_000 else None
+
+    # Mismo camino que data.load_cells_data()
+    run.add("cells.load", scale, rows,
+            lambda _: apply_compact_schema(pd.read_parquet(source)), repeat=repeat)
+
+    run.add("pyramid.build", scale, rows, lambda _: GridPyramid(cells), repeat=repeat)
+    engine = DashboardEngine(make_country_data(28), cells_loader=lambda: cells)
+    spec = make_filter_spec(engine.regions(), engine.countries(), "Todas")
+    pyramid = engine.pyramid()
+    center = engine.map_view(spec)["center"]
+    for zoom in (3, 8):
+        run.add(f"pyramid.bins.z{zoom}", scale, rows, lambda _, z=zoom: pyramid.bins(
+            z, viewport_bounds(center, z), list(spec[1])))
+
+    # Delta diario típico: DELTA_CELLS celdas modificadas o dadas de baja y otras tantas nuevas
+    changes = pd.concat([cells.iloc[:DELTA_CELLS].assign(sign=-1),
+                         make_cell_points(DELTA_CELLS, seed=1).assign(sign=1)], ignore_index=True)
+    run.add("pyramid.delta", scale, rows, lambda _: pyramid.with_delta(changes))
+
+    run.add("figure.map.binned", scale, rows,
+            lambda _: charts.build_figure("map", engine.map_view(spec, 6), title="benchmark"))
+
+    # Teselas en frío: un rasterizador nuevo (sin caché) por medición
+    def rasterizer_setup() -> DensityRasterizer:
+        return DensityRasterizer(cells, charts.MAP_COLOR_SCALE)
+
+    run.add("raster.build", scale, rows, lambda _: rasterizer_setup(), repeat=repeat)
+    run.add("density.layers.z4", scale, rows, lambda rasterizer: rasterizer.mapbox_layers(
+        "total_cells", 4, viewport_bounds(center, 4)), setup=rasterizer_setup, repeat=repeat)
+    layers = engine.density_layers(spec, 4, charts.MAP_COLOR_SCALE)
+    run.add("figure.density", scale, rows, lambda _: charts.build_figure(
+        "density", engine.map_view(spec, 4), title="benchmark", layers=layers))
+
+    # Base SQL: conteos y top por celda resueltos en la base, frente a pandas en memoria
+    countries_csv = os.path.join(workdir, f"countries-{rows}.csv")
+    make_country_data(28).to_csv(countries_csv, index=False)
+    store = os.path.join(workdir, f"cells-{rows}.sqlite")
+    no_rollups = os.path.join(workdir, "no-rollups.parquet")
+    run.add("sql.build", scale, rows, lambda _: sql.build_store(
+        store, countries_csv, source, no_rollups), repeat=1)
+    run.add("sql.cell_counts", scale, rows, lambda _: sql.aggregate_rows(
+        "cells", ["mcc", "radio"], {"*": "count"}, path=store))
+    run.add("pandas.cell_counts", scale, rows,
+            lambda _: cells.groupby(["mcc", "radio"], observed=True).size())
+    run.add("sql.top_range", scale, rows, lambda _: sql.top_rows(
+        "cells", "range", 10, where={"radio": "LTE"}, path=store))
+
+    run.add("query.tree_build", scale, rows, lambda _: CellTree(cells), repeat=repeat)
+    tree = CellTree(cells)
+    probes = cells.sample(min(NEAREST_QUERIES, rows), random_state=0)
+    run.add("query.nearest", scale, rows, lambda _: tree.nearest(
+        probes["lat"].to_numpy(), probes["lon"].to_numpy(), k=5))
+
+
+def bench_repository_data(run: BenchmarkRun) -> None:
+    """Carga del dataset real del repositorio con data.load_expanded_data()."""
+    df = load_expanded_data()
+    if df is not None:
+        run.add("data.load_expanded_data", "repo", len(df), lambda _: load_expanded_data())
+
+
+def bench_instrumentation(run: BenchmarkRun) -> None:
+    """Costo de INSTRUMENTATION_CALLS temporizadores con el registro apagado y encendido."""
+    for state in ("disabled", "enabled"):
+        registry = MetricsRegistry(enabled=state == "enabled")
+
+        def timers(_, registry=registry):
+            for _ in range(INSTRUMENTATION_CALLS):
+                with registry.timer("stage"):
+                    pass
+
+        run.add(f"instrumentation.{state}", "calls", INSTRUMENTATION_CALLS, timers)
+
+
+def bench_imports(run: BenchmarkRun) -> None:
+    """Importación en frío de cada módulo, en intérpretes nuevos."""
+    for module in DEFAULT_MODULES:
+        timing = import_time(module, run.repeat)
+        timing.pop("loaded")
+        run.record(f"import.{module}", "cold", 0, run.repeat, timing)
+
+
+def _project_version() -> Optional[str]:
+    """Versión declarada en el __init__.py raíz, sin importarlo."""
+    path = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "__init__.py")
+    try:
+        with open(path, encoding="utf-8") as handle:
+            match = re.search(r'__version__\s*=\s*"([^"]+)"', handle.read())
+        return match.group(1) if match else None
+    except OSError:
+        return None
+
+
+def _git_commit() -> Optional[str]:
+    """Commit actual, si el árbol es un repositorio git."""
+    try:
+        output = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                                text=True, check=True, cwd=os.path.dirname(__file__))
+        return output.stdout.strip() or None
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_suite(country_scales: List[int], cell_scales: List[int], repeat: int = DEFAULT_REPEAT,
+              verbose: bool = True) -> Dict[str, Any]:
+    """
+    Ejecuta la suite completa.
+
+    Args:
+        country_scales: Filas de los datasets por país
+        cell_scales: Cantidad de puntos de celda
+        repeat: Mediciones por benchmark
+        verbose: Imprimir cada resultado
+
+    Returns:
+        Diccionario serializable con entorno y resultados
+    """
+    run = BenchmarkRun(repeat, verbose)
+    workdir = tempfile.mkdtemp(prefix="techcom-bench-")
+    previous_cache_dir = cache.CACHE_DIR
+    try:
+        bench_imports(run)
+        bench_instrumentation(run)
+        bench_repository_data(run)
+        # La caché columnar de los datasets sintéticos va al directorio temporal
+        cache.CACHE_DIR = os.path.join(workdir, ".cache")
+        for rows in country_scales:
+            bench_country_scale(run, rows, workdir)
+        for rows in cell_scales:
+            bench_cell_scale(run, rows, workdir)
+    finally:
+        cache.CACHE_DIR = previous_cache_dir
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    return {
+        "format_version": RESULTS_FORMAT_VERSION,
+        "version": _project_version(),
+        "commit": _git_commit(),
+        "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "versions": {"numpy": np.__version__, "pandas": pd.__version__,
+                     "plotly": plotly.__version__},
+        "repeat": repeat,
+        "results": run.results
+    }
+
+
+def _int_list(value: str) -> List[int]:
+    """Parsea una lista de enteros separados por coma (admite '' = ninguno)."""
+    return [int(item.replace("_", "")) for item in value.split(",") if item.strip()]
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """Punto de entrada de línea de comandos."""
+    parser = argparse.ArgumentParser(description="Benchmarks de TechComView SA")
+    parser.add_argument("--country-scales", type=_int_list,
+                        default=COUNTRY_SCALES, help="Filas por país, separadas por coma")
+    parser.add_argument("--cell-scales", type=_int_list,
+                        default=CELL_SCALES, help="Puntos de celda, separados por coma")
+    parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT,
+                        help="Mediciones por benchmark")
+    parser.add_argument("--quick", action="store_true",
+                        help="Sólo la escala más chica de cada tipo, 3 repeticiones")
+    parser.add_argument("--output", help="Ruta del JSON (por defecto benchmarks/results/)")
+    args = parser.parse_args(argv)
+
+    if args.quick:
+        args.country_scales = args.country_scales[:1]
+        args.cell_scales = args.cell_scales[:1]
+        args.repeat = min(args.repeat, 3)
+
+    report = run_suite(args.country_scales, args.cell_scales, args.repeat)
+    output = args.output or os.path.join(
+        RESULTS_DIR, f"bench-{report['version']}-{report['commit'] or 'local'}-"
+                     f"{datetime.now().strftime('%Y%m%d-%H%M%S')}.json"
+    )
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w", encoding="utf-8") as handle:
+        json.dump(report, handle, indent=2)
+    print(f"\n✅ {len(report['results'])} resultados en {output}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+"""
+Datasets sintéticos para los benchmarks
+
+Genera datasets por país con las columnas de DATA_COLUMNS y puntos de celda
+con las columnas de CELL_COLUMNS, a cualquier escala y con semilla fija.
+Los valores parten del dataset expandido real cuando está disponible.
+"""
+
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+from data import DATA_COLUMNS, TECH_COLUMNS, apply_compact_schema, load_expanded_data
+from data.ingest import MCC_COUNTRIES, RADIO_COLUMNS
+
+# Regiones de DATA_CONFIG["supported_regions"]
+REGIONS = ["South America", "Central America", "Caribbean", "North America"]
+
+# Participación de cada tecnología en los puntos de celda
+RADIO_SHARES = {"GSM": 0.2, "UMTS": 0.45, "LTE": 0.3, "NR": 0.05}
+
+# Dispersión (grados) de las celdas alrededor del centroide del país
+CELL_SPREAD_DEGREES = 2.0
+
+
+def _reference() -> pd.DataFrame:
+    """Dataset real por país, o uno aleatorio de 28 filas si no está disponible."""
+    reference = load_expanded_data()
+    if reference is not None:
+        return reference[DATA_COLUMNS].reset_index(drop=True)
+
+    rng = np.random.default_rng(0)
+    countries = sorted(set(MCC_COUNTRIES.values()))
+    counts = {tech: rng.integers(0, 500_000, len(countries)) for tech in TECH_COLUMNS}
+    return pd.DataFrame({
+        "country": countries,
+        "total_cells": sum(counts.values()),
+        **counts,
+        "population_millions": rng.uniform(0.3, 300.0, len(countries)).round(1),
+        "latitude": rng.uniform(-40.0, 40.0, len(countries)),
+        "longitude": rng.uniform(-110.0, -40.0, len(countries)),
+        "region": rng.choice(REGIONS, len(countries))
+    })
+
+
+def make_country_data(rows: int, seed: int = 0,
+                      reference: Optional[pd.DataFrame] = None) -> pd.DataFrame:
+    """
+    Dataset por país con ``rows`` filas.
+
+    Las primeras filas son los países de referencia; las siguientes son
+    copias con conteos, población y coordenadas perturbados ("Argentina 2", ...).
+
+    Args:
+        rows: Cantidad de filas
+        seed: Semilla del generador
+        reference: Dataset base (por defecto el expandido)
+
+    Returns:
+        DataFrame con DATA_COLUMNS y esquema compacto
+    """
+    reference = _reference() if reference is None else reference
+    rng = np.random.default_rng(seed)
+    base = np.arange(rows) % len(reference)
+    copy = np.arange(rows) // len(reference)
+
+    frame = reference.iloc[base].reset_index(drop=True)
+    scale = np.where(copy == 0, 1.0, rng.uniform(0.5, 1.5, rows))
+    counts = {tech: (frame[tech].to_numpy(np.float64) * scale).astype(np.int64)
+              for tech in TECH_COLUMNS}
+    names = frame["country"].astype(str)
+    # Las copias se desplazan ~1° alrededor del país original
+    lat_jitter = np.where(copy == 0, 0.0, rng.normal(0, 1, rows))
+    lon_jitter = np.where(copy == 0, 0.0, rng.normal(0, 1, rows))
+    return apply_compact_schema(pd.DataFrame({
+        "country": np.where(copy == 0, names, names + " " + (copy + 1).astype(str)),
+        "total_cells": sum(counts.values()),
+        **counts,
+        "population_millions": (frame["population_millions"].to_numpy() * scale).round(1),
+        "latitude": frame["latitude"].to_numpy() + lat_jitter,
+        "longitude": frame["longitude"].to_numpy() + lon_jitter,
+        "region": frame["region"].astype(str).to_numpy()
+    })[DATA_COLUMNS])
+
+
+def make_cell_points(rows: int, seed: int = 0,
+                     reference: Optional[pd.DataFrame] = None) -> pd.DataFrame:
+    """
+    Puntos de celda sintéticos alrededor de los centroides de cada país.
+
+    Args:
+        rows: Cantidad de celdas
+        seed: Semilla del generador
+        reference: Dataset por país con centroides (por defecto el expandido)
+
+    Returns:
+        DataFrame con CELL_COLUMNS, como lo devuelve load_cells_data()
+    """
+    reference = _reference() if reference is None else reference
+    centroids = reference.set_index(reference["country"].astype(str))[["latitude", "longitude"]]
+    mccs = np.array([mcc for mcc, name in MCC_COUNTRIES.items() if name in centroids.index])
+    rng = np.random.default_rng(seed)
+
+    mcc = rng.choice(mccs, rows)
+    center = centroids.loc[[MCC_COUNTRIES[code] for code in mccs]].to_numpy()
+    position = pd.Index(mccs).get_indexer(mcc)
+    radio = rng.choice(list(RADIO_SHARES), rows, p=list(RADIO_SHARES.values()))
+    return apply_compact_schema(pd.DataFrame({
+        "radio": pd.Categorical(radio, categories=list(RADIO_COLUMNS)),
+        "mcc": mcc,
+        "net": rng.integers(1, 10, rows),
+        "area": rng.integers(1, 60_000, rows),
+        "cell": np.arange(rows, dtype=np.int64),
+        "lon": center[position, 1] + rng.normal(0, CELL_SPREAD_DEGREES, rows),
+        "lat": center[position, 0] + rng.normal(0, CELL_SPREAD_DEGREES, rows),
+        "range": rng.integers(100, 20_000, rows).astype(np.float64)
+    }))
@@ -0,0 +1,368 @@
+"""
+TechComView SA - Construcción de gráficos
+
+Funciones que arman las figuras Plotly del dashboard a partir de las
+estructuras simples que devuelve data.engine. No dependen de Streamlit, así
+que pueden reutilizarse y medirse fuera de la app.
+
+Las figuras se guardan serializadas en una caché LRU del proceso (compartida
+entre sesiones) con clave (gráfico, filtros, versión del dataset, ...).
+"""
+
+import json
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, List, Optional
+
+import pandas as pd
+import plotly.express as px
+import plotly.graph_objects as go
+import plotly.io as pio
+
+from instrumentation import REGISTRY
+
+# Configuración de la barra de herramientas común a todos los gráficos
+PLOTLY_CONFIG = {
+    'displayModeBar': True,
+    'displaylogo': False,
+    'modeBarButtonsToRemove': ['pan2d', 'lasso2d', 'select2d']
+}
+
+# Configuración fija del mapa
+MAP_COLOR_SCALE = 'Turbo'
+MAP_STYLE = 'carto-darkmatter'
+
+# Memoria máxima de la caché de figuras (JSON serializado)
+FIGURE_CACHE_BYTES = 64 * 1024 * 1024
+
+
+def top_countries_bar(records: List[Dict[str, Any]]) -> go.Figure:
+    """Barras horizontales del top de países por total de torres"""
+    fig = px.bar(
+        pd.DataFrame(records, columns=['country', 'total_cells']),
+        x='total_cells',
+        y='country',
+        orientation='h',
+        color='total_cells',
+        color_continuous_scale='Blues',
+        labels={'total_cells': 'Antenas', 'country': 'País'}
+    )
+    fig.update_layout(
+        showlegend=False,
+        height=400,
+        yaxis={'categoryorder': 'total ascending'},
+        width=None  # Eliminar width explícitamente
+    )
+    return fig
+
+
+def technology_pie(distribution: Dict[str, List[Any]]) -> go.Figure:
+    """Torta de distribución por tecnología"""
+    fig = px.pie(
+        pd.DataFrame(distribution),
+        values='Torres',
+        names='Tecnología',
+        color_discrete_sequence=px.colors.sequential.RdBu
+    )
+    fig.update_traces(textposition='inside', textinfo='percent+label')
+    fig.update_layout(height=400, width=None)  # Eliminar width explícitamente
+    return fig
+
+
+def markers_map(view: Dict[str, Any], title: str) -> go.Figure:
+    """Mapa de marcadores: centroides por país o bins agregados por zoom"""
+    size_col = view['column']
+    # Columnas explícitas: un área visible sin bins se dibuja como mapa vacío
+    columns = ['latitude', 'longitude', 'total_cells', 'gsm', 'umts', 'lte', 'nr']
+    if not view['binned']:
+        columns.append('country')
+    fig = px.scatter_mapbox(
+        pd.DataFrame(view['points'], columns=columns),
+        lat='latitude',
+        lon='longitude',
+        size=size_col,
+        color=size_col,
+        hover_name=None if view['binned'] else 'country',
+        hover_data={
+            'total_cells': True,
+            'gsm': True,
+            'umts': True,
+            'lte': True,
+            'nr': True,
+            'latitude': False,
+            'longitude': False
+        },
+        color_continuous_scale=MAP_COLOR_SCALE,
+        size_max=60,
+        mapbox_style=MAP_STYLE,
+        zoom=view['zoom'],
+        center=view['center'],
+        title=title,
+        labels={size_col: 'Antenas'}
+    )
+    return _style_map(fig)
+
+
+def density_map(view: Dict[str, Any], layers: List[Dict[str, Any]], title: str) -> go.Figure:
+    """Mapa de densidad: teselas PNG como capas de imagen, sin puntos"""
+    fig = go.Figure(go.Scattermapbox(lat=[], lon=[], mode='markers'))
+    fig.update_layout(
+        mapbox_style=MAP_STYLE,
+        mapbox_zoom=view['zoom'],
+        mapbox_center=view['center'],
+        mapbox_layers=layers,
+        title=title
+    )
+    return _style_map(fig)
+
+
+def _style_map(fig: go.Figure) -> go.Figure:
+    """Tamaño, márgenes y barra de color comunes a los mapas"""
+    fig.update_layout(
+        height=600,
+        width=None,  # Eliminar width explícitamente
+        margin={'r': 0, 't': 30, 'l': 0, 'b': 0},
+        coloraxis_colorbar=dict(
+            title="Antenas",
+            tickmode="linear",
+            tick0=0,
+            dtick=50000,
+            len=0.8,
+            thickness=20,
+            bgcolor="rgba(255,255,255,0.8)",
+            bordercolor="rgba(0,0,0,0.2)",
+            borderwidth=1
+        )
+    )
+    return fig
+
+
+def total_towers_bar(records: List[Dict[str, Any]]) -> go.Figure:
+    """Comparativa del total de torres por país"""
+    fig = px.bar(
+        pd.DataFrame(records, columns=['country', 'total_cells']),
+        x='country',
+        y='total_cells',
+        title="Total de Antenas por País",
+        color='total_cells',
+        color_continuous_scale='Blues',
+        labels={'total_cells': 'Total de Antenas', 'country': 'País'}
+    )
+    fig.update_layout(height=500, width=None)  # Eliminar width explícitamente
+    return fig
+
+
+def technology_bar(records: List[Dict[str, Any]]) -> go.Figure:
+    """Barras apiladas de tecnologías por país"""
+    tech_data = pd.DataFrame(records, columns=['country', 'gsm', 'umts', 'lte', 'nr'])
+    tech_data = tech_data.set_index('country')
+    fig = px.bar(
+        tech_data.T,
+        title="Distribución de Tecnologías por País",
+        labels={'value': 'Número de Antenas', 'index': 'Tecnología'},
+        color_discrete_sequence=px.colors.qualitative.Set2
+    )
+    fig.update_layout(height=500, width=None)  # Eliminar width explícitamente
+    return fig
+
+
+def population_scatter(records: List[Dict[str, Any]]) -> go.Figure:
+    """Densidad de antenas por millón de habitantes vs población"""
+    columns = ['country', 'total_cells', 'gsm', 'umts', 'lte', 'nr',
+               'population_millions', 'towers_per_million']
+    fig = px.scatter(
+        pd.DataFrame(records, columns=columns),
+        x='population_millions',
+        y='towers_per_million',
+        size='total_cells',
+        color='country',
+        title="Densidad de Antenas vs Población",
+        labels={
+            'population_millions': 'Población (millones)',
+            'towers_per_million': 'Antenas por millón de habitantes'
+        },
+        hover_data=['total_cells', 'gsm', 'umts', 'lte', 'nr']
+    )
+    fig.update_layout(height=500, width=None)  # Eliminar width explícitamente
+    return fig
+
+
+def ranking_5g_bar(records: List[Dict[str, Any]]) -> go.Figure:
+    """Ranking de infraestructura 5G por país"""
+    fig = px.bar(
+        pd.DataFrame(records, columns=['country', 'nr']),
+        x='country',
+        y='nr',
+        title="Infraestructura 5G por País",
+        color='nr',
+        color_continuous_scale='Purples',
+        labels={'nr': 'Antenas 5G', 'country': 'País'}
+    )
+    fig.update_layout(height=500, width=None)  # Eliminar width explícitamente
+    return fig
+
+
+def trend_line(trends: Dict[str, Any]) -> go.Figure:
+    """Evolución de antenas de la tecnología seleccionada por fecha de foto"""
+    fig = px.line(
+        pd.DataFrame(trends['series'], columns=['date', 'cells']),
+        x='date',
+        y='cells',
+        markers=True,
+        title=f"Evolución - {trends['title']}",
+        labels={'cells': trends['title'], 'date': 'Fecha de la foto'}
+    )
+    # Inicio de la ventana de crecimiento
+    fig.add_vline(x=trends['since'], line_dash='dot', line_color='gray')
+    fig.update_layout(height=400, width=None)
+    return fig
+
+
+def growth_bar(trends: Dict[str, Any]) -> go.Figure:
+    """Altas netas por país en la ventana, coloreadas por tasa de crecimiento"""
+    fig = px.bar(
+        pd.DataFrame(trends['growth'], columns=['country', 'added', 'growth_pct']).head(15),
+        x='country',
+        y='added',
+        color='growth_pct',
+        color_continuous_scale='Greens',
+        title=f"Altas en los últimos {trends['months']} meses",
+        labels={'added': 'Altas netas', 'country': 'País', 'growth_pct': 'Crecimiento %'}
+    )
+    fig.update_layout(height=400, width=None)
+    return fig
+
+
+def operators_bar(records: List[Dict[str, Any]]) -> go.Figure:
+    """Barras apiladas de tecnologías por operador (MCC-MNC)"""
+    fig = px.bar(
+        pd.DataFrame(records, columns=['operator', 'gsm', 'umts', 'lte', 'nr']),
+        x='operator',
+        y=['gsm', 'umts', 'lte', 'nr'],
+        title="Mix Tecnológico por Operador",
+        labels={'value': 'Antenas', 'operator': 'Operador (MCC-MNC)', 'variable': 'Tecnología'},
+        color_discrete_sequence=px.colors.qualitative.Set2
+    )
+    fig.update_layout(height=400, width=None)
+    return fig
+
+
+def build_figure(chart_id: str, payload: Any, title: Optional[str] = None,
+                 layers: Optional[List[Dict[str, Any]]] = None) -> go.Figure:
+    """
+    Construye una figura del dashboard por identificador.
+
+    Args:
+        chart_id: 'top', 'pie', 'map', 'density', 'total', 'tech', 'population',
+            'ranking5g', 'trend', 'growth' u 'operators'
+        payload: Datos del motor para ese gráfico
+        title: Título (sólo mapas)
+        layers: Capas de imagen (sólo mapa de densidad)
+
+    Returns:
+        Figura Plotly
+    """
+    builders = {
+        'top': top_countries_bar,
+        'pie': technology_pie,
+        'total': total_towers_bar,
+        'tech': technology_bar,
+        'population': population_scatter,
+        'ranking5g': ranking_5g_bar,
+        'trend': trend_line,
+        'growth': growth_bar,
+        'operators': operators_bar
+    }
+    if chart_id == 'map':
+        return markers_map(payload, title or "")
+    if chart_id == 'density':
+        return density_map(payload, layers or [], title or "")
+    return builders[chart_id](payload)
+
+
+class FigureCache:
+    """Caché LRU de figuras serializadas con presupuesto de memoria en bytes."""
+
+    def __init__(self, max_bytes: int = FIGURE_CACHE_BYTES):
+        """
+        Args:
+            max_bytes: Tamaño máximo del JSON retenido
+        """
+        self.max_bytes = max_bytes
+        self.bytes = 0
+        self.stats = {'hits': 0, 'misses': 0, 'evictions': 0}
+        self._entries: "OrderedDict[Hashable, str]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: Hashable) -> Optional[str]:
+        """JSON de la figura, o None si no está en caché."""
+        with self._lock:
+            spec = self._entries.get(key)
+            if spec is None:
+                self.stats['misses'] += 1
+                return None
+            self._entries.move_to_end(key)
+            self.stats['hits'] += 1
+            return spec
+
+    def put(self, key: Hashable, spec: str) -> None:
+        """Guarda el JSON de una figura y desaloja las menos usadas si hace falta."""
+        size = len(spec.encode('utf-8'))
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self.bytes -= len(previous.encode('utf-8'))
+            self._entries[key] = spec
+            self.bytes += size
+            while self.bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self.bytes -= len(evicted.encode('utf-8'))
+                self.stats['evictions'] += 1
+
+    def clear(self) -> None:
+        """Vacía la caché (p. ej. al recargar el dataset)."""
+        with self._lock:
+            self._entries.clear()
+            self.bytes = 0
+
+
+# Caché del proceso, compartida por todas las sesiones
+FIGURE_CACHE = FigureCache()
+
+
+def cached_figure(chart_id: str, key: Hashable, builder: Callable[[], go.Figure],
+                  cache: Optional[FigureCache] = None) -> go.Figure:
+    """
+    Devuelve una figura desde la caché o la construye y la guarda.
+
+    Registra el tiempo de construcción (sólo en fallos de caché) y el tamaño
+    del JSON de la figura en instrumentation.REGISTRY.
+
+    Args:
+        chart_id: Identificador del gráfico
+        key: Resto de la clave: (clave de filtros, versión del dataset, ...)
+        builder: Construye la figura si no está en caché
+        cache: Caché a usar (por defecto FIGURE_CACHE)
+
+    Returns:
+        Figura Plotly
+    """
+    cache = FIGURE_CACHE if cache is None else cache
+    full_key = (chart_id, key)
+    spec = cache.get(full_key)
+    if spec is not None:
+        REGISTRY.observe_size(f"figure.{chart_id}", len(spec))
+        # El JSON ya fue validado al construirse: se reconstruye sin validar
+        return go.Figure(json.loads(spec), _validate=False)
+
+    with REGISTRY.timer(f"figure.{chart_id}.build"):
+        fig = builder()
+    spec = pio.to_json(fig, validate=False)
+    REGISTRY.observe_size(f"figure.{chart_id}", len(spec))
+    cache.put(full_key, spec)
+    return fig
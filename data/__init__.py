@@ -2,47 +2,165 @@
 Módulo de datos para TechComView SA
 
 Contiene datasets de telecomunicaciones para países de América Latina y el Caribe.
+
+Importar el paquete no carga pandas: las constantes y rutas están disponibles
+de inmediato y los cargadores importan pandas recién al usarse.
 """
 
-import pandas as pd
+import functools
+import importlib
 import os
-from typing import Optional, Dict, Any
+from typing import TYPE_CHECKING, Any, Callable, Dict, Hashable, Iterable, List, Optional, Tuple
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+# Funciones reexportadas desde submódulos, importadas al primer acceso
+_LAZY_ATTRIBUTES = {
+    "apply_compact_schema": "schema",
+    "memory_report": "schema",
+    "read_csv_cached": "cache",
+    "get_cached_metadata": "cache",
+    "list_partitions": "partitions",
+    "load_partitioned_data": "partitions",
+    "run_query": "sql",
+    "select_rows": "sql",
+    "top_rows": "sql",
+    "aggregate_rows": "sql"
+}
 
 # Configuración de archivos de datos
 DATA_FILES = {
     "expanded": "expanded_telecom_data.csv",
-    "original": "south_america_cells.csv"
+    "original": "south_america_cells.csv",
+    "cells": "cells.parquet",
+    "partitions": "partitions",
+    "snapshots": "snapshots",
+    "rollups": "rollups.parquet",
+    "sql": "techcom.sqlite",
+    "version": "data_version.json"
 }
 
+# Esquema de los datasets agregados (debe coincidir con DATA_CONFIG["data_columns"])
+DATA_COLUMNS = [
+    "country", "total_cells", "gsm", "umts", "lte", "nr",
+    "population_millions", "latitude", "longitude", "region"
+]
+
+# Columnas de conteo por tecnología (2G, 3G, 4G, 5G)
+TECH_COLUMNS = ["gsm", "umts", "lte", "nr"]
+
+# Directorio de datos alternativo (por defecto, el de este paquete)
+DATA_DIR_ENV = "TECHCOM_DATA_DIR"
+
+# Permisos de los archivos de datos nuevos (los existentes conservan los suyos)
+DEFAULT_FILE_MODE = 0o644
+
 def get_data_path(filename: str) -> str:
     """
     Obtiene la ruta completa de un archivo de datos.
     
+    Los archivos se buscan junto a este módulo, o en TECHCOM_DATA_DIR si está
+    definida (datos fuera del paquete, p. ej. en un volumen compartido).
+    
     Args:
         filename: Nombre del archivo
         
     Returns:
         Ruta completa del archivo
     """
-    current_dir = os.path.dirname(__file__)
-    return os.path.join(current_dir, filename)
+    data_dir = os.environ.get(DATA_DIR_ENV) or os.path.dirname(__file__)
+    return os.path.join(data_dir, filename)
+
+def replace_file(tmp_path: str, path: str) -> None:
+    """
+    Publica un archivo temporal en su ruta final (os.replace).
+    
+    tempfile.mkstemp crea los temporales con permisos 0600; antes de
+    reemplazar se copian los permisos del archivo existente (o
+    DEFAULT_FILE_MODE si es nuevo) para que otros usuarios, como el del
+    dashboard, lo sigan pudiendo leer.
+    
+    Args:
+        tmp_path: Archivo temporal ya escrito y cerrado
+        path: Ruta final
+    """
+    import stat  # pylint: disable=import-outside-toplevel
+
+    try:
+        mode = stat.S_IMODE(os.stat(path).st_mode)
+    except OSError:
+        mode = DEFAULT_FILE_MODE
+    os.chmod(tmp_path, mode)
+    os.replace(tmp_path, path)
+
+def atomic_write(path: str, writer: Callable[[str], Any]) -> None:
+    """
+    Escribe un archivo en un temporal del mismo directorio y lo publica con
+    replace_file(): los lectores ven el archivo anterior o el nuevo completo.
+    
+    Args:
+        path: Ruta final
+        writer: Función que recibe la ruta temporal y escribe el contenido
+    """
+    import tempfile  # pylint: disable=import-outside-toplevel
+
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+    os.close(fd)
+    try:
+        writer(tmp_path)
+        replace_file(tmp_path, path)
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
+
+def __getattr__(name: str) -> Any:
+    """Resuelve las funciones de _LAZY_ATTRIBUTES importando su submódulo."""
+    if name in _LAZY_ATTRIBUTES:
+        module = importlib.import_module(f".{_LAZY_ATTRIBUTES[name]}", __name__)
+        value = getattr(module, name)
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
-def load_expanded_data() -> Optional[pd.DataFrame]:
+def load_expanded_data(regions: Optional[Iterable[str]] = None) -> Optional["pd.DataFrame"]:
     """
     Carga el dataset expandido con 28 países.
     
+    Con ``TECHCOM_DATA_BACKEND=sqlite`` se lee desde la base SQL
+    (``python -m data.sql build``) con el filtro de regiones en la consulta.
+    Si no, y existe el layout particionado (``python -m data.partitions``),
+    sólo se leen, en paralelo, las particiones de las regiones pedidas; con
+    el CSV único se lee todo y se filtra.
+    
+    Args:
+        regions: Regiones a cargar (None o vacío: todas)
+        
     Returns:
         DataFrame con datos expandidos o None si hay error
     """
     try:
+        from .sql import (  # pylint: disable=import-outside-toplevel
+            load_countries, sql_backend_enabled)
+        if sql_backend_enabled():
+            return load_countries(regions)
+        from .partitions import (  # pylint: disable=import-outside-toplevel
+            list_partitions, load_partitioned_data)
+        if list_partitions():
+            return load_partitioned_data(regions)
         file_path = get_data_path(DATA_FILES["expanded"])
         if os.path.exists(file_path):
-            return pd.read_csv(file_path)
+            from .cache import read_csv_cached  # pylint: disable=import-outside-toplevel
+            dataframe = read_csv_cached(file_path)
+            if regions and "region" in dataframe.columns:
+                dataframe = dataframe[dataframe["region"].isin(list(regions))]
+            return dataframe
         return None
     except Exception:
         return None
 
-def load_original_data() -> Optional[pd.DataFrame]:
+def load_original_data() -> Optional["pd.DataFrame"]:
     """
     Carga el dataset original con 10 países de Sudamérica.
     
@@ -52,11 +170,158 @@ def load_original_data() -> Optional[pd.DataFrame]:
     try:
         file_path = get_data_path(DATA_FILES["original"])
         if os.path.exists(file_path):
-            return pd.read_csv(file_path)
+            from .cache import read_csv_cached  # pylint: disable=import-outside-toplevel
+            return read_csv_cached(file_path)
+        return None
+    except Exception:
+        return None
+
+def load_cells_data(columns: Optional[List[str]] = None) -> Optional["pd.DataFrame"]:
+    """
+    Carga los puntos de celda generados por ``python -m data.ingest --cells-output``.
+    
+    Sólo se leen las columnas pedidas (del Parquet, o de la base SQL con
+    ``TECHCOM_DATA_BACKEND=sqlite``); las que no existan se omiten.
+    
+    Args:
+        columns: Columnas a cargar (None: todas)
+        
+    Returns:
+        DataFrame con una fila por celda o None si no está disponible
+    """
+    try:
+        from .sql import configured_store, load_cells  # pylint: disable=import-outside-toplevel
+        store = configured_store()
+        if store is not None:
+            return load_cells(columns, store)
+        file_path = get_data_path(DATA_FILES["cells"])
+        if os.path.exists(file_path):
+            import pyarrow.parquet as pq  # pylint: disable=import-outside-toplevel
+            from .cellstore import read_cells  # pylint: disable=import-outside-toplevel
+            from .schema import apply_compact_schema  # pylint: disable=import-outside-toplevel
+            if columns is not None:
+                available = set(pq.read_schema(file_path).names)
+                columns = [column for column in columns if column in available]
+            return apply_compact_schema(read_cells(file_path, columns))
         return None
     except Exception:
         return None
 
+def add_derived_columns(dataframe: "pd.DataFrame") -> "pd.DataFrame":
+    """
+    Agrega las columnas derivadas del dashboard (p. ej. antenas por millón).
+    
+    Args:
+        dataframe: Dataset por país
+        
+    Returns:
+        El mismo DataFrame si ya las tiene, o uno nuevo con las columnas agregadas
+    """
+    if "population_millions" not in dataframe.columns or "towers_per_million" in dataframe.columns:
+        return dataframe
+    towers = (dataframe["total_cells"] / dataframe["population_millions"]).round(0)
+    return dataframe.assign(towers_per_million=towers)
+
+def get_data_version() -> int:
+    """
+    Contador de versión de los datos en disco.
+    
+    Aumenta con cada delta aplicado (``python -m data.delta``) o ingesta
+    completa; las cachés derivadas lo usan como parte de su clave.
+    
+    Returns:
+        Versión actual (0 si nunca se actualizaron los datos)
+    """
+    import json  # pylint: disable=import-outside-toplevel
+
+    try:
+        with open(get_data_path(DATA_FILES["version"]), encoding="utf-8") as handle:
+            return int(json.load(handle)["version"])
+    except (OSError, ValueError, KeyError, TypeError):
+        return 0
+
+def bump_data_version(**details: Any) -> int:
+    """
+    Incrementa el contador de versión de los datos (escritura atómica).
+    
+    Args:
+        **details: Información serializable guardada junto a la versión
+        
+    Returns:
+        Nueva versión
+    """
+    import json  # pylint: disable=import-outside-toplevel
+    import tempfile  # pylint: disable=import-outside-toplevel
+    from datetime import datetime, timezone  # pylint: disable=import-outside-toplevel
+
+    version = get_data_version() + 1
+    state = {"version": version,
+             "updated": datetime.now(timezone.utc).isoformat(timespec="seconds"), **details}
+    path = get_data_path(DATA_FILES["version"])
+    fd, tmp_path = tempfile.mkstemp(suffix=".json", dir=os.path.dirname(path))
+    with os.fdopen(fd, "w", encoding="utf-8") as handle:
+        json.dump(state, handle, ensure_ascii=False)
+    replace_file(tmp_path, path)
+    return version
+
+def get_data_signature() -> Tuple[Any, ...]:
+    """
+    Versión de los datos más (mtime, tamaño) del dataset expandido, de los
+    puntos de celda y de la base SQL, y la firma de las particiones por región.
+    
+    A diferencia de get_data_version(), también cambia si un archivo se
+    reemplaza a mano, sin pasar por data.delta ni data.ingest.
+    
+    Returns:
+        Tupla hashable (versión, firma del expandido, firma de las celdas,
+        firma de la base SQL, firma de las particiones)
+    """
+    from .partitions import partition_signature  # pylint: disable=import-outside-toplevel
+
+    signature: List[Any] = [get_data_version()]
+    for key in ("expanded", "cells", "sql"):
+        try:
+            stat = os.stat(get_data_path(DATA_FILES[key]))
+            signature.append((stat.st_mtime_ns, stat.st_size))
+        except OSError:
+            signature.append(None)
+    signature.append(partition_signature())
+    return tuple(signature)
+
+def load_shared_data(dataset: str = "expanded", version: Optional[Hashable] = None,
+                     regions: Optional[Iterable[str]] = None) -> Optional["pd.DataFrame"]:
+    """
+    Dataset por país compartido por todo el proceso.
+    
+    Se carga una vez por versión de los datos y conjunto de regiones, con el
+    esquema compacto y las columnas derivadas ya calculadas. Es de sólo
+    lectura: todas las sesiones reciben el mismo objeto, y las vistas
+    filtradas se construyen por posición sin modificarlo.
+    
+    Args:
+        dataset: 'expanded' u 'original'
+        version: Versión o firma de los datos (por defecto get_data_signature())
+        regions: Regiones a cargar, sólo para 'expanded' (None o vacío: todas)
+        
+    Returns:
+        DataFrame compartido o None si el dataset no está disponible
+    """
+    regions = tuple(sorted(regions)) if regions and dataset == "expanded" else None
+    return _load_shared_version(dataset, get_data_signature() if version is None else version,
+                                regions)
+
+@functools.lru_cache(maxsize=8)
+def _load_shared_version(dataset: str, version: Hashable,
+                         regions: Optional[Tuple[str, ...]]) -> Optional["pd.DataFrame"]:
+    """Carga de load_shared_data() memorizada por (dataset, versión, regiones)."""
+    if dataset == "expanded":
+        dataframe = load_expanded_data(regions)
+    else:
+        dataframe = load_original_data()
+    if dataframe is None:
+        return None
+    return add_derived_columns(dataframe.reset_index(drop=True))
+
 def get_available_datasets() -> Dict[str, bool]:
     """
     Verifica qué datasets están disponibles.
@@ -66,13 +331,18 @@ def get_available_datasets() -> Dict[str, bool]:
     """
     return {
         "expanded": os.path.exists(get_data_path(DATA_FILES["expanded"])),
-        "original": os.path.exists(get_data_path(DATA_FILES["original"]))
+        "original": os.path.exists(get_data_path(DATA_FILES["original"])),
+        "cells": os.path.exists(get_data_path(DATA_FILES["cells"])),
+        "partitions": os.path.isdir(get_data_path(DATA_FILES["partitions"])),
+        "sql": os.path.exists(get_data_path(DATA_FILES["sql"]))
     }
 
 def get_data_info() -> Dict[str, Any]:
     """
     Obtiene información sobre los datasets disponibles.
     
+    Usa los metadatos de la caché columnar, sin leer los datos.
+    
     Returns:
         Diccionario con información de los datasets
     """
@@ -80,17 +350,25 @@ def get_data_info() -> Dict[str, Any]:
         "available_datasets": get_available_datasets(),
         "total_countries": 0,
         "regions": set(),
-        "technologies": ["2G", "3G", "4G", "5G"]
+        "technologies": ["2G", "3G", "4G", "5G"],
+        "column_stats": {}
     }
     
-    # Intentar cargar datos expandidos primero
-    df = load_expanded_data()
-    if df is None:
-        df = load_original_data()
+    from .cache import get_cached_metadata  # pylint: disable=import-outside-toplevel
+
+    # Intentar con los metadatos del dataset expandido primero
+    metadata = None
+    for key in ("expanded", "original"):
+        try:
+            metadata = get_cached_metadata(get_data_path(DATA_FILES[key]))
+        except Exception:
+            metadata = None
+        if metadata is not None:
+            break
     
-    if df is not None:
-        info["total_countries"] = len(df)
-        if "region" in df.columns:
-            info["regions"] = set(df["region"].unique())
+    if metadata is not None:
+        info["total_countries"] = metadata["rows"]
+        info["regions"] = set(metadata["regions"])
+        info["column_stats"] = metadata["stats"]
     
     return info
@@ -0,0 +1,192 @@
+"""
+Caché columnar en disco para los datasets
+
+La primera lectura de un CSV escribe una copia tipada en Parquet (con el
+esquema compacto de data.schema) junto a un archivo de metadatos (filas,
+regiones, estadísticas por columna). Las lecturas siguientes, también desde
+otros procesos, usan el Parquet mientras el mtime y el tamaño del CSV de
+origen no cambien.
+"""
+
+import hashlib
+import json
+import os
+from typing import Any, Dict, Optional, Tuple
+
+import pandas as pd
+
+from . import atomic_write
+from .schema import apply_compact_schema
+
+# Directorio de caché (configurable para despliegues con disco de sólo lectura)
+CACHE_DIR = os.environ.get(
+    "TECHCOM_CACHE_DIR", os.path.join(os.path.dirname(__file__), ".cache")
+)
+
+# Versión del formato de metadatos; al cambiarla se invalidan las cachés previas
+CACHE_FORMAT_VERSION = 2
+
+
+def _parquet_available() -> bool:
+    """Indica si pyarrow está instalado para leer/escribir Parquet."""
+    try:
+        import pyarrow  # noqa: F401  pylint: disable=import-outside-toplevel,unused-import
+        return True
+    except ImportError:
+        return False
+
+
+def _cache_paths(source: str) -> Tuple[str, str]:
+    """
+    Calcula las rutas del Parquet y de los metadatos para un CSV.
+
+    Args:
+        source: Ruta del CSV de origen
+
+    Returns:
+        Tupla (ruta_parquet, ruta_metadatos)
+    """
+    absolute = os.path.abspath(source)
+    digest = hashlib.sha1(absolute.encode("utf-8")).hexdigest()[:8]
+    stem = os.path.splitext(os.path.basename(absolute))[0]
+    base = os.path.join(CACHE_DIR, f"{stem}-{digest}")
+    return base + ".parquet", base + ".meta.json"
+
+
+def _source_signature(source: str) -> Dict[str, int]:
+    """Firma del archivo de origen usada para invalidar la caché."""
+    stat = os.stat(source)
+    return {"source_mtime_ns": stat.st_mtime_ns, "source_size": stat.st_size}
+
+
+def _json_scalar(value: Any) -> Any:
+    """Convierte escalares de numpy a tipos nativos serializables."""
+    return value.item() if hasattr(value, "item") else value
+
+
+def build_metadata(dataframe: pd.DataFrame) -> Dict[str, Any]:
+    """
+    Resume un dataset: filas, regiones y estadísticas por columna.
+
+    Args:
+        dataframe: Dataset cargado
+
+    Returns:
+        Diccionario serializable a JSON
+    """
+    stats: Dict[str, Dict[str, Any]] = {}
+    for column in dataframe.columns:
+        series = dataframe[column]
+        if pd.api.types.is_numeric_dtype(series):
+            stats[column] = {
+                "min": _json_scalar(series.min()),
+                "max": _json_scalar(series.max()),
+                "sum": _json_scalar(series.sum())
+            }
+        else:
+            stats[column] = {"unique": int(series.nunique())}
+
+    regions = sorted(dataframe["region"].dropna().unique()) if "region" in dataframe else []
+    return {
+        "rows": len(dataframe),
+        "columns": list(dataframe.columns),
+        "dtypes": {column: str(dtype) for column, dtype in dataframe.dtypes.items()},
+        "regions": [str(region) for region in regions],
+        "stats": stats
+    }
+
+
+def _read_valid_metadata(source: str) -> Optional[Dict[str, Any]]:
+    """
+    Lee los metadatos si siguen correspondiendo al CSV de origen.
+
+    Args:
+        source: Ruta del CSV de origen
+
+    Returns:
+        Metadatos válidos o None si faltan o están desactualizados
+    """
+    _, meta_path = _cache_paths(source)
+    try:
+        with open(meta_path, encoding="utf-8") as handle:
+            metadata = json.load(handle)
+    except (OSError, ValueError):
+        return None
+
+    expected = dict(_source_signature(source), format_version=CACHE_FORMAT_VERSION)
+    if any(metadata.get(key) != value for key, value in expected.items()):
+        return None
+    return metadata
+
+
+def _write_cache(source: str, dataframe: pd.DataFrame) -> Dict[str, Any]:
+    """
+    Escribe Parquet y metadatos para un CSV recién leído.
+
+    Los metadatos se escriben al final: su presencia marca la caché como
+    completa para otros procesos.
+    """
+    parquet_path, meta_path = _cache_paths(source)
+    metadata = dict(build_metadata(dataframe), **_source_signature(source))
+    metadata["format_version"] = CACHE_FORMAT_VERSION
+    metadata["parquet"] = _parquet_available()
+
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    if metadata["parquet"]:
+        atomic_write(parquet_path, lambda tmp: dataframe.to_parquet(tmp, index=False))
+
+    def write_json(tmp: str) -> None:
+        with open(tmp, "w", encoding="utf-8") as handle:
+            json.dump(metadata, handle, ensure_ascii=False, indent=2)
+
+    atomic_write(meta_path, write_json)
+    return metadata
+
+
+def read_csv_cached(source: str) -> pd.DataFrame:
+    """
+    Lee un CSV usando la caché columnar cuando está vigente.
+
+    Args:
+        source: Ruta del CSV de origen
+
+    Returns:
+        DataFrame con el contenido del CSV
+    """
+    metadata = _read_valid_metadata(source)
+    if metadata is not None and metadata.get("parquet"):
+        parquet_path, _ = _cache_paths(source)
+        try:
+            return pd.read_parquet(parquet_path)
+        except (OSError, ValueError, ImportError):
+            pass
+
+    dataframe = apply_compact_schema(pd.read_csv(source))
+    try:
+        _write_cache(source, dataframe)
+    except OSError:
+        # Sin permisos de escritura: se sigue funcionando sin caché
+        pass
+    return dataframe
+
+
+def get_cached_metadata(source: str) -> Optional[Dict[str, Any]]:
+    """
+    Obtiene los metadatos de un CSV, generando la caché si hace falta.
+
+    Args:
+        source: Ruta del CSV de origen
+
+    Returns:
+        Metadatos del dataset o None si el archivo no existe
+    """
+    if not os.path.exists(source):
+        return None
+    metadata = _read_valid_metadata(source)
+    if metadata is None:
+        dataframe = apply_compact_schema(pd.read_csv(source))
+        try:
+            metadata = _write_cache(source, dataframe)
+        except OSError:
+            metadata = build_metadata(dataframe)
+    return metadata
@@ -0,0 +1,215 @@
+"""
+Almacén de puntos de celda: base inmutable más partes de cambios
+
+La ingesta completa escribe la base (cells.parquet). Cada delta
+(data.delta) agrega una parte en el directorio ``cells-parts`` junto a ella
+con las filas con signo del diff: la versión anterior de cada celda tocada
+(-1) y la nueva (+1). Un delta escribe así en proporción al diff, sin leer
+ni reescribir la base.
+
+Al leer, el último evento de cada clave decide: con +1 la celda vale esa
+versión y con -1 no existe; las celdas sin eventos salen de la base tal
+cual. Las partes se acumulan hasta compactarlas, lo que reescribe la base
+con las partes aplicadas y las borra. Aplicar de nuevo una parte sobre la
+base ya compactada no cambia nada, así que un corte a mitad de la
+compactación no deja datos inconsistentes.
+
+Uso:
+    python -m data.cellstore
+    python -m data.cellstore --compact
+"""
+
+import argparse
+import glob
+import os
+import shutil
+from typing import Iterator, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from . import DATA_FILES, atomic_write, get_data_path
+from .ingest import CELL_COLUMNS, CellPointWriter
+
+# Identidad de una celda en OpenCelliD
+KEY_COLUMNS = ["radio", "mcc", "net", "area", "cell"]
+
+# Filas leídas por lote de la base
+CELL_BATCH_ROWS = 1_000_000
+
+# Filtros de pyarrow, p. ej. [("mcc", "in", [722, 730])]
+Filters = List[Tuple[str, str, object]]
+
+
+def parts_dir(path: str) -> str:
+    """Directorio de partes de un almacén (``cells.parquet`` -> ``cells-parts``)."""
+    return os.path.splitext(path)[0] + "-parts"
+
+
+def list_parts(path: str) -> List[str]:
+    """Partes pendientes de un almacén, en orden de aplicación."""
+    return sorted(glob.glob(os.path.join(parts_dir(path), "v*.parquet")))
+
+
+def write_part(path: str, version: int, changes: pd.DataFrame) -> str:
+    """
+    Agrega al almacén las celdas con signo de un delta.
+
+    Args:
+        path: Base del almacén
+        version: Versión de los datos del delta (ordena las partes)
+        changes: Celdas con CELL_COLUMNS y 'sign' (data.delta.resolve_changes())
+
+    Returns:
+        Ruta de la parte escrita
+    """
+    directory = parts_dir(path)
+    os.makedirs(directory, exist_ok=True)
+    part_path = os.path.join(directory, f"v{version:06d}.parquet")
+    frame = changes[CELL_COLUMNS + ["sign"]].astype({"radio": str})
+    atomic_write(part_path, lambda tmp_path: frame.to_parquet(tmp_path, index=False))
+    return part_path
+
+
+def clear_parts(path: str) -> None:
+    """Borra las partes de un almacén (tras reescribir su base)."""
+    shutil.rmtree(parts_dir(path), ignore_errors=True)
+
+
+def key_frame(frame: pd.DataFrame) -> pd.DataFrame:
+    """Columnas clave con tipos comparables entre diffs, partes y base."""
+    return pd.DataFrame({"radio": frame["radio"].astype(str).to_numpy(),
+                         **{column: frame[column].to_numpy(np.int64)
+                            for column in KEY_COLUMNS[1:]}})
+
+
+def _pending(path: str, filters: Optional[Filters] = None) -> Optional[pd.DataFrame]:
+    """Último evento de cada clave en las partes, o None si no hay partes."""
+    parts = list_parts(path)
+    if not parts:
+        return None
+    events = pd.concat([pd.read_parquet(part, filters=filters) for part in parts],
+                       ignore_index=True)
+    return events.drop_duplicates(KEY_COLUMNS, keep="last", ignore_index=True)
+
+
+def _untouched(frame: pd.DataFrame, pending: pd.DataFrame) -> pd.DataFrame:
+    """Filas de la base cuya clave no aparece en las partes."""
+    # Prefiltro por número de celda; la comparación exacta sólo sobre ese subconjunto
+    candidates = np.flatnonzero(frame["cell"].isin(pending["cell"].unique()).to_numpy())
+    if not len(candidates):
+        return frame
+    touched = key_frame(frame.iloc[candidates]).merge(
+        key_frame(pending), on=KEY_COLUMNS, how="left", indicator=True
+    )["_merge"].to_numpy() == "both"
+    keep = np.ones(len(frame), dtype=bool)
+    keep[candidates[touched]] = False
+    return frame[keep]
+
+
+def _with_keys(columns: Optional[List[str]]) -> Optional[List[str]]:
+    """Columnas a leer de la base para poder descartar las claves tocadas."""
+    return None if columns is None else list(dict.fromkeys(columns + KEY_COLUMNS))
+
+
+def read_cells(path: str, columns: Optional[List[str]] = None,
+               filters: Optional[Filters] = None) -> pd.DataFrame:
+    """
+    Celdas vigentes del almacén (base con las partes aplicadas).
+
+    Args:
+        path: Base del almacén
+        columns: Columnas a leer (None: todas)
+        filters: Filtros de pyarrow sobre columnas clave (opcional)
+
+    Returns:
+        DataFrame con una fila por celda vigente
+    """
+    pending = _pending(path, filters)
+    if pending is None:
+        return pd.read_parquet(path, columns=columns, filters=filters)
+    base = pd.read_parquet(path, columns=_with_keys(columns), filters=filters)
+    live = pending.loc[pending["sign"] > 0, list(base.columns)]
+    cells = pd.concat([_untouched(base, pending), live.astype(base.dtypes.to_dict())],
+                      ignore_index=True)
+    return cells if columns is None else cells[columns]
+
+
+def iter_cells(path: str, columns: Optional[List[str]] = None,
+               batch_size: int = CELL_BATCH_ROWS) -> Iterator[pd.DataFrame]:
+    """
+    Celdas vigentes del almacén por lotes, sin leer la base entera en memoria.
+
+    Args:
+        path: Base del almacén
+        columns: Columnas a leer (None: todas)
+        batch_size: Filas por lote de la base
+
+    Yields:
+        Lotes de la base sin las claves tocadas y, al final, las celdas vigentes
+        de las partes
+    """
+    import pyarrow.parquet as pq  # pylint: disable=import-outside-toplevel
+
+    pending = _pending(path)
+    read_columns = columns if pending is None else _with_keys(columns)
+    for batch in pq.ParquetFile(path).iter_batches(batch_size=batch_size, columns=read_columns):
+        chunk = batch.to_pandas()
+        if pending is not None:
+            chunk = _untouched(chunk, pending)
+        yield chunk if columns is None else chunk[columns]
+    if pending is not None and (pending["sign"] > 0).any():
+        yield pending.loc[pending["sign"] > 0, columns or CELL_COLUMNS].reset_index(drop=True)
+
+
+def previous_versions(path: str, keys: pd.DataFrame) -> pd.DataFrame:
+    """
+    Versiones vigentes de las celdas cuyas claves aparecen en ``keys``.
+
+    Sólo se leen las filas de los MCC y números de celda de ``keys`` (filtros
+    de pyarrow), no el almacén entero.
+    """
+    if keys.empty:
+        return pd.DataFrame(columns=CELL_COLUMNS)
+    keys = key_frame(keys).drop_duplicates()
+    filters = [("mcc", "in", keys["mcc"].unique().tolist()),
+               ("cell", "in", keys["cell"].unique().tolist())]
+    cells = read_cells(path, CELL_COLUMNS, filters)
+    matched = key_frame(cells).merge(keys, on=KEY_COLUMNS, how="left", indicator=True)
+    return cells[matched["_merge"].to_numpy() == "both"].reset_index(drop=True)
+
+
+def compact(path: str) -> int:
+    """
+    Reescribe la base con las partes aplicadas y borra las partes.
+
+    Returns:
+        Filas de la base resultante
+    """
+    rows = 0
+    writer = CellPointWriter(path)
+    for chunk in iter_cells(path, CELL_COLUMNS):
+        writer.write(chunk)
+        rows += len(chunk)
+    # close() publica la base nueva y borra las partes
+    writer.close()
+    return rows
+
+
+def main(argv: Optional[list] = None) -> None:
+    """Punto de entrada de línea de comandos."""
+    parser = argparse.ArgumentParser(description="Almacén de puntos de celda")
+    parser.add_argument("path", nargs="?", default=get_data_path(DATA_FILES["cells"]),
+                        help="Base del almacén (por defecto data/cells.parquet)")
+    parser.add_argument("--compact", action="store_true",
+                        help="Aplica las partes pendientes a la base y las borra")
+    args = parser.parse_args(argv)
+
+    parts = list_parts(args.path)
+    print(f"📦 {args.path}: {len(parts)} partes pendientes")
+    if args.compact and parts:
+        print(f"✅ Base compactada: {compact(args.path):,} celdas")
+
+
+if __name__ == "__main__":
+    main()
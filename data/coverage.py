@@ -0,0 +1,214 @@
+"""
+Estimación de área y población cubierta por país y tecnología
+
+Rasteriza el radio de cobertura de cada celda (campo ``range`` de
+OpenCelliD o un valor por defecto por tecnología) sobre una grilla nacional
+de ~1 km². Las celdas superpuestas no se cuentan dos veces: cada disco se
+marca con OR sobre un bitmap, sin uniones de geometrías.
+
+Sólo se cuentan los píxeles dentro del rectángulo envolvente del país
+(COUNTRY_BOUNDS): los discos que caen lejos en el mar o en países vecinos no
+suman territorio. El rectángulo todavía incluye algo de mar y de fronteras,
+así que la proporción puede superar el 100 %; en ese caso se topea y se
+marca en ``coverage_capped``.
+"""
+
+from functools import lru_cache
+from typing import Dict, Optional, Tuple
+
+from .spatial import Bounds
+
+import numpy as np
+import pandas as pd
+
+from . import TECH_COLUMNS
+from .ingest import MCC_COUNTRIES, RADIO_COLUMNS
+
+# Lado de cada píxel de la grilla nacional en km
+GRID_RESOLUTION_KM = 1.0
+
+# Límite de píxeles por grilla; si se supera se engrosa la resolución
+MAX_GRID_PIXELS = 150_000_000
+
+# Pares (celda, píxel) procesados por lote al marcar discos
+STAMP_BATCH = 8_000_000
+
+# Km por grado de latitud
+KM_PER_DEGREE = 111.32
+
+# Radio de cobertura por defecto (km) cuando ``range`` falta o es 0
+DEFAULT_RANGE_KM = {"gsm": 5.0, "umts": 3.0, "lte": 2.0, "nr": 0.5}
+
+# Tope de radio (km); OpenCelliD trae rangos espurios de cientos de km
+MAX_RANGE_KM = 35.0
+
+# Superficie por país (km²), mismos nombres que el dataset expandido
+COUNTRY_AREA_KM2 = {
+    "Argentina": 2780400, "Bolivia": 1098581, "Brasil": 8514877, "Chile": 756102,
+    "Colombia": 1141748, "Ecuador": 283561, "Paraguay": 406752, "Peru": 1285216,
+    "Uruguay": 176215, "Venezuela": 916445, "Guyana": 214969, "Suriname": 163820,
+    "French Guiana": 83534, "Mexico": 1964375, "Costa Rica": 51100, "Panama": 75417,
+    "Guatemala": 108889, "Honduras": 112492, "El Salvador": 21041, "Nicaragua": 130373,
+    "Belize": 22966, "Cuba": 109884, "Dominican Republic": 48671, "Haiti": 27750,
+    "Jamaica": 10991, "Trinidad and Tobago": 5130, "Bahamas": 13943, "Barbados": 430,
+    "Estados Unidos": 9833520
+}
+
+# Rectángulo envolvente por país (lat_min, lon_min, lat_max, lon_max), islas incluidas
+COUNTRY_BOUNDS: Dict[str, Bounds] = {
+    "Argentina": (-55.1, -73.6, -21.8, -53.6), "Bolivia": (-22.9, -69.7, -9.7, -57.5),
+    "Brasil": (-33.8, -74.0, 5.3, -28.8), "Chile": (-56.0, -75.7, -17.5, -66.4),
+    "Colombia": (-4.3, -81.8, 13.4, -66.9), "Ecuador": (-5.0, -92.0, 1.7, -75.2),
+    "Paraguay": (-27.6, -62.7, -19.3, -54.3), "Peru": (-18.4, -81.4, 0.0, -68.7),
+    "Uruguay": (-35.0, -58.5, -30.1, -53.1), "Venezuela": (0.6, -73.4, 12.2, -59.8),
+    "Guyana": (1.2, -61.4, 8.6, -56.5), "Suriname": (1.8, -58.1, 6.0, -54.0),
+    "French Guiana": (2.1, -54.6, 5.8, -51.6), "Mexico": (14.5, -118.4, 32.7, -86.7),
+    "Costa Rica": (8.0, -87.1, 11.2, -82.55), "Panama": (7.2, -83.05, 9.65, -77.15),
+    "Guatemala": (13.7, -92.25, 17.8, -88.2), "Honduras": (12.98, -89.35, 17.4, -83.15),
+    "El Salvador": (13.15, -90.1, 14.45, -87.7), "Nicaragua": (10.7, -87.7, 15.0, -82.7),
+    "Belize": (15.9, -89.25, 18.5, -87.5), "Cuba": (19.8, -85.0, 23.3, -74.1),
+    "Dominican Republic": (17.5, -72.0, 19.95, -68.3), "Haiti": (18.0, -74.5, 20.1, -71.6),
+    "Jamaica": (17.7, -78.4, 18.55, -76.2), "Trinidad and Tobago": (10.0, -61.95, 11.4, -60.5),
+    "Bahamas": (20.9, -79.3, 27.3, -72.7), "Barbados": (13.04, -59.65, 13.34, -59.42),
+    "Estados Unidos": (18.9, -179.2, 71.4, -66.9)
+}
+
+# Columnas agregadas por compute_coverage() además de 'country'
+COVERAGE_COLUMNS = (
+    ["coverage_km2", "coverage_pct", "population_covered_millions"]
+    + [f"coverage_pct_{tech}" for tech in TECH_COLUMNS]
+    + ["coverage_capped"]
+)
+
+
+@lru_cache(maxsize=64)
+def _disc_offsets(radius_px: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Desplazamientos (dy, dx) de los píxeles dentro de un disco."""
+    span = np.arange(-radius_px, radius_px + 1)
+    dy, dx = np.meshgrid(span, span, indexing="ij")
+    inside = dy ** 2 + dx ** 2 <= max(radius_px, 0.5) ** 2
+    return dy[inside], dx[inside]
+
+
+def _stamp(grid: np.ndarray, rows: np.ndarray, cols: np.ndarray, radius_px: int) -> None:
+    """Marca (OR) en la grilla los discos de igual radio centrados en (rows, cols)."""
+    dy, dx = _disc_offsets(radius_px)
+    batch = max(1, STAMP_BATCH // len(dy))
+    for start in range(0, len(rows), batch):
+        # Los márgenes de la grilla garantizan índices dentro de rango
+        grid[rows[start:start + batch, None] + dy, cols[start:start + batch, None] + dx] = True
+
+
+def _cell_radius_km(cells: pd.DataFrame, tech: np.ndarray) -> np.ndarray:
+    """Radio de cobertura por celda, con valores por defecto por tecnología."""
+    if "range" in cells:
+        radius = cells["range"].to_numpy(np.float64) / 1000.0
+    else:
+        radius = np.zeros(len(cells))
+    defaults = pd.Series(tech).map(DEFAULT_RANGE_KM).to_numpy(np.float64)
+    radius = np.where(np.isfinite(radius) & (radius > 0), radius, defaults)
+    return np.minimum(radius, MAX_RANGE_KM)
+
+
+def country_coverage(lat: np.ndarray, lon: np.ndarray, radius_km: np.ndarray,
+                     tech: np.ndarray, resolution_km: float = GRID_RESOLUTION_KM,
+                     bounds: Optional[Bounds] = None) -> Dict[str, float]:
+    """
+    Área cubierta (km²) de un país, total y por tecnología.
+
+    Args:
+        lat: Latitudes de las celdas del país
+        lon: Longitudes de las celdas del país
+        radius_km: Radio de cobertura por celda
+        tech: Columna de tecnología por celda ('gsm', 'umts', 'lte', 'nr')
+        resolution_km: Lado del píxel de la grilla
+        bounds: Sólo se cuentan los píxeles dentro de este rectángulo (opcional)
+
+    Returns:
+        Diccionario con 'total' y una clave por tecnología
+    """
+    lat0 = np.radians(float(np.mean(lat)))
+    km_x = KM_PER_DEGREE * max(np.cos(lat0), 0.05)
+    lat_span = (lat.max() - lat.min()) * KM_PER_DEGREE
+    lon_span = (lon.max() - lon.min()) * km_x
+    while (lat_span / resolution_km) * (lon_span / resolution_km) > MAX_GRID_PIXELS:
+        resolution_km *= 2
+
+    radius_px = np.ceil(radius_km / resolution_km).astype(np.int64)
+    pad = int(radius_px.max()) + 1
+    rows = ((lat - lat.min()) * KM_PER_DEGREE / resolution_km).astype(np.int64) + pad
+    cols = ((lon - lon.min()) * km_x / resolution_km).astype(np.int64) + pad
+    shape = (int(rows.max()) + pad + 1, int(cols.max()) + pad + 1)
+
+    # Superficie real de cada fila de píxeles (la grilla es equirectangular)
+    row_lat = np.radians(lat.min() + (np.arange(shape[0]) - pad) * resolution_km / KM_PER_DEGREE)
+    row_area = resolution_km ** 2 * np.clip(np.cos(row_lat), 0, None) / np.cos(lat0)
+    columns = slice(None)
+    if bounds is not None:
+        # Centro de cada píxel dentro del rectángulo del país
+        lat_min, lon_min, lat_max, lon_max = bounds
+        row_deg = np.degrees(row_lat) + resolution_km / KM_PER_DEGREE / 2
+        col_deg = lon.min() + (np.arange(shape[1]) - pad + 0.5) * resolution_km / km_x
+        row_area = np.where((row_deg >= lat_min) & (row_deg <= lat_max), row_area, 0.0)
+        columns = (col_deg >= lon_min) & (col_deg <= lon_max)
+
+    union = np.zeros(shape, dtype=bool)
+    areas: Dict[str, float] = {}
+    for column in TECH_COLUMNS:
+        grid = np.zeros(shape, dtype=bool)
+        selected = tech == column
+        for radius in np.unique(radius_px[selected]):
+            same = selected & (radius_px == radius)
+            # Celdas del mismo radio en el mismo píxel producen el mismo disco
+            centers = np.unique(rows[same] * shape[1] + cols[same])
+            _stamp(grid, centers // shape[1], centers % shape[1], int(radius))
+        areas[column] = float(grid[:, columns].sum(axis=1) @ row_area)
+        union |= grid
+    areas["total"] = float(union[:, columns].sum(axis=1) @ row_area)
+    return areas
+
+
+def compute_coverage(cells: pd.DataFrame, reference: Optional[pd.DataFrame] = None,
+                     resolution_km: float = GRID_RESOLUTION_KM) -> pd.DataFrame:
+    """
+    Cobertura por país: área cubierta, porcentaje del territorio y población.
+
+    La población cubierta asume densidad uniforme dentro del país
+    (población x porcentaje de territorio cubierto). El área se recorta al
+    rectángulo de COUNTRY_BOUNDS; los porcentajes se topean en 100 % y
+    ``coverage_capped`` indica si hizo falta.
+
+    Args:
+        cells: Puntos de celda con 'radio', 'mcc', 'lat', 'lon' y 'range'
+        reference: Dataset por país con 'population_millions' (opcional)
+        resolution_km: Lado del píxel de la grilla
+
+    Returns:
+        DataFrame con 'country' y COVERAGE_COLUMNS
+    """
+    tech = cells["radio"].astype(str).map(RADIO_COLUMNS).to_numpy()
+    country = cells["mcc"].map(MCC_COUNTRIES).to_numpy()
+    radius = _cell_radius_km(cells, tech)
+    lat, lon = cells["lat"].to_numpy(np.float64), cells["lon"].to_numpy(np.float64)
+
+    population = {}
+    if reference is not None and "population_millions" in reference:
+        population = dict(zip(reference["country"], reference["population_millions"]))
+
+    rows = []
+    for name in pd.unique(country[pd.notna(country)]):
+        selected = country == name
+        areas = country_coverage(lat[selected], lon[selected], radius[selected],
+                                 tech[selected], resolution_km, COUNTRY_BOUNDS.get(name))
+        land = COUNTRY_AREA_KM2.get(name)
+        share = min(areas["total"] / land, 1.0) if land else np.nan
+        row = {"country": name, "coverage_km2": round(areas["total"], 1),
+               "coverage_pct": round(share * 100, 2),
+               "population_covered_millions": round(population.get(name, np.nan) * share, 2),
+               "coverage_capped": bool(land) and areas["total"] > land}
+        for column in TECH_COLUMNS:
+            row[f"coverage_pct_{column}"] = (
+                round(min(areas[column] / land, 1.0) * 100, 2) if land else np.nan
+            )
+        rows.append(row)
+    return pd.DataFrame(rows, columns=["country"] + COVERAGE_COLUMNS)
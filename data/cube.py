@@ -0,0 +1,140 @@
+"""
+Cubo de agregados por (región, país, tecnología)
+
+Colapsa el dataset (por país o por celda) en una matriz pequeña con los
+totales de cada tecnología. Cualquier selección de regiones/países se
+resuelve sumando celdas del cubo, sin recorrer las filas originales.
+"""
+
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from . import TECH_COLUMNS
+
+# Medidas del cubo: total más una columna por tecnología
+MEASURES = ["total_cells"] + TECH_COLUMNS
+
+# Clave corta usada en las métricas del dashboard para cada medida
+METRIC_KEYS = {"total_cells": "total", "gsm": "2g", "umts": "3g", "lte": "4g", "nr": "5g"}
+
+
+def metrics_from_totals(totals: Dict[str, int]) -> Dict[str, float]:
+    """
+    Métricas del dashboard a partir de los totales por medida de una selección.
+
+    Returns:
+        Diccionario con claves 'total', '2g'...'5g', '5g_pct' y '4g_pct'
+    """
+    metrics: Dict[str, float] = {METRIC_KEYS[m]: totals[m] for m in MEASURES}
+    total = metrics["total"]
+    for key in ("2g", "3g", "4g", "5g"):
+        metrics[f"{key}_pct"] = (metrics[key] / total * 100) if total > 0 else 0
+    return metrics
+
+
+def leader_from_totals(by_country: pd.DataFrame) -> Optional[Dict[str, object]]:
+    """
+    País con más torres y su participación, a partir de los totales por país.
+
+    Args:
+        by_country: Totales indexados por país con 'total_cells' y 'nr'
+
+    Returns:
+        Diccionario con 'country', 'total', '5g' y 'share', o None si está vacío
+    """
+    if by_country.empty:
+        return None
+    country = by_country["total_cells"].idxmax()
+    selection_total = int(by_country["total_cells"].sum())
+    leader_total = int(by_country.at[country, "total_cells"])
+    return {
+        "country": country,
+        "total": leader_total,
+        "5g": int(by_country.at[country, "nr"]),
+        "share": (leader_total / selection_total * 100) if selection_total > 0 else 0
+    }
+
+
+class AggregateCube:
+    """Totales precalculados por (región, país) y tecnología."""
+
+    def __init__(self, dataframe: pd.DataFrame):
+        """
+        Construye el cubo a partir de un dataset con DATA_COLUMNS.
+
+        Args:
+            dataframe: Dataset por país o por celda
+        """
+        frame = dataframe[["country"] + MEASURES].copy()
+        frame["region"] = dataframe["region"] if "region" in dataframe.columns else ""
+        grouped = frame.groupby(["region", "country"], observed=True, sort=True)[MEASURES].sum()
+
+        self.keys: List[Tuple[str, str]] = [(str(r), str(c)) for r, c in grouped.index]
+        self.regions = np.array([region for region, _ in self.keys], dtype=object)
+        self.countries = np.array([country for _, country in self.keys], dtype=object)
+        self.values = grouped.to_numpy(dtype=np.int64)
+
+        # Totales y porcentajes globales precalculados
+        self.grand_totals = self.values.sum(axis=0)
+        grand_total = self.grand_totals[0]
+        self.shares = self.values / grand_total * 100 if grand_total > 0 else self.values * 0.0
+
+    def mask(self, regions: Optional[Iterable[str]] = None,
+             countries: Optional[Iterable[str]] = None) -> np.ndarray:
+        """
+        Selecciona las celdas del cubo que cumplen los filtros.
+
+        Args:
+            regions: Regiones seleccionadas (None o vacío = todas)
+            countries: Países seleccionados (None = todos)
+
+        Returns:
+            Máscara booleana sobre las claves del cubo
+        """
+        selected = np.ones(len(self.keys), dtype=bool)
+        if countries is not None:
+            selected &= np.isin(self.countries, list(countries))
+        if regions:
+            selected &= np.isin(self.regions, list(regions))
+        return selected
+
+    def totals(self, regions: Optional[Iterable[str]] = None,
+               countries: Optional[Iterable[str]] = None) -> Dict[str, int]:
+        """
+        Suma las medidas de la selección.
+
+        Returns:
+            Diccionario medida -> total
+        """
+        if regions is None and countries is None:
+            sums = self.grand_totals
+        else:
+            sums = self.values[self.mask(regions, countries)].sum(axis=0)
+        return {measure: int(value) for measure, value in zip(MEASURES, sums)}
+
+    def metrics(self, regions: Optional[Iterable[str]] = None,
+                countries: Optional[Iterable[str]] = None) -> Dict[str, float]:
+        """
+        Métricas del dashboard (totales y porcentajes) para una selección.
+
+        Returns:
+            Diccionario con claves 'total', '2g'...'5g', '5g_pct' y '4g_pct'
+        """
+        return metrics_from_totals(self.totals(regions, countries))
+
+    def leader(self, regions: Optional[Iterable[str]] = None,
+               countries: Optional[Iterable[str]] = None) -> Optional[Dict[str, object]]:
+        """
+        País con más torres en la selección y su participación.
+
+        Returns:
+            Diccionario con 'country', 'total', '5g' y 'share', o None si está vacía
+        """
+        indices = np.flatnonzero(self.mask(regions, countries))
+        if len(indices) == 0:
+            return None
+        # Se suman las filas del mismo país (puede figurar en varias regiones)
+        by_country = pd.DataFrame(self.values[indices], columns=MEASURES)
+        return leader_from_totals(by_country.groupby(self.countries[indices], sort=False).sum())
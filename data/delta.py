@@ -0,0 +1,276 @@
+"""
+Actualización incremental desde los diffs diarios de OpenCelliD
+
+Aplica celdas nuevas, modificadas y eliminadas sin releer el volcado
+completo: sólo se actualizan las filas de los países afectados del dataset
+expandido, el almacén de puntos de celda (si existe, como una parte nueva
+de data.cellstore) y un diario de deltas con signo que los procesos en
+marcha usan para actualizar la pirámide del mapa. Cada delta incrementa el
+contador de data.get_data_version() y agrega (o reemplaza) la foto del día
+en la historia de data.snapshots; los agregados por operador y área
+(data.rollups), si existen, reciben las mismas celdas con signo, al igual
+que la base SQL (data.sql) si existe.
+
+Costo: el dataset por país, el diario, los agregados, la base SQL
+(data.sql) y el almacén de puntos dependen del tamaño del diff; del almacén
+sólo se leen las filas de los MCC y números de celda del diff para hallar
+las versiones anteriores. Las partes se acumulan hasta compactarlas
+(``python -m data.cellstore --compact``, fuera de línea). El KD-tree de
+data.query y las estructuras por celda del motor se reconstruyen al primer
+uso tras el cambio de firma.
+
+Los diffs traen las celdas creadas o actualizadas en el día con el formato
+del volcado completo. OpenCelliD no publica bajas; se aceptan en un CSV
+aparte con las columnas radio, mcc, net, area y cell.
+
+Uso:
+    python -m data.delta OCID-diff-cell-export-2025-10-18-T000000.csv.gz
+    python -m data.delta diff.csv.gz --removed bajas.csv
+"""
+
+import argparse
+import glob
+import os
+import time
+from collections import Counter
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from . import (DATA_FILES, TECH_COLUMNS, bump_data_version, get_data_path,
+               get_data_version)
+from .cache import read_csv_cached
+from .cellstore import KEY_COLUMNS, previous_versions, write_part
+from .ingest import (CELL_COLUMNS, DEFAULT_CHUNK_SIZE, MCC_COUNTRIES, RADIO_COLUMNS,
+                     iter_chunks, write_aggregates)
+from .partitions import partitions_of, sync_partitions
+from .rollups import update_rollups
+from .snapshots import append_snapshot, latest_snapshot_date, normalize_date, snapshots_of
+from .sql import store_of, sync_store
+
+# Directorio del diario de deltas (un Parquet por versión)
+JOURNAL_DIR = get_data_path("deltas")
+
+
+def read_diff(source: str, chunksize: int = DEFAULT_CHUNK_SIZE) -> pd.DataFrame:
+    """
+    Lee un diff diario, descartando celdas fuera de la región.
+
+    Returns:
+        DataFrame con CELL_COLUMNS, 'created' y 'updated' (segundos Unix), una
+        fila por celda
+    """
+    columns = CELL_COLUMNS + ["created", "updated"]
+    chunks = list(iter_chunks(source, columns, chunksize))
+    diff = pd.concat(chunks, ignore_index=True) if chunks else pd.DataFrame(columns=columns)
+    # Una celda puede repetirse si se actualizó varias veces: vale la última
+    return diff.drop_duplicates(KEY_COLUMNS, keep="last", ignore_index=True)
+
+
+def read_removed(source: Optional[str]) -> pd.DataFrame:
+    """Claves de las celdas eliminadas (vacío si no hay archivo)."""
+    if source is None:
+        return pd.DataFrame(columns=KEY_COLUMNS)
+    removed = pd.read_csv(source, usecols=KEY_COLUMNS)
+    return removed[removed["mcc"].isin(list(MCC_COUNTRIES))
+                   & removed["radio"].isin(RADIO_COLUMNS)].reset_index(drop=True)
+
+
+def resolve_changes(diff: pd.DataFrame, removed: pd.DataFrame,
+                    store: Optional[str] = None,
+                    since: Optional[int] = None) -> pd.DataFrame:
+    """
+    Convierte un diff y sus bajas en filas de celda con signo.
+
+    Con almacén de puntos, las celdas modificadas restan su versión anterior
+    y suman la nueva, y las bajas restan su versión vigente. Sin almacén sólo
+    importan los conteos: el diff suma las celdas creadas después de ``since`` (las demás
+    ya estaban contadas) y las bajas restan.
+
+    Args:
+        diff: Resultado de read_diff()
+        removed: Resultado de read_removed()
+        store: Base del almacén de puntos (data.cellstore, opcional)
+        since: Última actualización (segundos Unix) del diff aplicado antes;
+            sin ella, la primera actualización de este diff
+
+    Returns:
+        DataFrame con CELL_COLUMNS y 'sign' (+1 alta, -1 baja)
+    """
+    if store is not None:
+        keys = pd.concat([diff[KEY_COLUMNS], removed[KEY_COLUMNS]], ignore_index=True)
+        old = previous_versions(store, keys)
+        added = diff[CELL_COLUMNS]
+    else:
+        old = removed.reindex(columns=CELL_COLUMNS)
+        created = diff["created"].to_numpy(np.int64)
+        if since is None:
+            since = int(diff["updated"].min()) - 1 if len(diff) else 0
+        added = diff.loc[created > since, CELL_COLUMNS]
+    return pd.concat([old[CELL_COLUMNS].assign(sign=-1), added.assign(sign=1)],
+                     ignore_index=True).astype({"radio": str, "sign": np.int8})
+
+
+def signed_counts(changes: pd.DataFrame) -> Counter:
+    """Variación de celdas por (país, columna de tecnología)."""
+    countries = changes["mcc"].map(MCC_COUNTRIES)
+    techs = changes["radio"].astype(str).map(RADIO_COLUMNS)
+    grouped = changes["sign"].astype(np.int64).groupby([countries, techs]).sum()
+    return Counter({key: int(n) for key, n in grouped.items() if n})
+
+
+def update_aggregates(dataframe: pd.DataFrame, counts: Counter) -> Tuple[pd.DataFrame, List[str]]:
+    """
+    Aplica variaciones de conteo sólo a las filas de los países afectados.
+
+    Los países sin fila (sin población ni región conocidas) se ignoran, igual
+    que en la ingesta completa; los conteos no bajan de cero.
+
+    Args:
+        dataframe: Dataset con DATA_COLUMNS
+        counts: Resultado de signed_counts()
+
+    Returns:
+        Tupla (dataset actualizado, países modificados)
+    """
+    updated = dataframe.astype({column: np.int64 for column in TECH_COLUMNS + ["total_cells"]})
+    countries = updated["country"].astype(str)
+    affected = []
+    for country in sorted({country for country, _ in counts}):
+        mask = (countries == country).to_numpy()
+        if not mask.any():
+            continue
+        # total_cells recibe la misma variación (puede incluir radios no desglosadas)
+        for column in TECH_COLUMNS + ["total_cells"]:
+            change = (sum(counts.get((country, tech), 0) for tech in TECH_COLUMNS)
+                      if column == "total_cells" else counts.get((country, column), 0))
+            if change:
+                updated.loc[mask, column] = (updated.loc[mask, column] + change).clip(lower=0)
+        affected.append(country)
+    return updated, affected
+
+
+def write_journal(version: int, changes: pd.DataFrame) -> str:
+    """Guarda el delta con signo de una versión en el diario."""
+    os.makedirs(JOURNAL_DIR, exist_ok=True)
+    path = os.path.join(JOURNAL_DIR, f"v{version:06d}.parquet")
+    changes.to_parquet(path, index=False)
+    return path
+
+
+def read_journal(since: int, until: int) -> Optional[pd.DataFrame]:
+    """
+    Deltas con signo de las versiones (since, until].
+
+    Returns:
+        Filas concatenadas, o None si falta alguna versión (p. ej. hubo una
+        ingesta completa) y hay que reconstruir desde los datos
+    """
+    paths = [os.path.join(JOURNAL_DIR, f"v{version:06d}.parquet")
+             for version in range(since + 1, until + 1)]
+    if not all(os.path.exists(path) for path in paths):
+        return None
+    if not paths:
+        return pd.DataFrame(columns=CELL_COLUMNS + ["sign"])
+    return pd.concat([pd.read_parquet(path) for path in paths], ignore_index=True)
+
+
+def prune_journal(keep: int = 30) -> None:
+    """Borra las entradas del diario salvo las ``keep`` más recientes."""
+    for path in sorted(glob.glob(os.path.join(JOURNAL_DIR, "v*.parquet")))[:-keep or None]:
+        os.unlink(path)
+
+
+def _last_state() -> Dict[str, Any]:
+    """Detalle guardado con la versión actual (vacío si no hay)."""
+    import json  # pylint: disable=import-outside-toplevel
+
+    try:
+        with open(get_data_path(DATA_FILES["version"]), encoding="utf-8") as handle:
+            return json.load(handle)
+    except (OSError, ValueError):
+        return {}
+
+
+def apply_delta(diff_source: str, removed_source: Optional[str] = None,
+                aggregates_path: Optional[str] = None, cells_path: Optional[str] = None,
+                chunksize: int = DEFAULT_CHUNK_SIZE) -> Dict[str, Any]:
+    """
+    Aplica un diff diario a los datos en disco.
+
+    Si hay almacén de puntos se le agrega una parte con las celdas con signo;
+    de la base sólo se leen las celdas de los MCC del diff.
+
+    Args:
+        diff_source: Ruta del diff de OpenCelliD
+        removed_source: CSV opcional con las claves de celdas eliminadas
+        aggregates_path: Dataset por país (por defecto el expandido; si tiene
+            particiones, se reescriben las regiones afectadas)
+        cells_path: Almacén de puntos (por defecto data/cells.parquet, si existe)
+        chunksize: Filas por bloque de lectura del diff
+
+    Returns:
+        Resumen con version, countries, added, removed y seconds
+    """
+    start = time.perf_counter()
+    aggregates_path = aggregates_path or get_data_path(DATA_FILES["expanded"])
+    cells_path = cells_path or get_data_path(DATA_FILES["cells"])
+
+    diff, removed = read_diff(diff_source, chunksize), read_removed(removed_source)
+    store = cells_path if os.path.exists(cells_path) else None
+    changes = resolve_changes(diff, removed, store, _last_state().get("diff_until"))
+
+    aggregates, countries = update_aggregates(read_csv_cached(aggregates_path),
+                                              signed_counts(changes))
+    diff_until = int(diff["updated"].max()) if len(diff) else _last_state().get("diff_until")
+    if countries:
+        write_aggregates(aggregates, aggregates_path)
+        # El dashboard lee las particiones si existen: se reescriben sus regiones
+        if partitions_of(aggregates_path) is not None:
+            sync_partitions(aggregates, countries, partitions_of(aggregates_path))
+        # Foto del día de los datos del diff (sólo para el dataset expandido); un
+        # diff atrasado respecto de la última foto la reemplaza, ya que los
+        # conteos son los vigentes
+        root = snapshots_of(aggregates_path)
+        if root is not None:
+            day = pd.Timestamp(diff_until, unit="s") if diff_until else None
+            snapshot_date = normalize_date(day)
+            last = latest_snapshot_date(root) or snapshot_date
+            append_snapshot(aggregates, max(snapshot_date, last), root, replace=True)
+    update_rollups(changes)
+    if store_of(aggregates_path) is not None:
+        sync_store(aggregates if countries else None, changes, store_of(aggregates_path))
+
+    version = get_data_version() + 1
+    write_journal(version, changes)
+    if store is not None:
+        write_part(store, version, changes)
+    bump_data_version(kind="delta", source=os.path.basename(diff_source),
+                      countries=countries, diff_until=diff_until)
+    prune_journal()
+    return {"version": version, "countries": countries,
+            "added": int((changes["sign"] > 0).sum()), "removed": int((changes["sign"] < 0).sum()),
+            "seconds": time.perf_counter() - start}
+
+
+def main(argv: Optional[list] = None) -> None:
+    """Punto de entrada de línea de comandos."""
+    parser = argparse.ArgumentParser(description="Aplica un diff diario de OpenCelliD")
+    parser.add_argument("diff", help="Ruta del diff (cells.csv.gz del día)")
+    parser.add_argument("--removed", default=None,
+                        help="CSV con radio, mcc, net, area y cell de las celdas eliminadas")
+    parser.add_argument("--aggregates", default=None,
+                        help="Dataset por país (por defecto el expandido)")
+    parser.add_argument("--cells", default=None,
+                        help="Almacén de puntos de celda (por defecto data/cells.parquet)")
+    parser.add_argument("--chunksize", type=int, default=DEFAULT_CHUNK_SIZE)
+    args = parser.parse_args(argv)
+
+    summary = apply_delta(args.diff, args.removed, args.aggregates, args.cells, args.chunksize)
+    print(f"✅ Versión {summary['version']}: +{summary['added']} / -{summary['removed']} celdas, "
+          f"{len(summary['countries'])} países actualizados en {summary['seconds']:.1f} s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,671 @@
+"""
+Motor de análisis del dashboard, independiente de Streamlit
+
+Recibe una clave de filtros (regiones, países, tecnología) y devuelve
+métricas, tops, distribución por tecnología, rankings, filas de tabla y
+datos del mapa como estructuras simples (dicts y listas). Los resultados se
+memorizan por clave de filtros, así que el motor puede usarse desde el
+dashboard, trabajos batch o APIs, y medirse en forma aislada.
+
+Con la base SQL configurada (``TECHCOM_DATA_BACKEND=sqlite``, data.sql) los
+filtros, agregados y tops por país se resuelven en la base y a pandas sólo
+llega el resultado; el cubo y el índice en memoria quedan para lo demás.
+
+Ejemplo:
+    engine = DashboardEngine(load_expanded_data())
+    spec = make_filter_spec(["South America"], engine.countries(), "Todas")
+    engine.metrics(spec)
+"""
+
+import functools
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from . import TECH_COLUMNS, add_derived_columns, get_data_signature, load_cells_data
+from .cube import MEASURES, AggregateCube, leader_from_totals, metrics_from_totals
+from .index import BitmapIndex
+from .rollups import RollupIndex, load_rollups
+from .snapshots import growth_table, load_history, trend_series, window_start
+from .sql import (Filters, aggregate_rows, configured_store, select_rows, tile_counts,
+                  top_rows)
+
+# Clave canónica de filtros: (regiones ordenadas, países ordenados, tecnología)
+FilterSpec = Tuple[Tuple[str, ...], Tuple[str, ...], str]
+
+# Resultados memorizados por motor (desalojo LRU)
+ENGINE_CACHE_SIZE = 512
+
+# Opción del selector de tecnología -> (columna, texto para títulos)
+TECH_FILTERS = {
+    "Todas": ("total_cells", "Total de Antenas"),
+    "2G (GSM)": ("gsm", "Antenas 2G"),
+    "3G (UMTS)": ("umts", "Antenas 3G"),
+    "4G (LTE)": ("lte", "Antenas 4G"),
+    "5G (NR)": ("nr", "Antenas 5G")
+}
+
+# Filas por página de la tabla detallada
+TABLE_PAGE_SIZE = 50
+
+# Áreas (LAC/TAC) por operador enviadas al detalle, las de más antenas
+AREA_LIMIT = 200
+
+# Ventana por defecto (meses) de la vista de tendencias
+TREND_MONTHS = 12
+
+# Columnas de los puntos de celda que usan la pirámide, el rasterizador y la cobertura
+CELL_POINT_COLUMNS = ["radio", "mcc", "lat", "lon", "range"]
+
+# Zoom y centro por defecto del mapa de centroides
+DEFAULT_MAP_ZOOM = 3
+DEFAULT_MAP_CENTER = {"lat": -15.0, "lon": -60.0}
+
+
+def make_filter_spec(regions: Iterable[str], countries: Iterable[str], tech: str) -> FilterSpec:
+    """Construye la clave canónica y hashable de una selección de filtros."""
+    return (tuple(sorted(map(str, regions))), tuple(sorted(map(str, countries))), tech)
+
+
+def load_cell_points() -> Optional[pd.DataFrame]:
+    """Puntos de celda con sólo CELL_POINT_COLUMNS (data.load_cells_data())."""
+    return load_cells_data(CELL_POINT_COLUMNS)
+
+
+def fingerprint(dataframe: pd.DataFrame, max_rows: int = 100_000) -> str:
+    """
+    Huella corta del contenido de un dataset.
+
+    Sobre datasets grandes se hashea una muestra equiespaciada de filas junto
+    con la cantidad total, suficiente para distinguir recargas del dataset.
+    """
+    step = max(1, len(dataframe) // max_rows)
+    hashes = pd.util.hash_pandas_object(dataframe.iloc[::step], index=False)
+    digest = hashlib.sha1(hashes.to_numpy().tobytes())
+    digest.update(str(dataframe.shape).encode("utf-8"))
+    return digest.hexdigest()[:12]
+
+
+def memoized(method: Callable) -> Callable:
+    """
+    Memoriza un método del motor por sus argumentos posicionales.
+
+    Los valores devueltos se comparten entre llamadas: no deben modificarse.
+    """
+    name = method.__name__
+
+    @functools.wraps(method)
+    def wrapper(self, *args):
+        key = (name,) + args
+        with self._lock:
+            if key in self._memo:
+                self._memo.move_to_end(key)
+                self.cache_stats[name]["hits"] += 1
+                return self._memo[key]
+            self.cache_stats.setdefault(name, {"hits": 0, "misses": 0})["misses"] += 1
+
+        value = method(self, *args)
+        with self._lock:
+            self._memo[key] = value
+            if len(self._memo) > self.cache_size:
+                self._memo.popitem(last=False)
+        return value
+
+    return wrapper
+
+
+class SharedState:
+    """
+    Estructuras que no dependen del dataset por país de un motor.
+
+    Puntos de celda y sus derivados (pirámide, rasterizadores, cobertura) y
+    datos auxiliares (historia de fotos, agregados por operador), construidos
+    una vez al primer uso. Los motores de un mismo estado de los datos la
+    comparten (DashboardEngine.with_dataset()): un motor por conjunto de
+    regiones no vuelve a cargar las celdas.
+    """
+
+    def __init__(self, reference: pd.DataFrame):
+        """
+        Args:
+            reference: Dataset por país completo (población para la cobertura)
+        """
+        self.reference = reference
+        self.lock = threading.RLock()
+        self.cells: Dict[str, Any] = {}
+        self.extra: Dict[str, Any] = {}
+
+
+class DashboardEngine:
+    """Cálculos del dashboard sobre un dataset por país."""
+
+    def __init__(self, dataframe: pd.DataFrame,
+                 cells_loader: Callable[[], Optional[pd.DataFrame]] = load_cell_points,
+                 cache_size: int = ENGINE_CACHE_SIZE, data_version: int = 0,
+                 snapshots_loader: Callable[[], Optional[pd.DataFrame]] = load_history,
+                 rollups_loader: Callable[[], Optional[pd.DataFrame]] = load_rollups,
+                 shared: Optional[SharedState] = None, store: Optional[str] = None):
+        """
+        Prepara cubo de agregados e índice de filtros.
+
+        El dataset se comparte (no se copia) si ya tiene índice por posición y
+        columnas derivadas, como el que devuelve data.load_shared_data().
+
+        Args:
+            dataframe: Dataset con DATA_COLUMNS (sólo lectura)
+            cells_loader: Función que carga los puntos de celda (opcional)
+            cache_size: Resultados memorizados como máximo
+            data_version: Versión de los datos en disco (data.get_data_version())
+            snapshots_loader: Función que carga la historia de fotos (opcional)
+            rollups_loader: Función que carga los agregados por operador y área (opcional)
+            shared: Estado de otro motor de los mismos datos (por defecto, uno nuevo
+                con este dataset como referencia)
+            store: Base SQL para filtros, agregados y tops (por defecto la de
+                data.sql.configured_store(), si el backend está activo)
+        """
+        if not isinstance(dataframe.index, pd.RangeIndex) or dataframe.index.start != 0:
+            dataframe = dataframe.reset_index(drop=True)
+        self.dataframe = add_derived_columns(dataframe)
+        self.cube = AggregateCube(self.dataframe)
+        self.index = BitmapIndex(self.dataframe)
+        self.cache_size = cache_size
+        self.data_version = data_version
+        self.cache_stats: Dict[str, Dict[str, int]] = {}
+        self._memo: "OrderedDict[tuple, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._cells_loader = cells_loader
+        self._snapshots_loader = snapshots_loader
+        self._rollups_loader = rollups_loader
+        self._shared = shared if shared is not None else SharedState(self.dataframe)
+        self.store = store if store is not None else configured_store()
+        self._version = fingerprint(self.dataframe)
+        self._data_signature = get_data_signature()
+
+    # ---------- Catálogos y selecciones rápidas ----------
+
+    def regions(self) -> List[str]:
+        """Regiones disponibles, en orden de aparición."""
+        if "region" not in self.dataframe.columns:
+            return []
+        return [str(region) for region in self.dataframe["region"].unique()]
+
+    def countries(self, regions: Optional[Iterable[str]] = None) -> List[str]:
+        """Países disponibles, opcionalmente restringidos a regiones."""
+        regions = list(regions) if regions else None
+        if regions is None or "region" not in self.dataframe.columns:
+            return [str(country) for country in self.dataframe["country"].unique()]
+        rows = self.index.rows(regions=regions)
+        return [str(country) for country in self.dataframe["country"].take(rows).unique()]
+
+    def quick_selection(self, kind: str) -> List[str]:
+        """
+        Países de los botones de análisis rápido.
+
+        Args:
+            kind: 'top3', '5g' o 'all'
+        """
+        if self.store is not None and kind in ("top3", "5g"):
+            where: Filters = {"region": self.regions()} if self.regions() else {}
+            if kind == "top3":
+                top = top_rows("countries", "total_cells", 3, ["country"], where, self.store)
+            else:
+                where["nr >"] = 0
+                top = select_rows("countries", ["country"], where, path=self.store)
+            return [str(c) for c in top["country"]]
+        if kind == "top3":
+            return [str(c) for c in self.dataframe.nlargest(3, "total_cells")["country"]]
+        if kind == "5g":
+            return [str(c) for c in self.dataframe.loc[self.dataframe["nr"] > 0, "country"]]
+        return self.countries()
+
+    def overall_metrics(self) -> Dict[str, float]:
+        """Métricas del dataset completo."""
+        return self.cube.metrics()
+
+    def default_spec(self) -> FilterSpec:
+        """Clave de filtros inicial del sidebar: todas las regiones y países, 'Todas'."""
+        regions = self.regions()
+        return make_filter_spec(regions, self.countries(regions), "Todas")
+
+    def dataset_version(self) -> str:
+        """
+        Versión de los datos del motor (contador, dataset por país y archivos).
+
+        Los puntos de celda entran por la firma de sus archivos
+        (data.get_data_signature(), tomada al crear el motor), no por su
+        contenido: obtener la versión no carga las celdas.
+        """
+        files = hashlib.sha1(repr(self._data_signature).encode("utf-8")).hexdigest()[:8]
+        return f"v{self.data_version}-{self._version}-{files}"
+
+    def refreshed(self, dataframe: pd.DataFrame, changes: Optional[pd.DataFrame],
+                  data_version: int) -> "DashboardEngine":
+        """
+        Motor para una versión nueva de los datos, reutilizando lo que permite el delta.
+
+        El dataset por país se vuelve a indexar (es chico). Si la pirámide del
+        mapa ya estaba construida, se le aplica el delta de celdas en lugar de
+        recalcularla desde los puntos; el resto de las estructuras por celda se
+        reconstruyen al primer uso. Este motor no se modifica.
+
+        Args:
+            dataframe: Dataset por país de la versión nueva
+            changes: Celdas con signo del diario (data.delta.read_journal()),
+                o None para reconstruir todo
+            data_version: Versión nueva
+
+        Returns:
+            DashboardEngine nuevo
+        """
+        engine = DashboardEngine(dataframe, self._cells_loader, self.cache_size, data_version,
+                                 self._snapshots_loader, self._rollups_loader,
+                                 store=self.store)
+        pyramid = self._shared.cells.get("pyramid")
+        if changes is not None and pyramid is not None:
+            engine._shared.cells["pyramid"] = pyramid.with_delta(changes)
+        return engine
+
+    def with_dataset(self, dataframe: pd.DataFrame) -> "DashboardEngine":
+        """
+        Motor para otro dataset por país de los mismos datos (p. ej. un
+        subconjunto de regiones), que comparte con éste los puntos de celda,
+        sus estructuras derivadas y los datos auxiliares.
+
+        Args:
+            dataframe: Dataset por país, de la misma versión de los datos
+
+        Returns:
+            DashboardEngine nuevo
+        """
+        return DashboardEngine(dataframe, self._cells_loader, self.cache_size, self.data_version,
+                               self._snapshots_loader, self._rollups_loader, self._shared,
+                               self.store)
+
+    # ---------- Precalentamiento ----------
+
+    def recent_keys(self, limit: int = ENGINE_CACHE_SIZE) -> List[tuple]:
+        """Claves (método, *argumentos) memorizadas, de la menos a la más reciente."""
+        with self._lock:
+            return list(self._memo)[-limit:]
+
+    def warm(self, keys: Iterable[tuple] = (), derived: bool = True) -> int:
+        """
+        Calcula de antemano resultados y estructuras, antes de recibir sesiones.
+
+        Args:
+            keys: Claves de recent_keys() (típicamente de un motor anterior); la
+                clave de filtros inicial se calcula siempre
+            derived: Construir también la cobertura estimada desde las celdas
+
+        Returns:
+            Resultados calculados
+        """
+        spec = self.default_spec()
+        defaults = [("metrics", spec), ("leader", spec), ("top_countries", spec),
+                    ("tech_distribution", spec), ("comparison_rows", spec),
+                    ("table_order", spec), ("map_view", spec), ("trends", spec, TREND_MONTHS)]
+        warmed = 0
+        for name, *args in defaults + list(keys):
+            try:
+                getattr(self, name)(*args)
+            except Exception:  # pylint: disable=broad-except
+                # Una clave que ya no aplica a los datos nuevos no frena el resto
+                continue
+            warmed += 1
+        if derived:
+            self.coverage()
+        return warmed
+
+    # ---------- Resultados por clave de filtros ----------
+
+    @memoized
+    def rows(self, spec: FilterSpec) -> np.ndarray:
+        """Posiciones (sólo lectura) de las filas que cumplen la selección."""
+        regions, countries, _ = spec
+        rows = self.index.rows(countries=countries, regions=regions or None)
+        rows.flags.writeable = False
+        return rows
+
+    def filtered(self, spec: FilterSpec) -> pd.DataFrame:
+        """
+        Vista de las filas que cumplen la selección (no modificar).
+
+        Sin copias cuando la selección es todo el dataset o un rango contiguo;
+        si no, extrae sólo las filas seleccionadas.
+        """
+        rows = self.rows(spec)
+        if len(rows) == len(self.dataframe):
+            return self.dataframe
+        if len(rows) and rows[-1] - rows[0] + 1 == len(rows):
+            return self.dataframe.iloc[rows[0]:rows[-1] + 1]
+        return self.dataframe.take(rows)
+
+    @staticmethod
+    def _store_filters(spec: FilterSpec) -> Filters:
+        """Filtros de data.sql equivalentes a una clave de filtros."""
+        regions, countries, _ = spec
+        filters: Filters = {"country": list(countries)}
+        if regions:
+            filters["region"] = list(regions)
+        return filters
+
+    def _select(self, spec: FilterSpec, columns: List[str], order_by: Optional[str] = None,
+                limit: Optional[int] = None) -> pd.DataFrame:
+        """Columnas pedidas de las filas seleccionadas, opcionalmente ordenadas (desc)."""
+        if self.store is not None:
+            # Empates en el orden de inserción, como el argsort estable de abajo
+            return select_rows("countries", columns, self._store_filters(spec),
+                               order_by=order_by, limit=limit, path=self.store)
+        rows = self.rows(spec)
+        if order_by is not None:
+            values = self.dataframe[order_by].to_numpy()[rows]
+            rows = rows[np.argsort(-values.astype(np.float64), kind="stable")]
+        if limit is not None:
+            rows = rows[:limit]
+        return self.dataframe[columns].take(rows)
+
+    @memoized
+    def metrics(self, spec: FilterSpec) -> Dict[str, float]:
+        """Totales y porcentajes por tecnología de la selección."""
+        regions, countries, _ = spec
+        if self.store is not None:
+            sums = aggregate_rows("countries", [], {m: "sum" for m in MEASURES},
+                                  self._store_filters(spec), path=self.store).iloc[0]
+            return metrics_from_totals({m: 0 if pd.isna(sums[m]) else int(sums[m])
+                                        for m in MEASURES})
+        return self.cube.metrics(regions, countries)
+
+    @memoized
+    def leader(self, spec: FilterSpec) -> Optional[Dict[str, Any]]:
+        """País con más torres en la selección y su participación."""
+        regions, countries, _ = spec
+        if self.store is not None:
+            by_country = aggregate_rows("countries", ["country"],
+                                        {"total_cells": "sum", "nr": "sum"},
+                                        self._store_filters(spec), path=self.store)
+            return leader_from_totals(by_country.astype({"country": str}).set_index("country"))
+        return self.cube.leader(regions, countries)
+
+    @memoized
+    def top_countries(self, spec: FilterSpec, limit: int = 5) -> List[Dict[str, Any]]:
+        """Top de países por total de torres."""
+        top = self._select(spec, ["country", "total_cells"], order_by="total_cells", limit=limit)
+        return top.to_dict("records")
+
+    @memoized
+    def tech_distribution(self, spec: FilterSpec) -> Dict[str, List[Any]]:
+        """Datos del gráfico de torta por tecnología."""
+        metrics = self.metrics(spec)
+        return {
+            "Tecnología": ["2G (GSM)", "3G (UMTS)", "4G (LTE)", "5G (NR)"],
+            "Torres": [metrics["2g"], metrics["3g"], metrics["4g"], metrics["5g"]]
+        }
+
+    @memoized
+    def ranking(self, spec: FilterSpec, column: str = "nr") -> List[Dict[str, Any]]:
+        """Países de la selección ordenados por una columna."""
+        return self._select(spec, ["country", column], order_by=column).to_dict("records")
+
+    @memoized
+    def comparison_rows(self, spec: FilterSpec) -> List[Dict[str, Any]]:
+        """Filas por país para las comparativas (incluye antenas por millón)."""
+        columns = ["country", "total_cells"] + TECH_COLUMNS
+        if "towers_per_million" in self.dataframe.columns:
+            columns += ["population_millions", "towers_per_million"]
+        return self._select(spec, columns).to_dict("records")
+
+    @memoized
+    def coverage_rows(self, spec: FilterSpec) -> Optional[List[Dict[str, Any]]]:
+        """Filas de comparativa con cobertura estimada, o None sin datos por celda."""
+        coverage = self.coverage()
+        if coverage is None:
+            return None
+        rows = pd.DataFrame(self.comparison_rows(spec))
+        if rows.empty:
+            return []
+        return rows.merge(coverage, on="country", how="left").to_dict("records")
+
+    def table_columns(self) -> List[str]:
+        """Columnas de la tabla detallada."""
+        columns = ["country", "total_cells"] + TECH_COLUMNS
+        if "population_millions" in self.dataframe.columns:
+            columns.append("population_millions")
+        return columns
+
+    @memoized
+    def table_order(self, spec: FilterSpec, sort_by: str = "total_cells",
+                    descending: bool = True) -> np.ndarray:
+        """Posiciones (sólo lectura) de la selección ordenadas por una columna."""
+        rows = self.rows(spec)
+        values = self.dataframe[sort_by].to_numpy()[rows]
+        if sort_by == "country":
+            values = values.astype(str)
+        if descending:
+            # Orden ascendente estable del arreglo invertido, leído al revés:
+            # descendente y con los empates en el orden original
+            order = len(values) - 1 - np.argsort(values[::-1], kind="stable")[::-1]
+        else:
+            order = np.argsort(values, kind="stable")
+        ordered = rows[order]
+        ordered.flags.writeable = False
+        return ordered
+
+    def table_page(self, spec: FilterSpec, sort_by: str = "total_cells",
+                   descending: bool = True, page: int = 1,
+                   page_size: int = TABLE_PAGE_SIZE) -> Dict[str, Any]:
+        """
+        Una página de la tabla detallada, ordenada del lado del servidor.
+
+        Sólo se extraen las filas de la página pedida.
+
+        Args:
+            spec: Clave de filtros
+            sort_by: Columna de orden (una de table_columns())
+            descending: Orden descendente
+            page: Número de página (desde 1; se ajusta al rango válido)
+            page_size: Filas por página
+
+        Returns:
+            Diccionario con 'rows' (registros), 'page', 'pages' y 'total_rows'
+        """
+        order = self.table_order(spec, sort_by, descending)
+        pages = max(1, -(-len(order) // page_size))
+        page = min(max(1, int(page)), pages)
+        window = order[(page - 1) * page_size:page * page_size]
+        rows = self.dataframe[self.table_columns()].take(window).to_dict("records")
+        return {"rows": rows, "page": page, "pages": pages, "total_rows": len(order)}
+
+    @memoized
+    def map_view(self, spec: FilterSpec, zoom: int = DEFAULT_MAP_ZOOM) -> Dict[str, Any]:
+        """
+        Puntos del mapa: bins por zoom si hay datos por celda, o centroides por país.
+
+        Returns:
+            Diccionario con 'points' (registros), 'center', 'zoom', 'binned',
+            'column' y 'title_suffix'
+        """
+        _, countries, tech = spec
+        column, title_suffix = TECH_FILTERS.get(tech, TECH_FILTERS["Todas"])
+        columns = ["latitude", "longitude", "total_cells"] + TECH_COLUMNS
+        pyramid = self.pyramid()
+        # Centro sobre las teselas de la selección: el promedio de los
+        # centroides de países lejanos puede caer en el mar
+        center = None
+        if pyramid is not None and len(self.rows(spec)):
+            center = pyramid.view_center(zoom, list(countries))
+        if center is None:
+            points = self._select(spec, ["country"] + columns).to_dict("records")
+            return {"points": points, "center": DEFAULT_MAP_CENTER, "zoom": DEFAULT_MAP_ZOOM,
+                    "binned": False, "column": column, "title_suffix": title_suffix}
+
+        from .spatial import viewport_bounds  # pylint: disable=import-outside-toplevel
+
+        bins = pyramid.bins(zoom, viewport_bounds(center, zoom), list(countries))
+        return {"points": bins[columns].to_dict("records"), "center": center, "zoom": zoom,
+                "binned": True, "column": column, "title_suffix": title_suffix}
+
+    # ---------- Estructuras derivadas de los puntos de celda ----------
+
+    def _cells_derived(self, name: str, builder: Callable[[pd.DataFrame], Any]) -> Any:
+        """Construye (una vez) una estructura derivada de los puntos de celda."""
+        state = self._shared.cells
+        with self._shared.lock:
+            if name not in state:
+                if "cells" not in state:
+                    cells = self._cells_loader()
+                    state["cells"] = None if cells is None or cells.empty else cells
+                cells = state["cells"]
+                state[name] = None if cells is None else builder(cells)
+            return state[name]
+
+    def pyramid(self):
+        """
+        Grilla jerárquica de bins del mapa, o None sin datos por celda.
+
+        Con base SQL el nivel más fino sale de un GROUP BY por tesela en la
+        base (data.sql.tile_counts()), sin cargar los puntos de celda.
+        """
+        from .spatial import GridPyramid  # pylint: disable=import-outside-toplevel
+
+        if self.store is not None:
+            with self._shared.lock:
+                if "pyramid" not in self._shared.cells:
+                    counts = tile_counts(self.store)
+                    if counts is not None:
+                        self._shared.cells["pyramid"] = (
+                            None if counts.empty else GridPyramid.from_tile_counts(counts)
+                        )
+        return self._cells_derived("pyramid", GridPyramid)
+
+    def rasterizer(self, color_scale: str = "Turbo"):
+        """Rasterizador de teselas de densidad, o None sin datos por celda."""
+        from .raster import DensityRasterizer  # pylint: disable=import-outside-toplevel
+        return self._cells_derived(
+            f"raster:{color_scale}", lambda cells: DensityRasterizer(cells, color_scale)
+        )
+
+    def coverage(self) -> Optional[pd.DataFrame]:
+        """Cobertura estimada por país, o None sin datos por celda."""
+        from .coverage import compute_coverage  # pylint: disable=import-outside-toplevel
+        return self._cells_derived(
+            "coverage", lambda cells: compute_coverage(cells, self._shared.reference)
+        )
+
+    def density_layers(self, spec: FilterSpec, zoom: int,
+                       color_scale: str = "Turbo") -> List[Dict[str, Any]]:
+        """Capas de imagen Mapbox con la densidad de la tecnología en los países elegidos."""
+        from .spatial import viewport_bounds  # pylint: disable=import-outside-toplevel
+
+        view = self.map_view(spec, zoom)
+        rasterizer = self.rasterizer(color_scale)
+        if rasterizer is None:
+            return []
+        return rasterizer.mapbox_layers(view["column"], zoom,
+                                        viewport_bounds(view["center"], zoom),
+                                        countries=spec[1])
+
+    # ---------- Datos auxiliares (historia de fotos, agregados por operador) ----------
+
+    def _extra(self, name: str, builder: Callable[[], Any]) -> Any:
+        """Carga (una vez) datos auxiliares opcionales del motor."""
+        with self._shared.lock:
+            if name not in self._shared.extra:
+                self._shared.extra[name] = builder()
+            return self._shared.extra[name]
+
+    def snapshot_history(self) -> Optional[pd.DataFrame]:
+        """Historia de fotos (data.snapshots), o None con menos de dos fechas."""
+        def build():
+            history = self._snapshots_loader()
+            return history if history is not None and history["date"].nunique() > 1 else None
+        return self._extra("history", build)
+
+    def rollup_index(self) -> Optional[RollupIndex]:
+        """Agregados por operador y área (data.rollups), o None si no hay."""
+        def build():
+            rollups = self._rollups_loader()
+            return None if rollups is None or rollups.empty else RollupIndex(rollups)
+        return self._extra("rollups", build)
+
+    # ---------- Tendencias ----------
+
+    @memoized
+    def trends(self, spec: FilterSpec, months: int = TREND_MONTHS) -> Optional[Dict[str, Any]]:
+        """
+        Evolución y crecimiento por país de la tecnología seleccionada.
+
+        Sale de los agregados precalculados por foto, no de comparar datasets.
+
+        Args:
+            spec: Clave de filtros
+            months: Meses hacia atrás desde la última foto
+
+        Returns:
+            Diccionario con series (fecha, antenas), growth (filas por país),
+            added, growth_pct, since, until y title; None sin historia
+        """
+        history = self.snapshot_history()
+        if history is None:
+            return None
+        column, title = TECH_FILTERS[spec[2]]
+        countries = [str(country) for country in self.dataframe["country"].take(self.rows(spec))]
+        series = trend_series(history, column, countries)
+        growth = growth_table(history, column, months, countries)
+        start, end = int(growth["start"].sum()), int(growth["end"].sum())
+        return {
+            "series": [{"date": day.date().isoformat(), "cells": int(cells)}
+                       for day, cells in zip(series["date"], series["cells"])],
+            "growth": growth.astype(object).where(growth.notna(), None).to_dict("records"),
+            "added": int(growth["added"].sum()),
+            "growth_pct": (end - start) / start * 100 if start else None,
+            "since": window_start(history, months).date().isoformat(),
+            "until": history["date"].max().date().isoformat(),
+            "months": months,
+            "title": title
+        }
+
+    # ---------- Detalle por operador y área ----------
+
+    def drilldown_countries(self, spec: FilterSpec) -> List[str]:
+        """Países de la selección con agregados por operador."""
+        index = self.rollup_index()
+        if index is None:
+            return []
+        available = set(index.countries())
+        selected = self.dataframe["country"].take(self.rows(spec))
+        return [str(country) for country in selected if str(country) in available]
+
+    @memoized
+    def operators(self, country: str) -> List[Dict[str, Any]]:
+        """
+        Operadores (MCC-MNC) de un país con antenas y participación por tecnología.
+
+        Es un corte de los agregados precalculados, de mayor a menor cantidad
+        de antenas.
+        """
+        index = self.rollup_index()
+        if index is None:
+            return []
+        columns = (["operator", "total_cells"] + TECH_COLUMNS
+                   + [f"{tech}_share" for tech in TECH_COLUMNS] + ["areas"])
+        return index.country_operators(country)[columns].to_dict("records")
+
+    @memoized
+    def operator_areas(self, country: str, operator: str,
+                       limit: int = AREA_LIMIT) -> Dict[str, Any]:
+        """
+        Áreas (LAC/TAC) de un operador, las ``limit`` con más antenas.
+
+        Returns:
+            Diccionario con rows (registros) y total (áreas del operador)
+        """
+        index = self.rollup_index()
+        if index is None:
+            return {"rows": [], "total": 0}
+        areas = index.operator_areas(country, operator)
+        columns = ["area", "total_cells"] + TECH_COLUMNS + ["lte_share", "nr_share"]
+        return {"rows": areas[columns].head(limit).to_dict("records"), "total": len(areas)}
@@ -0,0 +1,113 @@
+"""
+Índice de bitmaps para filtrar por país, región y tecnología
+
+Guarda una máscara empaquetada en bits (``np.packbits``) por cada valor de
+cada dimensión. Un filtro se resuelve con OR dentro de la dimensión y AND
+entre dimensiones, seguido de una única extracción de filas.
+"""
+
+from typing import Dict, Iterable, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from . import TECH_COLUMNS
+
+# Dimensiones categóricas indexadas por defecto
+INDEX_DIMENSIONS = ("country", "region")
+
+# Tipo de radio (datasets por celda) -> columna de tecnología
+RADIO_TECHNOLOGIES = {"GSM": "gsm", "UMTS": "umts", "LTE": "lte", "NR": "nr"}
+
+
+def _pack(mask: np.ndarray) -> np.ndarray:
+    """Empaqueta una máscara booleana en bits."""
+    return np.packbits(mask)
+
+
+class BitmapIndex:
+    """Máscaras de bits por valor de país, región y tecnología."""
+
+    def __init__(self, dataframe: pd.DataFrame,
+                 dimensions: Sequence[str] = INDEX_DIMENSIONS):
+        """
+        Construye el índice sobre un dataset.
+
+        Args:
+            dataframe: Dataset por país o por celda
+            dimensions: Columnas categóricas a indexar
+        """
+        self.size = len(dataframe)
+        self.bitmaps: Dict[str, Dict[str, np.ndarray]] = {}
+
+        for dimension in dimensions:
+            if dimension not in dataframe.columns:
+                continue
+            codes, uniques = pd.factorize(dataframe[dimension])
+            self.bitmaps[dimension] = {
+                str(value): _pack(codes == code) for code, value in enumerate(uniques)
+            }
+
+        self.bitmaps["technology"] = self._technology_bitmaps(dataframe)
+
+    @staticmethod
+    def _technology_bitmaps(dataframe: pd.DataFrame) -> Dict[str, np.ndarray]:
+        """
+        Máscaras por tecnología: por radio en datos por celda, o filas con
+        al menos una antena de esa tecnología en datos por país.
+        """
+        if "radio" in dataframe.columns:
+            radio = dataframe["radio"].astype(str).to_numpy()
+            return {tech: _pack(radio == name) for name, tech in RADIO_TECHNOLOGIES.items()}
+        return {
+            tech: _pack(dataframe[tech].to_numpy() > 0)
+            for tech in TECH_COLUMNS if tech in dataframe.columns
+        }
+
+    def _dimension_bits(self, dimension: str, values: Iterable[str]) -> np.ndarray:
+        """OR de las máscaras de los valores seleccionados en una dimensión."""
+        bits = np.zeros((self.size + 7) // 8, dtype=np.uint8)
+        bitmaps = self.bitmaps.get(dimension, {})
+        for value in values:
+            bitmap = bitmaps.get(str(value))
+            if bitmap is not None:
+                np.bitwise_or(bits, bitmap, out=bits)
+        return bits
+
+    def mask(self, countries: Optional[Iterable[str]] = None,
+             regions: Optional[Iterable[str]] = None,
+             technologies: Optional[Iterable[str]] = None) -> np.ndarray:
+        """
+        Resuelve una selección de filtros a una máscara booleana por fila.
+
+        Args:
+            countries: Países seleccionados (None = sin filtro)
+            regions: Regiones seleccionadas (None = sin filtro)
+            technologies: Columnas de tecnología, p. ej. ['nr'] (None = sin filtro)
+
+        Returns:
+            Máscara booleana de longitud igual al dataset
+        """
+        bits = np.full((self.size + 7) // 8, 0xFF, dtype=np.uint8)
+        selections = (("country", countries), ("region", regions), ("technology", technologies))
+        for dimension, values in selections:
+            if values is not None and dimension in self.bitmaps:
+                np.bitwise_and(bits, self._dimension_bits(dimension, values), out=bits)
+        return np.unpackbits(bits, count=self.size).astype(bool)
+
+    def rows(self, **selections) -> np.ndarray:
+        """Posiciones de las filas que cumplen la selección."""
+        return np.flatnonzero(self.mask(**selections))
+
+    def take(self, dataframe: pd.DataFrame, **selections) -> pd.DataFrame:
+        """
+        Extrae las filas seleccionadas en una sola operación.
+
+        Args:
+            dataframe: Dataset sobre el que se construyó el índice
+            **selections: Argumentos de mask()
+
+        Returns:
+            DataFrame con las filas que cumplen la selección
+        """
+        return dataframe.take(self.rows(**selections))
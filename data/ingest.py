@@ -0,0 +1,316 @@
+"""
+Ingesta de volcados crudos de OpenCelliD
+
+Lee el export ``cells.csv`` / ``cells.csv.gz`` de OpenCelliD por bloques y
+agrega el conteo de celdas por país y tecnología. La memoria usada depende
+del tamaño del bloque, no del tamaño del archivo. Al escribir el dataset
+expandido se agrega también su foto a la historia de data.snapshots y, en la
+misma pasada, se calculan los agregados por operador y área de data.rollups. Si
+existe la base SQL (data.sql) y la salida es el dataset expandido, se
+reconstruye con los archivos nuevos.
+
+Uso:
+    python -m data.ingest cell_towers.csv.gz --output data/expanded_telecom_data.csv
+"""
+
+import argparse
+import os
+import tempfile
+from collections import Counter
+from typing import TYPE_CHECKING, Dict, Iterator, List, Optional, Tuple
+
+import pandas as pd
+
+from . import (DATA_COLUMNS, DATA_FILES, TECH_COLUMNS, bump_data_version, get_data_path,
+               load_expanded_data, replace_file)
+from .partitions import partitions_of, sync_partitions
+from .snapshots import append_snapshot, snapshots_of
+from .sql import build_store, store_of
+
+if TYPE_CHECKING:
+    from .rollups import RollupAccumulator
+
+# Columnas del export de OpenCelliD (los volcados por país no traen cabecera)
+OPENCELLID_COLUMNS = [
+    "radio", "mcc", "net", "area", "cell", "unit", "lon", "lat", "range",
+    "samples", "changeable", "created", "updated", "averageSignal"
+]
+
+# Columnas conservadas en el almacén de puntos de celda
+CELL_COLUMNS = ["radio", "mcc", "net", "area", "cell", "lon", "lat", "range"]
+
+# Tipos de lectura de las columnas usadas del volcado
+CELL_DTYPES = {
+    "radio": "category", "mcc": "int32", "net": "int32", "area": "int64",
+    "cell": "int64", "lon": "float64", "lat": "float64", "range": "float64",
+    "created": "int64", "updated": "int64"
+}
+
+# Tipo de radio de OpenCelliD -> columna del dataset (CDMA no se agrega)
+RADIO_COLUMNS = {"GSM": "gsm", "UMTS": "umts", "LTE": "lte", "NR": "nr"}
+
+# Mobile Country Code -> país (mismos nombres que el dataset expandido)
+MCC_COUNTRIES: Dict[int, str] = {
+    722: "Argentina", 736: "Bolivia", 724: "Brasil", 730: "Chile",
+    732: "Colombia", 740: "Ecuador", 744: "Paraguay", 716: "Peru",
+    748: "Uruguay", 734: "Venezuela", 738: "Guyana", 746: "Suriname",
+    742: "French Guiana", 334: "Mexico", 712: "Costa Rica", 714: "Panama",
+    704: "Guatemala", 708: "Honduras", 706: "El Salvador", 710: "Nicaragua",
+    702: "Belize", 368: "Cuba", 370: "Dominican Republic", 372: "Haiti",
+    338: "Jamaica", 374: "Trinidad and Tobago", 364: "Bahamas", 342: "Barbados",
+    310: "Estados Unidos", 311: "Estados Unidos", 312: "Estados Unidos",
+    313: "Estados Unidos", 314: "Estados Unidos", 315: "Estados Unidos",
+    316: "Estados Unidos"
+}
+
+# Filas por bloque de lectura (~50 MB por bloque con las columnas usadas)
+DEFAULT_CHUNK_SIZE = 1_000_000
+
+# Columnas que no se derivan del volcado y se toman del dataset de referencia
+REFERENCE_COLUMNS = ["country", "population_millions", "latitude", "longitude", "region"]
+
+
+def _has_header(source: str) -> bool:
+    """
+    Detecta si el volcado trae fila de cabecera.
+
+    Args:
+        source: Ruta del archivo CSV (comprimido o no)
+
+    Returns:
+        True si la primera fila contiene los nombres de columna
+    """
+    first_row = pd.read_csv(source, nrows=0)
+    return "radio" in first_row.columns
+
+
+def iter_chunks(source: str, columns: List[str],
+                chunksize: int = DEFAULT_CHUNK_SIZE) -> Iterator[pd.DataFrame]:
+    """
+    Recorre el volcado por bloques, descartando filas fuera de la región.
+
+    Args:
+        source: Ruta del volcado ``cells.csv`` o ``cells.csv.gz``
+        columns: Columnas a leer (deben incluir 'radio' y 'mcc')
+        chunksize: Filas por bloque de lectura
+
+    Yields:
+        Bloques con MCC de la región y radios soportadas
+    """
+    header = 0 if _has_header(source) else None
+    reader = pd.read_csv(
+        source,
+        header=header,
+        names=None if header == 0 else OPENCELLID_COLUMNS,
+        usecols=columns,
+        dtype={column: CELL_DTYPES[column] for column in columns},
+        chunksize=chunksize,
+        on_bad_lines="skip"
+    )
+
+    valid_mccs = list(MCC_COUNTRIES)
+    with reader:
+        for chunk in reader:
+            yield chunk[chunk["mcc"].isin(valid_mccs) & chunk["radio"].isin(RADIO_COLUMNS)]
+
+
+class CellPointWriter:
+    """Escribe los puntos de celda por bloques en un Parquet (escritura atómica)."""
+
+    def __init__(self, output: str):
+        import pyarrow as pa  # pylint: disable=import-outside-toplevel
+        import pyarrow.parquet as pq  # pylint: disable=import-outside-toplevel
+
+        self._pa = pa
+        self.output = output
+        self.schema = pa.schema([
+            ("radio", pa.string()), ("mcc", pa.int32()), ("net", pa.int32()),
+            ("area", pa.int64()), ("cell", pa.int64()), ("lon", pa.float64()),
+            ("lat", pa.float64()), ("range", pa.float64())
+        ])
+        fd, self.tmp_path = tempfile.mkstemp(
+            suffix=".parquet", dir=os.path.dirname(os.path.abspath(output))
+        )
+        os.close(fd)
+        self._writer = pq.ParquetWriter(self.tmp_path, self.schema)
+
+    def write(self, chunk: pd.DataFrame) -> None:
+        """Agrega un bloque de celdas al archivo."""
+        frame = chunk[CELL_COLUMNS].astype({"radio": str})
+        table = self._pa.Table.from_pandas(frame, schema=self.schema, preserve_index=False)
+        self._writer.write_table(table)
+
+    def close(self) -> None:
+        """Cierra el archivo y lo publica en la ruta final (sin partes de deltas)."""
+        from .cellstore import clear_parts  # pylint: disable=import-outside-toplevel
+
+        self._writer.close()
+        replace_file(self.tmp_path, self.output)
+        # Las partes de data.cellstore eran cambios sobre la base anterior
+        clear_parts(self.output)
+
+
+def count_cells(source: str, chunksize: int = DEFAULT_CHUNK_SIZE,
+                cells_output: Optional[str] = None,
+                rollups: Optional["RollupAccumulator"] = None) -> Counter:
+    """
+    Cuenta celdas por (MCC, radio) leyendo el volcado por bloques.
+
+    Args:
+        source: Ruta del volcado ``cells.csv`` o ``cells.csv.gz``
+        chunksize: Filas por bloque de lectura
+        cells_output: Ruta opcional de un Parquet con los puntos de celda
+        rollups: Acumulador opcional de conteos por operador y área
+
+    Returns:
+        Counter con claves (mcc, radio) y número de celdas
+    """
+    if cells_output:
+        columns = CELL_COLUMNS
+    else:
+        columns = ["radio", "mcc"] + (["net", "area"] if rollups is not None else [])
+    writer = CellPointWriter(cells_output) if cells_output else None
+
+    counts: Counter = Counter()
+    for chunk in iter_chunks(source, columns, chunksize):
+        grouped = chunk.groupby(["mcc", "radio"], observed=True).size()
+        counts.update({(int(mcc), str(radio)): int(n) for (mcc, radio), n in grouped.items()})
+        if writer is not None:
+            writer.write(chunk)
+        if rollups is not None:
+            rollups.add(chunk)
+
+    if writer is not None:
+        writer.close()
+    return counts
+
+
+def build_country_frame(counts: Counter, reference: pd.DataFrame) -> pd.DataFrame:
+    """
+    Convierte los conteos por (MCC, radio) al esquema del dataset expandido.
+
+    Args:
+        counts: Conteos devueltos por count_cells()
+        reference: Dataset con población, coordenadas y región por país
+
+    Returns:
+        DataFrame con columnas DATA_COLUMNS, un país por fila
+    """
+    totals: Dict[Tuple[str, str], int] = Counter()
+    for (mcc, radio), n in counts.items():
+        totals[(MCC_COUNTRIES[mcc], RADIO_COLUMNS[radio])] += n
+
+    rows = {}
+    for (country, column), n in totals.items():
+        rows.setdefault(country, dict.fromkeys(TECH_COLUMNS, 0))[column] = n
+
+    counts_df = pd.DataFrame.from_dict(rows, orient="index", columns=TECH_COLUMNS)
+    counts_df.index.name = "country"
+    counts_df = counts_df.reset_index()
+    counts_df["total_cells"] = counts_df[TECH_COLUMNS].sum(axis=1)
+
+    # Sólo se conservan países con metadatos conocidos (población, región, ...)
+    merged = counts_df.merge(reference[REFERENCE_COLUMNS], on="country", how="inner")
+    return merged[DATA_COLUMNS].sort_values("total_cells", ascending=False, ignore_index=True)
+
+
+def write_aggregates(dataframe: pd.DataFrame, output: str) -> None:
+    """
+    Escribe el dataset agregado de forma atómica.
+
+    Args:
+        dataframe: Dataset con columnas DATA_COLUMNS
+        output: Ruta del CSV de salida
+    """
+    directory = os.path.dirname(os.path.abspath(output))
+    fd, tmp_path = tempfile.mkstemp(suffix=".csv", dir=directory)
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8", newline="") as handle:
+            dataframe.to_csv(handle, index=False)
+        replace_file(tmp_path, output)
+    except OSError:
+        os.unlink(tmp_path)
+        raise
+
+
+def ingest_opencellid(source: str, output: Optional[str] = None,
+                      reference: Optional[pd.DataFrame] = None,
+                      chunksize: int = DEFAULT_CHUNK_SIZE,
+                      cells_output: Optional[str] = None, snapshot: bool = True,
+                      snapshot_date: Optional[str] = None,
+                      rollups_output: Optional[str] = None) -> pd.DataFrame:
+    """
+    Ejecuta el pipeline completo: conteo por bloques, agregación y escritura.
+
+    Args:
+        source: Ruta del volcado de OpenCelliD
+        output: Ruta del CSV de salida (None para no escribir); si es el
+            dataset expandido y está particionado, se reescriben las particiones
+        reference: Metadatos por país (por defecto el dataset expandido actual)
+        chunksize: Filas por bloque de lectura
+        cells_output: Ruta opcional del Parquet de puntos de celda
+        snapshot: Agregar la foto del dataset escrito a data.snapshots (sólo
+            si ``output`` es el dataset expandido, dueño de la historia)
+        snapshot_date: Fecha de la foto (por defecto hoy, UTC)
+        rollups_output: Ruta opcional del Parquet de agregados por operador y área
+
+    Returns:
+        DataFrame agregado con el esquema de DATA_COLUMNS
+    """
+    if reference is None:
+        reference = load_expanded_data()
+    if reference is None:
+        raise FileNotFoundError("No se encontró el dataset de referencia por país")
+
+    from .rollups import (  # pylint: disable=import-outside-toplevel
+        RollupAccumulator, build_rollups, write_rollups)
+
+    accumulator = RollupAccumulator() if rollups_output else None
+    counts = count_cells(source, chunksize, cells_output, accumulator)
+    dataframe = build_country_frame(counts, reference)
+    if accumulator is not None:
+        write_rollups(build_rollups(accumulator.area_counts()), rollups_output)
+    if output is not None:
+        write_aggregates(dataframe, output)
+        if partitions_of(output) is not None:
+            sync_partitions(dataframe, root=partitions_of(output))
+        if snapshot and snapshots_of(output) is not None:
+            append_snapshot(dataframe, snapshot_date, snapshots_of(output), replace=True)
+    if output is not None and store_of(output) is not None:
+        build_store(store_of(output), output, cells_output, rollups_output)
+    if output is not None or cells_output is not None or rollups_output is not None:
+        # Sin entrada en el diario de deltas: los procesos en marcha reconstruyen
+        bump_data_version(kind="full", source=os.path.basename(source))
+    return dataframe
+
+
+def main(argv: Optional[list] = None) -> None:
+    """Punto de entrada de línea de comandos."""
+    parser = argparse.ArgumentParser(description="Agrega un volcado de OpenCelliD por país")
+    parser.add_argument("source", help="Ruta de cells.csv o cells.csv.gz")
+    parser.add_argument("--output", default=get_data_path(DATA_FILES["expanded"]),
+                        help="CSV de salida (por defecto el dataset expandido)")
+    parser.add_argument("--chunksize", type=int, default=DEFAULT_CHUNK_SIZE,
+                        help="Filas por bloque de lectura")
+    parser.add_argument("--cells-output", default=None,
+                        help="Parquet opcional con los puntos de celda "
+                             f"(p. ej. {get_data_path(DATA_FILES['cells'])})")
+    parser.add_argument("--rollups-output", default=get_data_path(DATA_FILES["rollups"]),
+                        help="Parquet de agregados por operador (MNC) y área (LAC/TAC)")
+    parser.add_argument("--no-rollups", action="store_true",
+                        help="No calcular los agregados por operador y área")
+    parser.add_argument("--snapshot-date", default=None,
+                        help="Fecha de la foto en la historia (AAAA-MM-DD, por defecto hoy)")
+    parser.add_argument("--no-snapshot", action="store_true",
+                        help="No agregar la foto a la historia (data/snapshots)")
+    args = parser.parse_args(argv)
+
+    dataframe = ingest_opencellid(args.source, args.output, chunksize=args.chunksize,
+                                  cells_output=args.cells_output, snapshot=not args.no_snapshot,
+                                  snapshot_date=args.snapshot_date,
+                                  rollups_output=None if args.no_rollups else args.rollups_output)
+    print(f"✅ {len(dataframe)} países escritos en {args.output}")
+
+
+if __name__ == "__main__":
+    main()
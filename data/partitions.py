@@ -0,0 +1,336 @@
+"""
+Dataset por país particionado por región
+
+Alternativa al CSV único: un directorio por región con el formato
+``region=<Región>/`` y dentro uno o más archivos CSV o Parquet (uno por
+región o uno por país). Las regiones se conocen listando los directorios, sin
+leer datos; al cargar, las particiones de las regiones no pedidas nunca se
+abren y las pedidas se leen en paralelo y se concatenan una sola vez.
+
+Las lecturas de CSV pasan por la caché columnar (data.cache), así que cada
+partición tiene su propio Parquet invalidado por su mtime/tamaño.
+
+Las particiones se escriben en un directorio temporal que luego reemplaza al
+anterior (sin archivos viejos de otro layout), y el layout elegido queda en
+_layout.json. La ingesta y los deltas sobre el dataset expandido reescriben
+las regiones afectadas con sync_partitions(), así que las particiones y el
+CSV no se desincronizan.
+
+Uso:
+    python -m data.partitions data/expanded_telecom_data.csv
+    python -m data.partitions data/expanded_telecom_data.csv --by country --format parquet
+"""
+
+import argparse
+import functools
+import json
+import os
+import re
+import shutil
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import pandas as pd
+
+from . import DATA_FILES, get_data_path
+from .cache import read_csv_cached
+from .schema import apply_compact_schema
+
+# Directorio por defecto de las particiones
+PARTITION_DIR = get_data_path(DATA_FILES["partitions"])
+
+# Prefijo de los directorios de partición (estilo Hive)
+PARTITION_PREFIX = "region="
+
+# Extensiones de archivo reconocidas dentro de una partición
+PARTITION_EXTENSIONS = (".csv", ".parquet")
+
+# Lecturas simultáneas como máximo
+MAX_WORKERS = 8
+
+# Layout de escritura (by, format) guardado junto a las particiones
+LAYOUT_FILE = "_layout.json"
+
+# Layout por defecto: un CSV por región
+DEFAULT_LAYOUT = {"by": "region", "format": "csv"}
+
+# Permisos de los directorios publicados (mkdtemp los crea con 0700)
+DIRECTORY_MODE = 0o755
+
+
+def list_partitions(root: str = PARTITION_DIR) -> Dict[str, List[str]]:
+    """
+    Archivos de cada región, sin leerlos.
+
+    Args:
+        root: Directorio de particiones
+
+    Returns:
+        Diccionario {región: [rutas]} en orden alfabético (vacío si no hay
+        particiones)
+    """
+    partitions: Dict[str, List[str]] = {}
+    try:
+        entries = sorted(os.scandir(root), key=lambda entry: entry.name)
+    except OSError:
+        return partitions
+    for entry in entries:
+        if not entry.is_dir() or not entry.name.startswith(PARTITION_PREFIX):
+            continue
+        files = sorted(os.path.join(entry.path, name) for name in os.listdir(entry.path)
+                       if name.endswith(PARTITION_EXTENSIONS))
+        if files:
+            partitions[entry.name[len(PARTITION_PREFIX):]] = files
+    return partitions
+
+
+def partition_signature(root: str = PARTITION_DIR) -> Optional[Tuple[int, int, int]]:
+    """
+    Firma de las particiones: (archivos, mtime más reciente, bytes totales).
+
+    Returns:
+        Tupla hashable, o None si no hay particiones
+    """
+    stats = [os.stat(path) for files in list_partitions(root).values() for path in files]
+    if not stats:
+        return None
+    return (len(stats), max(stat.st_mtime_ns for stat in stats),
+            sum(stat.st_size for stat in stats))
+
+
+def read_partition(path: str, region: str) -> pd.DataFrame:
+    """
+    Lee un archivo de partición con el esquema compacto.
+
+    Args:
+        path: Archivo CSV o Parquet
+        region: Región de la partición (se completa si el archivo no la trae)
+
+    Returns:
+        DataFrame de la partición
+    """
+    if path.endswith(".parquet"):
+        dataframe = apply_compact_schema(pd.read_parquet(path))
+    else:
+        dataframe = read_csv_cached(path)
+    if "region" not in dataframe.columns:
+        dataframe = dataframe.assign(region=pd.Categorical([region] * len(dataframe)))
+    return dataframe
+
+
+def concat_partitions(frames: List[pd.DataFrame]) -> pd.DataFrame:
+    """
+    Concatena particiones en un solo paso, conservando las categóricas.
+
+    Las categorías de cada columna se unifican antes de concatenar (sólo se
+    recodifican los códigos); si difirieran, pandas convertiría la columna a
+    texto y habría que volver a comprimirla.
+
+    Args:
+        frames: Particiones con las mismas columnas
+
+    Returns:
+        DataFrame con índice por posición
+    """
+    frames = [frame for frame in frames if len(frame)] or frames[:1]
+    if len(frames) == 1:
+        return frames[0].reset_index(drop=True)
+    categorical = [column for column in frames[0].columns
+                   if isinstance(frames[0][column].dtype, pd.CategoricalDtype)]
+    for column in categorical:
+        categories = functools.reduce(
+            lambda left, right: left.union(right, sort=False),
+            (frame[column].cat.categories for frame in frames))
+        frames = [frame.assign(**{column: frame[column].cat.set_categories(categories)})
+                  for frame in frames]
+    return pd.concat(frames, ignore_index=True)
+
+
+def load_partitioned_data(regions: Optional[Iterable[str]] = None, root: str = PARTITION_DIR,
+                          max_workers: int = MAX_WORKERS) -> Optional[pd.DataFrame]:
+    """
+    Carga las particiones de las regiones pedidas en paralelo.
+
+    Se usan hilos: el parseo de CSV y la lectura de Parquet liberan el GIL, y
+    el resultado queda en el proceso que lo usa sin serializarlo.
+
+    Args:
+        regions: Regiones a leer (None o vacío: todas)
+        root: Directorio de particiones
+        max_workers: Lecturas simultáneas como máximo
+
+    Returns:
+        DataFrame concatenado, o None si no hay particiones para esas regiones
+    """
+    partitions = list_partitions(root)
+    if regions:
+        wanted = set(regions)
+        partitions = {region: files for region, files in partitions.items() if region in wanted}
+    tasks = [(path, region) for region, files in partitions.items() for path in files]
+    if not tasks:
+        return None
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(tasks))),
+                            thread_name_prefix="partition") as executor:
+        frames = list(executor.map(lambda task: read_partition(*task), tasks))
+    return concat_partitions(frames)
+
+
+def _file_name(value: str) -> str:
+    """Nombre de archivo seguro para un país."""
+    return re.sub(r"[^\w\-]+", "_", value).strip("_") or "unknown"
+
+
+def read_layout(root: str = PARTITION_DIR) -> Dict[str, str]:
+    """Layout (by, format) con el que se escribieron las particiones."""
+    try:
+        with open(os.path.join(root, LAYOUT_FILE), encoding="utf-8") as handle:
+            return dict(DEFAULT_LAYOUT, **json.load(handle))
+    except (OSError, ValueError):
+        return dict(DEFAULT_LAYOUT)
+
+
+def _write_region(frame: pd.DataFrame, directory: str, region: str, by: str,
+                  file_format: str) -> List[str]:
+    """Escribe los archivos de una región en ``directory``."""
+    groups = [(_file_name(region), frame)] if by == "region" else [
+        (_file_name(str(country)), group)
+        for country, group in frame.groupby("country", observed=True, sort=True)]
+    written = []
+    for name, group in groups:
+        path = os.path.join(directory, f"{name}.{file_format}")
+        if file_format == "parquet":
+            group.to_parquet(path, index=False)
+        else:
+            group.to_csv(path, index=False)
+        written.append(path)
+    return written
+
+
+def _swap_directory(staging: str, target: str) -> None:
+    """
+    Reemplaza ``target`` por ``staging`` y borra el anterior.
+
+    Entre los dos renombres el destino no existe por un instante: los lectores
+    ven "sin particiones" (y usan el CSV), nunca una mezcla de archivos.
+    """
+    os.chmod(staging, DIRECTORY_MODE)
+    retired = None
+    if os.path.exists(target):
+        retired = tempfile.mkdtemp(prefix=".retired-", dir=os.path.dirname(target))
+        os.rmdir(retired)
+        os.rename(target, retired)
+    os.rename(staging, target)
+    if retired is not None:
+        shutil.rmtree(retired, ignore_errors=True)
+
+
+def write_partitions(dataframe: pd.DataFrame, root: str = PARTITION_DIR, by: str = "region",
+                     file_format: str = "csv") -> List[str]:
+    """
+    Escribe un dataset por país con el layout particionado.
+
+    Reemplaza todo el directorio: las particiones anteriores (también las de
+    otro layout) desaparecen al publicar las nuevas.
+
+    Args:
+        dataframe: Dataset con columna region (y country si by='country')
+        root: Directorio de particiones
+        by: 'region' (un archivo por región) o 'country' (uno por país)
+        file_format: 'csv' o 'parquet'
+
+    Returns:
+        Rutas escritas
+    """
+    if by not in ("region", "country"):
+        raise ValueError(f"Partición no soportada: {by}")
+    root = os.path.abspath(root)
+    os.makedirs(os.path.dirname(root), exist_ok=True)
+    staging = tempfile.mkdtemp(prefix=".partitions-", dir=os.path.dirname(root))
+    try:
+        written = []
+        for region, frame in dataframe.groupby("region", observed=True, sort=True):
+            directory = os.path.join(staging, f"{PARTITION_PREFIX}{region}")
+            os.makedirs(directory)
+            written += _write_region(frame, directory, str(region), by, file_format)
+        with open(os.path.join(staging, LAYOUT_FILE), "w", encoding="utf-8") as handle:
+            json.dump({"by": by, "format": file_format}, handle)
+        _swap_directory(staging, root)
+    except Exception:
+        shutil.rmtree(staging, ignore_errors=True)
+        raise
+    return [os.path.join(root, os.path.relpath(path, staging)) for path in written]
+
+
+def partitions_of(csv_path: str) -> Optional[str]:
+    """
+    Directorio de particiones que acompaña a un CSV por país.
+
+    Sólo el dataset expandido tiene particiones (las que lee
+    data.load_expanded_data()); para otros CSV se devuelve None.
+    """
+    expanded = get_data_path(DATA_FILES["expanded"])
+    return PARTITION_DIR if os.path.abspath(csv_path) == os.path.abspath(expanded) else None
+
+
+def sync_partitions(dataframe: pd.DataFrame, countries: Optional[Iterable[str]] = None,
+                    root: str = PARTITION_DIR) -> List[str]:
+    """
+    Reescribe, con su layout, las regiones de unos países si hay particiones.
+
+    Lo usan la ingesta y data.delta después de escribir el dataset expandido.
+    Cada región se escribe aparte y reemplaza a su directorio; las regiones
+    que quedaron sin filas se borran.
+
+    Args:
+        dataframe: Dataset por país completo y actualizado
+        countries: Países modificados (None: todos)
+        root: Directorio de particiones
+
+    Returns:
+        Regiones reescritas (vacío si no hay particiones)
+    """
+    existing = list_partitions(root)
+    if not existing:
+        return []
+    if countries is None:
+        regions = set(existing) | {str(region) for region in dataframe["region"].unique()}
+    else:
+        changed = dataframe["country"].astype(str).isin([str(country) for country in countries])
+        regions = {str(region) for region in dataframe.loc[changed, "region"].unique()}
+
+    layout = read_layout(root)
+    region_labels = dataframe["region"].astype(str)
+    for region in sorted(regions):
+        target = os.path.join(root, f"{PARTITION_PREFIX}{region}")
+        frame = dataframe[(region_labels == region).to_numpy()]
+        if frame.empty:
+            shutil.rmtree(target, ignore_errors=True)
+            continue
+        # Directorio temporal sin el prefijo region=: list_partitions lo ignora
+        staging = tempfile.mkdtemp(prefix=".region-", dir=root)
+        try:
+            _write_region(frame, staging, region, layout["by"], layout["format"])
+            _swap_directory(staging, target)
+        except Exception:
+            shutil.rmtree(staging, ignore_errors=True)
+            raise
+    return sorted(regions)
+
+
+def main(argv: Optional[list] = None) -> None:
+    """Punto de entrada de línea de comandos."""
+    parser = argparse.ArgumentParser(description="Particiona el dataset por país por región")
+    parser.add_argument("source", help="CSV por país (p. ej. data/expanded_telecom_data.csv)")
+    parser.add_argument("--output", default=PARTITION_DIR, help="Directorio de particiones")
+    parser.add_argument("--by", choices=["region", "country"], default="region")
+    parser.add_argument("--format", choices=["csv", "parquet"], default="csv")
+    args = parser.parse_args(argv)
+
+    written = write_partitions(pd.read_csv(args.source), args.output, args.by, args.format)
+    print(f"✅ {len(written)} archivos en {len(list_partitions(args.output))} regiones "
+          f"({args.output})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,188 @@
+"""
+Consultas espaciales sobre puntos de celda
+
+Responde "las N celdas más cercanas a un punto" y "todas las celdas a menos
+de R km", filtrando por tecnología. Los puntos se proyectan sobre la esfera
+unitaria y se indexan en un KD-tree por tecnología; la distancia de cuerda
+es monótona con la de haversine, así que los resultados son exactos.
+"""
+
+import itertools
+from functools import lru_cache
+from typing import Dict, Hashable, Iterable, Optional, Tuple, Union
+
+import numpy as np
+import pandas as pd
+from scipy.spatial import cKDTree
+
+from . import TECH_COLUMNS, get_data_signature, load_cells_data
+from .ingest import RADIO_COLUMNS
+
+# Radio medio de la Tierra en km
+EARTH_RADIUS_KM = 6371.0088
+
+Coordinates = Union[float, Iterable[float]]
+
+
+def _unit_vectors(lat: np.ndarray, lon: np.ndarray) -> np.ndarray:
+    """Coordenadas cartesianas sobre la esfera unitaria, forma (n, 3)."""
+    lat_rad, lon_rad = np.radians(lat), np.radians(lon)
+    cos_lat = np.cos(lat_rad)
+    return np.column_stack((cos_lat * np.cos(lon_rad), cos_lat * np.sin(lon_rad), np.sin(lat_rad)))
+
+
+def chord_to_km(chord: np.ndarray) -> np.ndarray:
+    """Convierte distancia de cuerda (esfera unitaria) a km de gran círculo."""
+    return 2.0 * EARTH_RADIUS_KM * np.arcsin(np.clip(chord / 2.0, 0.0, 1.0))
+
+
+def km_to_chord(distance_km: float) -> float:
+    """Convierte km de gran círculo a distancia de cuerda en la esfera unitaria."""
+    return float(2.0 * np.sin(min(distance_km / EARTH_RADIUS_KM, np.pi) / 2.0))
+
+
+def _as_points(lat: Coordinates, lon: Coordinates) -> Tuple[np.ndarray, np.ndarray]:
+    """Normaliza escalares o arreglos de consulta a arreglos 1D."""
+    lat_arr = np.atleast_1d(np.asarray(lat, dtype=np.float64))
+    lon_arr = np.atleast_1d(np.asarray(lon, dtype=np.float64))
+    if lat_arr.shape != lon_arr.shape:
+        raise ValueError("lat y lon deben tener la misma longitud")
+    return lat_arr, lon_arr
+
+
+class CellTree:
+    """KD-trees por tecnología sobre los puntos de celda."""
+
+    def __init__(self, cells: pd.DataFrame):
+        """
+        Construye un árbol por tecnología.
+
+        Args:
+            cells: Puntos con columnas 'radio', 'lat' y 'lon'
+        """
+        self.cells = cells.reset_index(drop=True)
+        tech = self.cells["radio"].astype(str).map(RADIO_COLUMNS).to_numpy()
+        xyz = _unit_vectors(self.cells["lat"].to_numpy(np.float64),
+                            self.cells["lon"].to_numpy(np.float64))
+
+        self.trees: Dict[str, Tuple[cKDTree, np.ndarray]] = {}
+        for column in TECH_COLUMNS:
+            rows = np.flatnonzero(tech == column)
+            if len(rows):
+                self.trees[column] = (cKDTree(xyz[rows]), rows)
+
+    def _selected(self, technologies: Optional[Iterable[str]]):
+        """Árboles de las tecnologías pedidas (None = todas)."""
+        names = TECH_COLUMNS if technologies is None else list(technologies)
+        return [self.trees[name] for name in names if name in self.trees]
+
+    def _result(self, query: np.ndarray, rows: np.ndarray, chord: np.ndarray) -> pd.DataFrame:
+        """Arma el resultado con las columnas de la celda y la distancia."""
+        result = self.cells.take(rows).reset_index(drop=True)
+        result.insert(0, "query", query)
+        result["distance_km"] = chord_to_km(chord)
+        return result.sort_values(["query", "distance_km"], ignore_index=True)
+
+    def nearest(self, lat: Coordinates, lon: Coordinates, k: int = 1,
+                technologies: Optional[Iterable[str]] = None) -> pd.DataFrame:
+        """
+        Las k celdas más cercanas a cada punto de consulta.
+
+        Args:
+            lat: Latitud o arreglo de latitudes
+            lon: Longitud o arreglo de longitudes
+            k: Celdas por punto
+            technologies: Tecnologías a considerar, p. ej. ['lte', 'nr'] (None = todas)
+
+        Returns:
+            DataFrame con 'query' (posición del punto), columnas de la celda y 'distance_km'
+        """
+        lat_arr, lon_arr = _as_points(lat, lon)
+        xyz = _unit_vectors(lat_arr, lon_arr)
+        queries, rows, chords = [], [], []
+        for tree, tree_rows in self._selected(technologies):
+            kk = min(k, tree.n)
+            chord, idx = tree.query(xyz, k=kk)
+            chord, idx = chord.reshape(len(xyz), kk), idx.reshape(len(xyz), kk)
+            queries.append(np.repeat(np.arange(len(xyz)), kk))
+            rows.append(tree_rows[idx.ravel()])
+            chords.append(chord.ravel())
+        if not queries:
+            return self._result(np.empty(0, int), np.empty(0, int), np.empty(0))
+
+        result = self._result(np.concatenate(queries), np.concatenate(rows),
+                              np.concatenate(chords))
+        # Con varias tecnologías se combinan los k mejores de cada árbol
+        return result.groupby("query", sort=False).head(k).reset_index(drop=True)
+
+    def within_radius(self, lat: Coordinates, lon: Coordinates, radius_km: float,
+                      technologies: Optional[Iterable[str]] = None) -> pd.DataFrame:
+        """
+        Todas las celdas a menos de radius_km de cada punto de consulta.
+
+        Args:
+            lat: Latitud o arreglo de latitudes
+            lon: Longitud o arreglo de longitudes
+            radius_km: Radio en km
+            technologies: Tecnologías a considerar (None = todas)
+
+        Returns:
+            DataFrame con 'query', columnas de la celda y 'distance_km'
+        """
+        lat_arr, lon_arr = _as_points(lat, lon)
+        xyz = _unit_vectors(lat_arr, lon_arr)
+        radius = km_to_chord(radius_km)
+        queries, rows = [], []
+        for tree, tree_rows in self._selected(technologies):
+            # Una sola consulta para todos los puntos; las listas de vecinos se
+            # aplanan sin recorrerlas punto por punto en Python
+            matches = tree.query_ball_point(xyz, r=radius)
+            lengths = np.fromiter(map(len, matches), dtype=np.int64, count=len(matches))
+            queries.append(np.repeat(np.arange(len(xyz)), lengths))
+            rows.append(tree_rows[np.fromiter(itertools.chain.from_iterable(matches),
+                                              dtype=np.int64, count=int(lengths.sum()))])
+        if not queries:
+            return self._result(np.empty(0, int), np.empty(0, int), np.empty(0))
+
+        query, row = np.concatenate(queries), np.concatenate(rows)
+        chord = np.linalg.norm(xyz[query] - _unit_vectors(
+            self.cells["lat"].to_numpy(np.float64)[row],
+            self.cells["lon"].to_numpy(np.float64)[row]), axis=1)
+        return self._result(query, row, chord)
+
+
+def get_cell_tree() -> Optional[CellTree]:
+    """
+    Árbol sobre los puntos de celda cargados, reconstruido al cambiar los datos.
+
+    Se construye una vez por firma de los datos (data.get_data_signature():
+    versión y mtime/tamaño de los archivos), así que un delta o una ingesta
+    nueva lo invalidan sin reiniciar el proceso.
+
+    Returns:
+        CellTree o None si no hay puntos de celda ingeridos
+    """
+    return _cell_tree(get_data_signature())
+
+
+@lru_cache(maxsize=1)
+def _cell_tree(signature: Hashable) -> Optional[CellTree]:
+    """Árbol de get_cell_tree() memorizado por firma de los datos."""
+    cells = load_cells_data()
+    if cells is None or cells.empty:
+        return None
+    return CellTree(cells)
+
+
+def nearest_cells(lat: Coordinates, lon: Coordinates, k: int = 1,
+                  technologies: Optional[Iterable[str]] = None) -> Optional[pd.DataFrame]:
+    """Atajo de CellTree.nearest() sobre el dataset cargado."""
+    tree = get_cell_tree()
+    return None if tree is None else tree.nearest(lat, lon, k, technologies)
+
+
+def cells_within(lat: Coordinates, lon: Coordinates, radius_km: float,
+                 technologies: Optional[Iterable[str]] = None) -> Optional[pd.DataFrame]:
+    """Atajo de CellTree.within_radius() sobre el dataset cargado."""
+    tree = get_cell_tree()
+    return None if tree is None else tree.within_radius(lat, lon, radius_km, technologies)
@@ -0,0 +1,227 @@
+"""
+Rasterizado de densidad de torres en teselas PNG
+
+Convierte los puntos de celda en imágenes de densidad por tecnología con
+escala de color logarítmica. Cada tesela Web Mercator de 256 px se calcula
+con un histograma 2D de NumPy sobre los puntos de los países seleccionados
+(por MCC) y se cachea por (tecnología, MCCs, zoom, x, y).
+"""
+
+import base64
+import io
+import threading
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from .ingest import MCC_COUNTRIES, RADIO_COLUMNS
+from .spatial import MAX_LATITUDE, Bounds, tile_coordinates
+
+# Tamaño de tesela en píxeles
+TILE_SIZE = 256
+
+# Teselas PNG retenidas en memoria (desalojo LRU)
+TILE_CACHE_SIZE = 512
+
+# Zoom de referencia para normalizar la escala de color entre niveles
+REFERENCE_ZOOM = 2
+
+# MCCs de una selección de países (ordenados), o None para todos los puntos
+MccKey = Optional[Tuple[int, ...]]
+
+
+def mcc_key(countries: Optional[Iterable[str]]) -> MccKey:
+    """MCCs de los países seleccionados (None: sin filtro)."""
+    if countries is None:
+        return None
+    selected = {str(country) for country in countries}
+    return tuple(sorted(mcc for mcc, country in MCC_COUNTRIES.items() if country in selected))
+
+
+def _mercator_uv(lat: np.ndarray, lon: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Coordenadas Web Mercator normalizadas a [0, 1)."""
+    lat_rad = np.radians(np.clip(lat, -MAX_LATITUDE, MAX_LATITUDE))
+    u = (lon + 180.0) / 360.0
+    v = (1.0 - np.arcsinh(np.tan(lat_rad)) / np.pi) / 2.0
+    return u, v
+
+
+def color_lut(color_scale: str = "Turbo") -> np.ndarray:
+    """
+    Tabla de 256 colores RGB a partir de una escala de Plotly.
+
+    Args:
+        color_scale: Nombre de la escala (p. ej. MAP_CONFIG["default_color_scale"])
+
+    Returns:
+        Arreglo uint8 de forma (256, 3)
+    """
+    from plotly.colors import (  # pylint: disable=import-outside-toplevel
+        sample_colorscale, unlabel_rgb)
+
+    samples = sample_colorscale(color_scale, list(np.linspace(0.0, 1.0, 256)), colortype="rgb")
+    return np.array([unlabel_rgb(color) for color in samples], dtype=np.float64).astype(np.uint8)
+
+
+def tile_bounds(zoom: int, x: int, y: int) -> Bounds:
+    """Límites geográficos (lat_min, lon_min, lat_max, lon_max) de una tesela."""
+    n = 2 ** zoom
+    lon_min, lon_max = x / n * 360.0 - 180.0, (x + 1) / n * 360.0 - 180.0
+    lat_max = float(np.degrees(np.arctan(np.sinh(np.pi * (1 - 2 * y / n)))))
+    lat_min = float(np.degrees(np.arctan(np.sinh(np.pi * (1 - 2 * (y + 1) / n)))))
+    return (lat_min, lon_min, lat_max, lon_max)
+
+
+def tiles_for_view(zoom: int, bounds: Bounds) -> List[Tuple[int, int]]:
+    """Teselas (x, y) que cubren un área visible."""
+    lat_min, lon_min, lat_max, lon_max = bounds
+    x_min, y_max = tile_coordinates(np.array([lat_min]), np.array([lon_min]), zoom)
+    x_max, y_min = tile_coordinates(np.array([lat_max]), np.array([lon_max]), zoom)
+    return [(x, y) for x in range(int(x_min[0]), int(x_max[0]) + 1)
+            for y in range(int(y_min[0]), int(y_max[0]) + 1)]
+
+
+class DensityRasterizer:
+    """Genera teselas PNG de densidad por tecnología a partir de puntos de celda."""
+
+    def __init__(self, cells: pd.DataFrame, color_scale: str = "Turbo",
+                 cache_size: int = TILE_CACHE_SIZE):
+        """
+        Prepara las coordenadas de cada tecnología ordenadas por longitud.
+
+        Args:
+            cells: Puntos con columnas 'radio', 'mcc', 'lat' y 'lon'
+            color_scale: Escala de color de Plotly
+            cache_size: Teselas retenidas en memoria
+        """
+        u, v = _mercator_uv(cells["lat"].to_numpy(np.float64), cells["lon"].to_numpy(np.float64))
+        tech = cells["radio"].astype(str).map(RADIO_COLUMNS).to_numpy()
+        mcc = cells["mcc"].to_numpy(np.int64)
+
+        # Puntos ordenados por u: cada tesela es un rango contiguo (searchsorted)
+        self.points: Dict[str, Tuple[np.ndarray, np.ndarray, np.ndarray]] = {}
+        for column in ["total_cells"] + list(RADIO_COLUMNS.values()):
+            selected = np.ones(len(u), dtype=bool) if column == "total_cells" else tech == column
+            order = np.argsort(u[selected], kind="stable")
+            self.points[column] = (u[selected][order], v[selected][order],
+                                   mcc[selected][order])
+
+        self.lut = color_lut(color_scale)
+        self.cache_size = cache_size
+        self._tiles: "OrderedDict[Tuple[str, MccKey, int, int, int], bytes]" = OrderedDict()
+        self._reference_max: Dict[Tuple[str, MccKey], float] = {}
+        # La instancia se comparte entre sesiones: la caché se protege con un lock
+        self._lock = threading.Lock()
+
+    def _selected(self, tech: str, mccs: MccKey, start: int = 0,
+                  stop: Optional[int] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """Coordenadas (u, v) de un rango de puntos, sólo de los MCCs pedidos."""
+        u, v, mcc = (values[start:stop] for values in self.points[tech])
+        if mccs is None:
+            return u, v
+        inside = np.isin(mcc, mccs)
+        return u[inside], v[inside]
+
+    def _histogram(self, tech: str, mccs: MccKey, zoom: int, x: int, y: int) -> np.ndarray:
+        """Conteo de puntos por píxel de una tesela (filas = y, columnas = x)."""
+        n = 2 ** zoom
+        start, stop = np.searchsorted(self.points[tech][0], [x / n, (x + 1) / n])
+        u_tile, v_tile = self._selected(tech, mccs, start, stop)
+        inside = (v_tile >= y / n) & (v_tile < (y + 1) / n)
+        counts, _, _ = np.histogram2d(
+            v_tile[inside], u_tile[inside], bins=TILE_SIZE,
+            range=[[y / n, (y + 1) / n], [x / n, (x + 1) / n]]
+        )
+        return counts
+
+    def _max_count(self, tech: str, mccs: MccKey, zoom: int) -> float:
+        """
+        Conteo máximo esperado por píxel en un zoom.
+
+        Se mide una vez por selección en REFERENCE_ZOOM y se escala por 4 por
+        nivel, para que los colores sean comparables entre teselas del mismo zoom.
+        """
+        key = (tech, mccs)
+        if key not in self._reference_max:
+            u, v = self._selected(tech, mccs)
+            size = TILE_SIZE * 2 ** REFERENCE_ZOOM
+            counts, _, _ = np.histogram2d(v, u, bins=size, range=[[0, 1], [0, 1]])
+            self._reference_max[key] = float(counts.max()) if counts.size else 1.0
+        return max(1.0, self._reference_max[key] / 4 ** (zoom - REFERENCE_ZOOM))
+
+    def _render(self, tech: str, mccs: MccKey, zoom: int, x: int, y: int) -> bytes:
+        """Renderiza una tesela como PNG RGBA con escala logarítmica."""
+        from PIL import Image  # pylint: disable=import-outside-toplevel
+
+        counts = self._histogram(tech, mccs, zoom, x, y)
+        scaled = np.log1p(counts) / np.log1p(self._max_count(tech, mccs, zoom))
+        indices = (np.clip(scaled, 0.0, 1.0) * 255).astype(np.uint8)
+
+        rgba = np.zeros((TILE_SIZE, TILE_SIZE, 4), dtype=np.uint8)
+        rgba[..., :3] = self.lut[indices]
+        rgba[..., 3] = np.where(counts > 0, 220, 0)
+
+        buffer = io.BytesIO()
+        Image.fromarray(rgba, mode="RGBA").save(buffer, format="PNG", optimize=False)
+        return buffer.getvalue()
+
+    def tile(self, tech: str, zoom: int, x: int, y: int,
+             countries: Optional[Iterable[str]] = None) -> bytes:
+        """
+        Tesela PNG cacheada por (tecnología, MCCs, zoom, x, y).
+
+        Args:
+            tech: 'total_cells' o columna de tecnología ('gsm', 'umts', 'lte', 'nr')
+            zoom: Zoom de la tesela
+            x: Columna de la tesela
+            y: Fila de la tesela
+            countries: Países cuyos puntos se dibujan (None: todos)
+
+        Returns:
+            Bytes PNG de TILE_SIZE x TILE_SIZE píxeles
+        """
+        mccs = mcc_key(countries)
+        key = (tech, mccs, zoom, x, y)
+        with self._lock:
+            if key in self._tiles:
+                self._tiles.move_to_end(key)
+                return self._tiles[key]
+
+        png = self._render(tech, mccs, zoom, x, y)
+        with self._lock:
+            self._tiles[key] = png
+            if len(self._tiles) > self.cache_size:
+                self._tiles.popitem(last=False)
+        return png
+
+    def mapbox_layers(self, tech: str, zoom: int, bounds: Bounds,
+                      opacity: Optional[float] = 0.85,
+                      countries: Optional[Iterable[str]] = None) -> List[Dict[str, object]]:
+        """
+        Capas de imagen de Mapbox que cubren el área visible.
+
+        Args:
+            tech: Tecnología a representar
+            zoom: Zoom del mapa (se usan teselas de ese nivel)
+            bounds: Área visible
+            opacity: Opacidad de las capas
+            countries: Países cuyos puntos se dibujan (None: todos)
+
+        Returns:
+            Lista de capas para ``fig.update_layout(mapbox_layers=...)``
+        """
+        layers = []
+        for x, y in tiles_for_view(zoom, bounds):
+            lat_min, lon_min, lat_max, lon_max = tile_bounds(zoom, x, y)
+            encoded = base64.b64encode(self.tile(tech, zoom, x, y, countries)).decode("ascii")
+            layers.append({
+                "sourcetype": "image",
+                "source": f"data:image/png;base64,{encoded}",
+                "coordinates": [[lon_min, lat_max], [lon_max, lat_max],
+                                [lon_max, lat_min], [lon_min, lat_min]],
+                "opacity": opacity,
+                "below": "traces"
+            })
+        return layers
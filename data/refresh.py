@@ -0,0 +1,246 @@
+"""
+Reconstrucción del motor en segundo plano
+
+EngineRefresher mantiene el motor vigente del proceso. Un hilo vigila la
+firma de los datos (data.get_data_signature(): contador de versión y
+mtime/tamaño de los archivos) y, cuando cambia, un ejecutor de un solo
+hilo construye el motor nuevo fuera del camino de las peticiones: carga el
+dataset, aplica el diario de deltas o reconstruye, y precalienta resultados
+y estructuras. Recién entonces se reemplaza la referencia; las sesiones
+toman el motor una vez por rerun y nunca ven uno a medio construir ni con
+cachés vacías.
+
+Con el dataset particionado por región (data.partitions) cada conjunto de
+regiones elegido en el sidebar tiene su propio motor, construido sólo con
+esas particiones. Se construye también en el ejecutor: mientras tanto la
+sesión recibe el motor de todas las regiones. Los motores de regiones
+comparten con éste los puntos de celda y sus estructuras derivadas
+(DashboardEngine.with_dataset()); se mantienen los MAX_ENGINES construidos
+más recientemente y la reconstrucción los renueva a todos antes de
+publicarlos juntos.
+
+Se usan hilos y no procesos: el motor vive en la memoria del proceso que
+atiende las sesiones, y numpy/pandas liberan el GIL en la mayor parte de la
+construcción.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Hashable, Iterable, Optional, Set, Tuple
+
+import pandas as pd
+
+from . import get_data_signature
+from .delta import read_journal
+from .engine import DashboardEngine
+
+# Segundos entre revisiones de la firma de los datos
+REFRESH_INTERVAL_S = 5.0
+
+# Claves recientes del motor anterior que se recalculan en el nuevo
+WARM_KEYS = 128
+
+# Motores (conjuntos de regiones, incluido el de todas) mantenidos como máximo
+MAX_ENGINES = 4
+
+# Conjunto de regiones de un motor: tupla ordenada, o None para todas
+RegionKey = Optional[Tuple[str, ...]]
+
+
+def region_key(regions: Optional[Iterable[str]]) -> RegionKey:
+    """Clave canónica de un conjunto de regiones (None o vacío: todas)."""
+    return tuple(sorted(regions)) if regions else None
+
+
+class EngineRefresher:
+    """Motor vigente del proceso, reconstruido en segundo plano al cambiar los datos."""
+
+    def __init__(self, loader: Callable[[Hashable, RegionKey], pd.DataFrame],
+                 warm: Optional[Callable[[DashboardEngine], None]] = None,
+                 signature: Callable[[], Hashable] = get_data_signature,
+                 interval_s: float = REFRESH_INTERVAL_S,
+                 engine_factory: Callable[..., DashboardEngine] = DashboardEngine):
+        """
+        Args:
+            loader: Devuelve el dataset por país para una firma de los datos
+                y un conjunto de regiones (None: todas)
+            warm: Precalentamiento adicional del motor nuevo (p. ej. figuras)
+            signature: Firma actual de los datos; el primer elemento es la
+                versión de data.get_data_version()
+            interval_s: Segundos entre revisiones de la firma
+            engine_factory: Constructor del motor (dataset, data_version=...)
+        """
+        self._loader = loader
+        self._warm = warm
+        self._signature_fn = signature
+        self._factory = engine_factory
+        self.interval_s = interval_s
+        self._engines: "OrderedDict[RegionKey, DashboardEngine]" = OrderedDict()
+        self._signature: Optional[Hashable] = None
+        self._pending: Optional[Future] = None
+        self._queued: Set[RegionKey] = set()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="engine-refresh")
+        self.status: Dict[str, Any] = {"data_version": None, "engines": 0, "builds": 0,
+                                       "last_build_s": None, "last_swap": None,
+                                       "incremental": None, "last_error": None}
+
+    def engine(self, regions: Optional[Iterable[str]] = None) -> DashboardEngine:
+        """
+        Motor vigente para un conjunto de regiones.
+
+        Sólo la primera llamada del proceso espera (construye el motor de
+        todas las regiones). Un conjunto de regiones sin motor se encola en el
+        ejecutor y, hasta que esté listo, se devuelve el de todas las regiones.
+
+        Args:
+            regions: Regiones del motor (None o vacío: todas)
+        """
+        key = region_key(regions)
+        engines = self._engines
+        if key in engines:
+            return engines[key]
+        with self._lock:
+            if None not in self._engines:
+                signature = self._signature or self._signature_fn()
+                self._swap(OrderedDict([(None, self._build(signature, None))]), signature)
+            if key not in self._engines and key not in self._queued:
+                self._queued.add(key)
+                self._executor.submit(self._add, key)
+            return self._engines.get(key, self._engines[None])
+
+    def cache_stats(self) -> Dict[str, Dict[str, int]]:
+        """Aciertos y fallos de los resultados memorizados, sumados sobre los motores vigentes."""
+        totals: Dict[str, Dict[str, int]] = {}
+        for engine in list(self._engines.values()):
+            for name, stats in list(engine.cache_stats.items()):
+                entry = totals.setdefault(name, {"hits": 0, "misses": 0})
+                entry["hits"] += stats["hits"]
+                entry["misses"] += stats["misses"]
+        return totals
+
+    def start(self) -> "EngineRefresher":
+        """Inicia el hilo que vigila la firma de los datos (idempotente)."""
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._watch, name="engine-watch",
+                                                daemon=True)
+                self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        """Detiene la vigilancia y espera la reconstrucción en curso."""
+        self._stop.set()
+        self._executor.shutdown(wait=True)
+
+    def check(self, force: bool = False) -> Optional[Future]:
+        """
+        Encola una reconstrucción si la firma cambió y no hay otra en curso.
+
+        Args:
+            force: Reconstruir aunque la firma no haya cambiado
+
+        Returns:
+            Future de la reconstrucción encolada, o None
+        """
+        signature = self._signature_fn()
+        with self._lock:
+            if self._pending is not None and not self._pending.done():
+                return None
+            if signature == self._signature and not force:
+                return None
+            self._pending = self._executor.submit(self._refresh, signature)
+            return self._pending
+
+    def _watch(self) -> None:
+        """Bucle del hilo de vigilancia."""
+        while not self._stop.wait(self.interval_s):
+            self.check()
+
+    def _add(self, key: RegionKey) -> None:
+        """Construye (en el ejecutor) y publica el motor de un conjunto de regiones."""
+        try:
+            full, signature = self._engines.get(None), self._signature
+            if full is None or key in self._engines:
+                return
+            engine = self._build(signature, key, full)
+            with self._lock:
+                # El ejecutor tiene un solo hilo: ninguna reconstrucción
+                # reemplazó el motor completo mientras se construía éste
+                engines = OrderedDict(self._engines)
+                engines[key] = engine
+                while len(engines) > MAX_ENGINES:
+                    del engines[next(k for k in engines if k is not None)]
+                self._swap(engines, signature)
+        except Exception as error:  # pylint: disable=broad-except
+            self.status["last_error"] = f"{type(error).__name__}: {error}"
+        finally:
+            with self._lock:
+                self._queued.discard(key)
+
+    def _refresh(self, signature: Hashable) -> None:
+        """
+        Construye y publica los motores nuevos.
+
+        Ante un error se siguen sirviendo los anteriores.
+        """
+        try:
+            full = self._build(signature, None)
+            engines = OrderedDict([(None, full)])
+            for key in self._engines:
+                if key is not None:
+                    engines[key] = self._build(signature, key, full)
+            # Los conjuntos pedidos durante la reconstrucción se construyeron con
+            # los datos anteriores: se descartan y se vuelven a pedir si hacen falta
+            with self._lock:
+                self._swap(engines, signature)
+        except Exception as error:  # pylint: disable=broad-except
+            self.status["last_error"] = f"{type(error).__name__}: {error}"
+
+    def _build(self, signature: Hashable, key: RegionKey,
+               full: Optional[DashboardEngine] = None) -> DashboardEngine:
+        """
+        Motor nuevo y precalentado para una firma de los datos y un conjunto de regiones.
+
+        Args:
+            signature: Firma de los datos
+            key: Conjunto de regiones (None: todas)
+            full: Motor de todas las regiones de la misma firma, con el que
+                comparte los puntos de celda (requerido si key no es None)
+        """
+        start = time.perf_counter()
+        current, version = self._engines.get(key), signature[0]
+        dataframe = self._loader(signature, key)
+
+        # Con deltas registrados desde la versión vigente, la pirámide del mapa
+        # se actualiza en lugar de reconstruirse
+        changes = None
+        if full is not None:
+            engine = full.with_dataset(dataframe)
+        else:
+            if current is not None and version > current.data_version:
+                changes = read_journal(current.data_version, version)
+            if changes is not None:
+                engine = current.refreshed(dataframe, changes, version)
+            else:
+                engine = self._factory(dataframe, data_version=version)
+
+        # La cobertura se comparte: sólo la construye el motor de todas las regiones
+        engine.warm(current.recent_keys(WARM_KEYS) if current is not None else (),
+                    derived=full is None)
+        if self._warm is not None:
+            self._warm(engine)
+        self.status.update(builds=self.status["builds"] + 1, incremental=changes is not None,
+                           last_build_s=time.perf_counter() - start)
+        return engine
+
+    def _swap(self, engines: "OrderedDict[RegionKey, DashboardEngine]",
+              signature: Hashable) -> None:
+        """Publica los motores: una asignación de referencia, atómica para los lectores."""
+        self._engines, self._signature = engines, signature
+        self.status.update(data_version=signature[0], engines=len(engines),
+                           last_swap=time.time(), last_error=None)
@@ -0,0 +1,250 @@
+"""
+Agregados jerárquicos por operador y área
+
+Durante la ingesta se cuentan las celdas por (MCC, MNC, LAC/TAC, radio) y se
+guardan en data/rollups.parquet dos niveles ya agregados: operador (país,
+MCC-MNC) y área (país, MCC-MNC, LAC/TAC), con las antenas por tecnología y la
+participación de cada una. Cada nivel queda ordenado por país y operador, así
+que el detalle de un país o de un operador es un corte por posición
+(RollupIndex) y no un groupby sobre las celdas.
+
+Los deltas diarios (data.delta) actualizan los agregados con las celdas con
+signo, sin volver a leer las celdas. Para generarlos desde un almacén de
+puntos ya existente:
+
+Uso:
+    python -m data.rollups data/cells.parquet
+"""
+
+import argparse
+import os
+from typing import Dict, Hashable, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from . import DATA_FILES, TECH_COLUMNS, atomic_write, bump_data_version, get_data_path
+from .ingest import MCC_COUNTRIES, RADIO_COLUMNS
+from .schema import apply_compact_schema
+
+# Archivo por defecto de los agregados
+ROLLUP_PATH = get_data_path(DATA_FILES["rollups"])
+
+# Claves de un área (LAC en 2G/3G, TAC en 4G/5G)
+AREA_KEYS = ["mcc", "net", "area"]
+
+# Bloques parciales acumulados antes de combinarlos
+COMPACT_EVERY = 16
+
+# Filas leídas por lote del almacén de puntos
+CELL_BATCH_ROWS = 1_000_000
+
+
+def operator_codes(mcc: pd.Series, net: pd.Series) -> pd.Series:
+    """Identificador de operador en notación MCC-MNC (p. ej. '722-07')."""
+    return mcc.astype(str) + "-" + net.astype(str).str.zfill(2)
+
+
+class RollupAccumulator:
+    """Conteos por (MCC, MNC, área, radio) acumulados bloque a bloque."""
+
+    def __init__(self):
+        self._parts: List[pd.Series] = []
+
+    def add(self, chunk: pd.DataFrame) -> None:
+        """Suma un bloque de celdas (columnas radio, mcc, net y area)."""
+        self._parts.append(chunk.groupby(["mcc", "net", "area", "radio"], observed=True).size())
+        if len(self._parts) >= COMPACT_EVERY:
+            self._parts = [self._combine()]
+
+    def _combine(self) -> pd.Series:
+        """Une los conteos parciales en una sola serie."""
+        return pd.concat(self._parts).groupby(level=[0, 1, 2, 3], observed=True).sum()
+
+    def area_counts(self) -> pd.DataFrame:
+        """
+        Antenas por área y tecnología.
+
+        Returns:
+            DataFrame con AREA_KEYS y TECH_COLUMNS
+        """
+        if not self._parts:
+            return pd.DataFrame(columns=AREA_KEYS + TECH_COLUMNS)
+        counts = self._combine().rename("cells").reset_index()
+        counts["tech"] = counts["radio"].astype(str).map(RADIO_COLUMNS)
+        wide = counts.pivot_table(index=AREA_KEYS, columns="tech", values="cells",
+                                  aggfunc="sum", fill_value=0)
+        return wide.reindex(columns=TECH_COLUMNS, fill_value=0).reset_index()
+
+
+def build_rollups(areas: pd.DataFrame) -> pd.DataFrame:
+    """
+    Niveles operador y área a partir de las antenas por área.
+
+    Args:
+        areas: DataFrame con AREA_KEYS y TECH_COLUMNS
+
+    Returns:
+        DataFrame con level ('operator' o 'area'), country, operator, mcc,
+        net, area (-1 en el nivel operador), TECH_COLUMNS, total_cells,
+        areas, <tech>_share; cada nivel ordenado por país, operador y antenas
+    """
+    areas = areas[areas["mcc"].isin(list(MCC_COUNTRIES))]
+    areas = areas.assign(country=areas["mcc"].map(MCC_COUNTRIES),
+                         operator=operator_codes(areas["mcc"], areas["net"]),
+                         total_cells=areas[TECH_COLUMNS].sum(axis=1), areas=1)
+    areas = areas[areas["total_cells"] > 0]
+
+    operators = areas.groupby(["country", "operator", "mcc", "net"], as_index=False)[
+        TECH_COLUMNS + ["total_cells", "areas"]].sum().assign(area=-1)
+    operators = operators.sort_values(["country", "total_cells"], ascending=[True, False])
+    areas = areas.sort_values(["country", "operator", "total_cells"],
+                              ascending=[True, True, False])
+
+    rollups = pd.concat([operators.assign(level="operator"), areas.assign(level="area")],
+                        ignore_index=True)
+    total = rollups["total_cells"].to_numpy(np.float64)
+    shares = {f"{tech}_share": np.divide(rollups[tech].to_numpy(np.float64), total,
+                                         out=np.zeros(len(rollups)), where=total > 0)
+              for tech in TECH_COLUMNS}
+    columns = ["level", "country", "operator", "mcc", "net", "area"] + TECH_COLUMNS + [
+        "total_cells", "areas"]
+    return rollups[columns].assign(**shares)
+
+
+def area_counts(rollups: pd.DataFrame) -> pd.DataFrame:
+    """Antenas por área y tecnología del nivel área de unos agregados."""
+    areas = rollups[rollups["level"] == "area"]
+    return areas[AREA_KEYS + TECH_COLUMNS].astype(np.int64).reset_index(drop=True)
+
+
+def apply_changes(rollups: pd.DataFrame, changes: pd.DataFrame) -> pd.DataFrame:
+    """
+    Aplica celdas con signo (data.delta) a los agregados.
+
+    Args:
+        rollups: Resultado de build_rollups() o load_rollups()
+        changes: DataFrame con radio, mcc, net, area y sign
+
+    Returns:
+        Agregados nuevos (los conteos no bajan de cero)
+    """
+    signed = changes.astype({"mcc": np.int64, "net": np.int64, "area": np.int64,
+                             "sign": np.int64}).assign(
+        tech=changes["radio"].astype(str).map(RADIO_COLUMNS))
+    delta = signed.pivot_table(index=AREA_KEYS, columns="tech", values="sign",
+                               aggfunc="sum", fill_value=0)
+    delta = delta.reindex(columns=TECH_COLUMNS, fill_value=0)
+    current = area_counts(rollups).set_index(AREA_KEYS)
+    updated = current.add(delta, fill_value=0).clip(lower=0).astype(np.int64)
+    return build_rollups(updated.reset_index())
+
+
+def write_rollups(rollups: pd.DataFrame, path: str = ROLLUP_PATH) -> None:
+    """Escribe los agregados en Parquet de forma atómica."""
+    atomic_write(path, lambda tmp_path: rollups.to_parquet(tmp_path, index=False))
+
+
+def load_rollups(path: str = ROLLUP_PATH) -> Optional[pd.DataFrame]:
+    """
+    Agregados por operador y área con el esquema compacto.
+
+    Returns:
+        DataFrame de build_rollups(), o None si no hay archivo
+    """
+    if not os.path.exists(path):
+        return None
+    rollups = apply_compact_schema(pd.read_parquet(path))
+    return rollups.astype({"level": "category", "operator": "category"})
+
+
+def update_rollups(changes: pd.DataFrame, path: str = ROLLUP_PATH) -> bool:
+    """
+    Aplica celdas con signo a los agregados en disco, si existen.
+
+    Returns:
+        True si se actualizaron
+    """
+    if not os.path.exists(path) or not len(changes):
+        return False
+    write_rollups(apply_changes(pd.read_parquet(path), changes), path)
+    return True
+
+
+def rollups_from_cells(cells_path: str) -> pd.DataFrame:
+    """Agregados calculados desde un almacén de puntos, leído por lotes."""
+    from .cellstore import iter_cells  # pylint: disable=import-outside-toplevel
+
+    accumulator = RollupAccumulator()
+    for chunk in iter_cells(cells_path, ["radio", "mcc", "net", "area"], CELL_BATCH_ROWS):
+        accumulator.add(chunk)
+    return build_rollups(accumulator.area_counts())
+
+
+def _slices(frame: pd.DataFrame, keys: List[str]) -> Dict[Hashable, Tuple[int, int]]:
+    """
+    Rango de posiciones de cada valor de ``keys`` en un frame ordenado por ellas.
+
+    Returns:
+        Diccionario {valor (o tupla de valores): (inicio, fin)}
+    """
+    if frame.empty:
+        return {}
+    columns = [frame[key].astype(str).to_numpy() for key in keys]
+    change = np.zeros(len(frame), dtype=bool)
+    change[0] = True
+    for values in columns:
+        change[1:] |= values[1:] != values[:-1]
+    starts = np.flatnonzero(change)
+    stops = np.append(starts[1:], len(frame))
+    labels = zip(*(values[starts] for values in columns))
+    return {(label if len(keys) > 1 else label[0]): (int(start), int(stop))
+            for label, start, stop in zip(labels, starts, stops)}
+
+
+class RollupIndex:
+    """Detalle por país y por operador como cortes por posición de los agregados."""
+
+    def __init__(self, rollups: pd.DataFrame):
+        """
+        Args:
+            rollups: Resultado de load_rollups() (cada nivel ordenado por país y operador)
+        """
+        level = rollups["level"].astype(str)
+        self.operators = rollups[(level == "operator").to_numpy()].reset_index(drop=True)
+        self.areas = rollups[(level == "area").to_numpy()].reset_index(drop=True)
+        self._by_country = _slices(self.operators, ["country"])
+        self._by_operator = _slices(self.areas, ["country", "operator"])
+
+    def countries(self) -> List[str]:
+        """Países con agregados por operador."""
+        return list(self._by_country)
+
+    def country_operators(self, country: str) -> pd.DataFrame:
+        """Operadores de un país, de mayor a menor cantidad de antenas."""
+        start, stop = self._by_country.get(country, (0, 0))
+        return self.operators.iloc[start:stop]
+
+    def operator_areas(self, country: str, operator: str) -> pd.DataFrame:
+        """Áreas (LAC/TAC) de un operador, de mayor a menor cantidad de antenas."""
+        start, stop = self._by_operator.get((country, operator), (0, 0))
+        return self.areas.iloc[start:stop]
+
+
+def main(argv: Optional[list] = None) -> None:
+    """Punto de entrada de línea de comandos."""
+    parser = argparse.ArgumentParser(description="Agregados por operador y área desde las celdas")
+    parser.add_argument("cells", nargs="?", default=get_data_path(DATA_FILES["cells"]),
+                        help="Almacén de puntos de celda (Parquet)")
+    parser.add_argument("--output", default=ROLLUP_PATH, help="Parquet de salida")
+    args = parser.parse_args(argv)
+
+    rollups = rollups_from_cells(args.cells)
+    write_rollups(rollups, args.output)
+    bump_data_version(kind="rollups", source=os.path.basename(args.cells))
+    operators = int((rollups["level"] == "operator").sum())
+    print(f"✅ {operators} operadores y {len(rollups) - operators} áreas en {args.output}")
+
+
+if __name__ == "__main__":
+    main()
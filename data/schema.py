@@ -0,0 +1,101 @@
+"""
+Esquema compacto de tipos para los datasets cargados
+
+Define categóricas para columnas de texto repetitivo, el entero más chico
+que contiene cada conteo y float32 para coordenadas. Incluye un reporte de
+memoria por columna para dimensionar los contenedores.
+
+Uso:
+    python -m data.schema
+"""
+
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+# Columnas de texto con pocos valores distintos
+CATEGORICAL_COLUMNS = ["country", "region", "radio"]
+
+# Coordenadas: float32 da ~1 m de precisión, suficiente para celdas
+FLOAT32_COLUMNS = ["latitude", "longitude", "lat", "lon", "range"]
+
+
+def apply_compact_schema(dataframe: pd.DataFrame) -> pd.DataFrame:
+    """
+    Convierte un dataset al esquema compacto.
+
+    Args:
+        dataframe: Dataset por país o por celda
+
+    Returns:
+        DataFrame con categóricas, enteros mínimos y coordenadas float32
+    """
+    converted = {}
+    for column in dataframe.columns:
+        series = dataframe[column]
+        if column in CATEGORICAL_COLUMNS:
+            if not isinstance(series.dtype, pd.CategoricalDtype):
+                converted[column] = series.astype("category")
+        elif column in FLOAT32_COLUMNS:
+            converted[column] = series.astype(np.float32)
+        elif (pd.api.types.is_integer_dtype(series)
+              and not pd.api.types.is_extension_array_dtype(series)):
+            # Entero con signo más chico que contiene el rango actual
+            converted[column] = pd.to_numeric(series, downcast="integer")
+    return dataframe.assign(**converted) if converted else dataframe
+
+
+def memory_report(dataframe: pd.DataFrame) -> pd.DataFrame:
+    """
+    Memoria ocupada por columna (incluye el contenido de strings y categorías).
+
+    Args:
+        dataframe: Dataset cargado
+
+    Returns:
+        DataFrame con column, dtype, bytes, bytes_per_row y share, más una fila TOTAL
+    """
+    usage = dataframe.memory_usage(deep=True, index=True)
+    rows = max(len(dataframe), 1)
+    total = int(usage.sum())
+    report = pd.DataFrame({
+        "column": usage.index.astype(str),
+        "dtype": ["index"] + [str(dtype) for dtype in dataframe.dtypes],
+        "bytes": usage.to_numpy(dtype=np.int64),
+    })
+    report.loc[len(report)] = ["TOTAL", "", total]
+    report["bytes_per_row"] = (report["bytes"] / rows).round(2)
+    report["share"] = (report["bytes"] / total * 100).round(1) if total else 0.0
+    return report
+
+
+def format_bytes(size: float) -> str:
+    """Formatea un tamaño en bytes con unidad legible."""
+    for unit in ("B", "KB", "MB", "GB"):
+        if size < 1024 or unit == "GB":
+            return f"{size:,.1f} {unit}"
+        size /= 1024
+    return f"{size:,.1f} GB"
+
+
+def main(dataframe: Optional[pd.DataFrame] = None) -> None:
+    """Imprime el reporte de memoria de los datasets disponibles."""
+    # pylint: disable=import-outside-toplevel
+    from . import load_cells_data, load_expanded_data, load_original_data
+
+    datasets = {"expanded": load_expanded_data(), "original": load_original_data(),
+                "cells": load_cells_data()}
+    if dataframe is not None:
+        datasets = {"dataframe": dataframe}
+
+    for name, data in datasets.items():
+        if data is None:
+            continue
+        report = memory_report(data)
+        print(f"\n📦 {name}: {len(data):,} filas, {format_bytes(report['bytes'].iloc[-1])}")
+        print(report.to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,318 @@
+"""
+Historia de fotos del dataset por país
+
+Cada ingesta (completa o delta) agrega una foto de los conteos por país y
+tecnología de esa fecha: un Parquet inmutable por fecha en data/snapshots/ y
+una parte de la tabla de historia (history/<fecha>.parquet) con una fila por
+(país, tecnología) con las antenas y las altas netas respecto de la foto
+anterior, calculadas al agregar la foto. Un país que deja de aparecer tiene
+una fila con 0 antenas y altas negativas. Agregar una foto escribe sólo su
+parte (lee sólo la parte anterior); las consultas de crecimiento leen la
+tabla completa, sin comparar datasets completos.
+
+Sólo se agregan fotos: una fecha anterior a la última se rechaza y la misma
+fecha sólo se reemplaza a pedido (reingesta del mismo día).
+
+Uso:
+    python -m data.snapshots data/expanded_telecom_data.csv --date 2025-10-17
+"""
+
+import argparse
+import functools
+import os
+import tempfile
+from datetime import date as Date
+from datetime import datetime, timezone
+from typing import Iterable, List, Optional, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+from . import DATA_FILES, TECH_COLUMNS, bump_data_version, get_data_path, replace_file
+from .partitions import concat_partitions
+
+# Directorio por defecto de las fotos
+SNAPSHOT_DIR = get_data_path(DATA_FILES["snapshots"])
+
+# Partes de la tabla de historia (una por fecha) dentro del directorio de fotos
+HISTORY_DIR = "history"
+
+# Tabla de historia en un solo archivo (formato anterior, se divide en partes
+# al agregar la próxima foto)
+HISTORY_FILE = "history.parquet"
+
+# Conteos guardados por foto
+SNAPSHOT_COLUMNS = TECH_COLUMNS + ["total_cells"]
+
+# Columnas de la tabla de historia
+HISTORY_COLUMNS = ["date", "country", "region", "tech", "cells", "added"]
+
+SnapshotDate = Union[str, Date, datetime, pd.Timestamp]
+
+
+def normalize_date(value: Optional[SnapshotDate]) -> pd.Timestamp:
+    """Fecha de la foto, sin hora (hoy en UTC si no se indica)."""
+    if value is None:
+        value = datetime.now(timezone.utc).date()
+    return pd.Timestamp(value).tz_localize(None).normalize()
+
+
+def snapshots_of(csv_path: str) -> Optional[str]:
+    """
+    Directorio de fotos que acompaña a un CSV por país.
+
+    Sólo el dataset expandido tiene historia (la que lee el dashboard); para
+    otros CSV se devuelve None y no se agregan fotos.
+    """
+    expanded = get_data_path(DATA_FILES["expanded"])
+    return SNAPSHOT_DIR if os.path.abspath(csv_path) == os.path.abspath(expanded) else None
+
+
+def _atomic_parquet(dataframe: pd.DataFrame, path: str) -> None:
+    """Escribe un Parquet de forma atómica."""
+    fd, tmp_path = tempfile.mkstemp(prefix=".", suffix=".parquet", dir=os.path.dirname(path))
+    os.close(fd)
+    try:
+        dataframe.to_parquet(tmp_path, index=False)
+        replace_file(tmp_path, path)
+    except (OSError, ValueError):
+        os.unlink(tmp_path)
+        raise
+
+
+def _history_parts(root: str) -> List[str]:
+    """Partes de la tabla de historia, de la fecha más antigua a la más reciente."""
+    directory = os.path.join(root, HISTORY_DIR)
+    try:
+        names = os.listdir(directory)
+    except OSError:
+        return []
+    # Los temporales de _atomic_parquet() empiezan con punto
+    return [os.path.join(directory, name) for name in sorted(names)
+            if name.endswith(".parquet") and not name.startswith(".")]
+
+
+def _read_part(path: str) -> pd.DataFrame:
+    """Una parte de la historia, con categóricas (los filtros comparan códigos, no texto)."""
+    return pd.read_parquet(path).astype(
+        {"country": "category", "region": "category", "tech": "category"})
+
+
+def load_history(root: str = SNAPSHOT_DIR) -> Optional[pd.DataFrame]:
+    """
+    Tabla de historia: una fila por (fecha, país, tecnología).
+
+    Returns:
+        DataFrame de sólo lectura ordenado por fecha, o None sin fotos
+    """
+    paths = _history_parts(root)
+    legacy = os.path.join(root, HISTORY_FILE)
+    if os.path.exists(legacy):
+        paths.insert(0, legacy)
+    files = []
+    for path in paths:
+        try:
+            stat = os.stat(path)
+        except OSError:
+            continue
+        files.append((path, stat.st_mtime_ns, stat.st_size))
+    return _read_history(tuple(files)) if files else None
+
+
+@functools.lru_cache(maxsize=2)
+def _read_history(files: Tuple[Tuple[str, int, int], ...]) -> pd.DataFrame:
+    """Lectura de load_history() memorizada por partes y su firma."""
+    history = concat_partitions([_read_part(path) for path, _, _ in files])
+    return history.sort_values("date", kind="stable", ignore_index=True)
+
+
+def latest_snapshot_date(root: str = SNAPSHOT_DIR) -> Optional[pd.Timestamp]:
+    """Fecha de la última foto (por el nombre de su parte, sin leerla), o None sin fotos."""
+    if os.path.exists(os.path.join(root, HISTORY_FILE)):
+        history = load_history(root)
+        return None if history is None or not len(history) else history["date"].max()
+    parts = _history_parts(root)
+    return pd.Timestamp(os.path.basename(parts[-1])[:-len(".parquet")]) if parts else None
+
+
+def _part_path(root: str, snapshot_date: pd.Timestamp) -> str:
+    """Ruta de la parte de historia de una fecha."""
+    return os.path.join(root, HISTORY_DIR, f"{snapshot_date.date().isoformat()}.parquet")
+
+
+def _split_history(root: str) -> None:
+    """Divide la tabla de historia del formato anterior en una parte por fecha."""
+    legacy = os.path.join(root, HISTORY_FILE)
+    if not os.path.exists(legacy):
+        return
+    os.makedirs(os.path.join(root, HISTORY_DIR), exist_ok=True)
+    for day, rows in pd.read_parquet(legacy).groupby("date"):
+        _atomic_parquet(rows[HISTORY_COLUMNS], _part_path(root, day))
+    os.unlink(legacy)
+
+
+def snapshot_rows(dataframe: pd.DataFrame, snapshot_date: pd.Timestamp) -> pd.DataFrame:
+    """
+    Conteos de un dataset por país en formato largo (fecha, país, región, tecnología).
+
+    Args:
+        dataframe: Dataset con country, region y SNAPSHOT_COLUMNS
+        snapshot_date: Fecha de la foto
+
+    Returns:
+        DataFrame con date, country, region, tech y cells
+    """
+    rows = dataframe[["country", "region"] + SNAPSHOT_COLUMNS].astype(
+        {"country": str, "region": str}).melt(
+        id_vars=["country", "region"], value_vars=SNAPSHOT_COLUMNS,
+        var_name="tech", value_name="cells")
+    rows.insert(0, "date", snapshot_date)
+    return rows.astype({"country": "category", "region": "category", "tech": "category",
+                        "cells": "int64"})
+
+
+def append_snapshot(dataframe: pd.DataFrame, snapshot_date: Optional[SnapshotDate] = None,
+                    root: str = SNAPSHOT_DIR, replace: bool = False) -> pd.Timestamp:
+    """
+    Agrega la foto de un dataset por país y actualiza la tabla de historia.
+
+    Las altas netas se calculan contra la foto anterior (0 en la primera
+    foto; todas las antenas para un país nuevo; menos todas las de la foto
+    anterior, con 0 antenas, para un país que ya no está). Sólo se lee la
+    parte anterior y se escribe la de esta fecha.
+
+    Args:
+        dataframe: Dataset con country, region y SNAPSHOT_COLUMNS
+        snapshot_date: Fecha de la foto (por defecto hoy, UTC)
+        root: Directorio de fotos
+        replace: Reemplazar la foto si ya hay una con esa fecha
+
+    Returns:
+        Fecha de la foto agregada
+
+    Raises:
+        ValueError: Si la fecha es anterior a la última foto, o igual sin replace
+    """
+    snapshot_date = normalize_date(snapshot_date)
+    os.makedirs(os.path.join(root, HISTORY_DIR), exist_ok=True)
+    _split_history(root)
+    parts = _history_parts(root)
+    if parts:
+        last = latest_snapshot_date(root)
+        if snapshot_date < last or (snapshot_date == last and not replace):
+            raise ValueError(f"Ya hay fotos hasta {last.date()}: "
+                             "sólo se agregan fechas posteriores")
+        if snapshot_date == last:
+            parts = parts[:-1]
+
+    rows = snapshot_rows(dataframe, snapshot_date)
+    if parts:
+        previous = pd.read_parquet(parts[-1], columns=["country", "region", "tech", "cells"])
+        rows = rows.astype({"country": str, "region": str, "tech": str}).merge(
+            previous.astype({"country": str, "region": str, "tech": str}).rename(
+                columns={"region": "prev_region", "cells": "prev"}),
+            on=["country", "tech"], how="outer")
+        gone = rows["cells"].isna()
+        rows["date"] = snapshot_date
+        rows["region"] = rows["region"].fillna(rows.pop("prev_region"))
+        rows["cells"] = rows["cells"].fillna(0).astype("int64")
+        rows["added"] = rows["cells"] - rows.pop("prev").fillna(0).astype("int64")
+        # Un país ausente aparece una vez, con sus bajas; después deja de arrastrarse
+        rows = rows[~gone | (rows["added"] != 0)].astype(
+            {"country": "category", "region": "category", "tech": "category"})
+    else:
+        rows["added"] = np.int64(0)
+
+    snapshot_path = os.path.join(root, f"{snapshot_date.date().isoformat()}.parquet")
+    _atomic_parquet(dataframe.reset_index(drop=True), snapshot_path)
+    _atomic_parquet(rows[HISTORY_COLUMNS].reset_index(drop=True),
+                    _part_path(root, snapshot_date))
+    return snapshot_date
+
+
+def window_start(history: pd.DataFrame, months: int) -> pd.Timestamp:
+    """Foto base de una ventana: la última anterior o igual a (última fecha - months)."""
+    dates = np.unique(history["date"].to_numpy())
+    limit = pd.Timestamp(dates[-1]) - pd.DateOffset(months=months)
+    before = dates[dates <= limit.to_datetime64()]
+    return pd.Timestamp(before[-1] if len(before) else dates[0])
+
+
+def _tech_rows(history: pd.DataFrame, tech: str,
+               countries: Optional[Iterable[str]]) -> pd.DataFrame:
+    """Filas de una tecnología, opcionalmente restringidas a países."""
+    rows = history[history["tech"] == tech]
+    if countries is not None:
+        rows = rows[rows["country"].isin(list(countries))]
+    return rows
+
+
+def trend_series(history: pd.DataFrame, tech: str,
+                 countries: Optional[Iterable[str]] = None) -> pd.DataFrame:
+    """
+    Antenas de una tecnología por fecha, sumadas sobre los países.
+
+    Args:
+        history: Tabla de load_history()
+        tech: Columna de conteo (p. ej. 'nr' o 'total_cells')
+        countries: Países a incluir (None: todos)
+
+    Returns:
+        DataFrame con date y cells
+    """
+    rows = _tech_rows(history, tech, countries)
+    return rows.groupby("date", as_index=False)["cells"].sum()
+
+
+def growth_table(history: pd.DataFrame, tech: str, months: int,
+                 countries: Optional[Iterable[str]] = None) -> pd.DataFrame:
+    """
+    Crecimiento por país de una tecnología en los últimos ``months`` meses.
+
+    Las altas salen de la suma de las altas netas precalculadas por foto; la
+    tasa compara la última foto con la foto base de la ventana.
+
+    Args:
+        history: Tabla de load_history()
+        tech: Columna de conteo
+        months: Meses hacia atrás desde la última foto
+        countries: Países a incluir (None: todos)
+
+    Returns:
+        DataFrame con country, start, end, added y growth_pct (NaN si start es
+        0), ordenado por altas
+    """
+    rows = _tech_rows(history, tech, countries)
+    start_date, end_date = window_start(history, months), history["date"].max()
+
+    window = rows[(rows["date"] > start_date) & (rows["date"] <= end_date)]
+    table = pd.DataFrame({
+        "start": rows[rows["date"] == start_date].groupby("country")["cells"].sum(),
+        "end": rows[rows["date"] == end_date].groupby("country")["cells"].sum(),
+        "added": window.groupby("country")["added"].sum()
+    }).fillna(0).astype("int64")
+    start = table["start"].where(table["start"] > 0)
+    table["growth_pct"] = (table["end"] - table["start"]) / start * 100
+    return table.rename_axis("country").reset_index().sort_values("added", ascending=False)
+
+
+def main(argv: Optional[list] = None) -> None:
+    """Punto de entrada de línea de comandos."""
+    parser = argparse.ArgumentParser(description="Agrega una foto del dataset por país")
+    parser.add_argument("source", help="CSV por país (p. ej. data/expanded_telecom_data.csv)")
+    parser.add_argument("--date", default=None,
+                        help="Fecha de la foto (AAAA-MM-DD, por defecto hoy)")
+    parser.add_argument("--root", default=SNAPSHOT_DIR, help="Directorio de fotos")
+    parser.add_argument("--replace", action="store_true",
+                        help="Reemplazar la foto si ya existe una con esa fecha")
+    args = parser.parse_args(argv)
+
+    snapshot_date = append_snapshot(pd.read_csv(args.source), args.date, args.root, args.replace)
+    bump_data_version(kind="snapshot", date=snapshot_date.date().isoformat())
+    history = load_history(args.root)
+    print(f"✅ Foto del {snapshot_date.date()} agregada "
+          f"({history['date'].nunique()} fechas en {args.root})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,302 @@
+"""
+Agregación espacial jerárquica para el mapa
+
+Agrupa los puntos de celda en una grilla de teselas Web Mercator con varios
+niveles (pirámide). El nivel más fino se calcula desde los puntos; cada nivel
+superior se obtiene sumando 2x2 teselas del anterior. El mapa recibe sólo las
+teselas del nivel adecuado para el zoom y el área visible.
+"""
+
+from typing import Dict, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from . import TECH_COLUMNS
+from .ingest import MCC_COUNTRIES, RADIO_COLUMNS
+
+# Niveles de la pirámide (nivel = zoom de teselas Web Mercator)
+MIN_LEVEL = 2
+MAX_LEVEL = 14
+
+# Niveles por encima del zoom del mapa: 2**3 = 8 bins por tesela de 256 px
+LEVEL_OFFSET = 3
+
+# Máximo de bins enviados al navegador
+MAX_MAP_BINS = 4000
+
+# Latitud máxima representable en Web Mercator
+MAX_LATITUDE = 85.05112878
+
+# Límites del área visible: (lat_min, lon_min, lat_max, lon_max)
+Bounds = Tuple[float, float, float, float]
+
+
+def tile_coordinates(lat: np.ndarray, lon: np.ndarray, level: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Convierte coordenadas a índices de tesela (x, y) en un nivel.
+
+    Args:
+        lat: Latitudes en grados
+        lon: Longitudes en grados
+        level: Nivel de la grilla (2**level teselas por lado)
+
+    Returns:
+        Tupla (x, y) de arreglos int64
+    """
+    n = 2 ** level
+    lat_rad = np.radians(np.clip(np.asarray(lat, dtype=np.float64), -MAX_LATITUDE, MAX_LATITUDE))
+    x = (np.asarray(lon, dtype=np.float64) + 180.0) / 360.0 * n
+    y = (1.0 - np.arcsinh(np.tan(lat_rad)) / np.pi) / 2.0 * n
+    return (np.clip(x.astype(np.int64), 0, n - 1), np.clip(y.astype(np.int64), 0, n - 1))
+
+
+def tile_centers(x: np.ndarray, y: np.ndarray, level: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Centro geográfico de cada tesela.
+
+    Returns:
+        Tupla (lat, lon) en grados
+    """
+    n = 2 ** level
+    lon = (np.asarray(x) + 0.5) / n * 360.0 - 180.0
+    lat = np.degrees(np.arctan(np.sinh(np.pi * (1.0 - 2.0 * (np.asarray(y) + 0.5) / n))))
+    return lat, lon
+
+
+def viewport_bounds(center: Dict[str, float], zoom: float,
+                    width_px: int = 1200, height_px: int = 600) -> Bounds:
+    """
+    Aproxima el área visible de un mapa Mapbox de tamaño dado.
+
+    Args:
+        center: Centro {'lat', 'lon'}
+        zoom: Zoom del mapa
+        width_px: Ancho del mapa en píxeles
+        height_px: Alto del mapa en píxeles
+
+    Returns:
+        Límites (lat_min, lon_min, lat_max, lon_max)
+    """
+    world_px = 256 * 2 ** zoom
+    half_lon = width_px / world_px * 180.0
+    center_y = np.arcsinh(np.tan(np.radians(center["lat"])))
+    half_y = height_px / world_px * np.pi
+    lat_min = float(np.degrees(np.arctan(np.sinh(center_y - half_y))))
+    lat_max = float(np.degrees(np.arctan(np.sinh(center_y + half_y))))
+    return (lat_min, center["lon"] - half_lon, lat_max, center["lon"] + half_lon)
+
+
+def _finest_counts(cells: pd.DataFrame, level: int,
+                   weights: Optional[np.ndarray] = None) -> pd.DataFrame:
+    """
+    Conteos por (país, tesela) y tecnología en un nivel.
+
+    Args:
+        cells: Puntos con columnas 'radio', 'mcc', 'lat' y 'lon'
+        level: Nivel de la grilla
+        weights: Peso de cada punto (por defecto 1; -1 resta)
+
+    Returns:
+        DataFrame con country, x, y y una columna por tecnología
+    """
+    x, y = tile_coordinates(cells["lat"].to_numpy(), cells["lon"].to_numpy(), level)
+    weights = np.ones(len(cells), dtype=np.int64) if weights is None else weights
+    return _group_tiles(cells["mcc"], cells["radio"], x, y, weights)
+
+
+def _group_tiles(mcc: pd.Series, radio: pd.Series, x: np.ndarray, y: np.ndarray,
+                 weights: np.ndarray) -> pd.DataFrame:
+    """Suma los pesos por (país, tesela) con una columna por tecnología."""
+    points = pd.DataFrame({
+        "country": mcc.map(MCC_COUNTRIES).astype("category"),
+        "x": x,
+        "y": y,
+        "tech": radio.astype(str).map(RADIO_COLUMNS).astype("category"),
+        "weight": weights
+    })
+    finest = points.groupby(["country", "x", "y", "tech"], observed=True)["weight"].sum()
+    finest = finest.unstack("tech", fill_value=0).reindex(columns=TECH_COLUMNS, fill_value=0)
+    finest.columns.name = None
+    return finest.reset_index()
+
+
+def _tile_keys(frame: pd.DataFrame, level: int) -> np.ndarray:
+    """Clave entera única de cada tesela (x, y) de un nivel."""
+    return (frame["x"].to_numpy(np.int64) << level) | frame["y"].to_numpy(np.int64)
+
+
+def _parent_level(frame: pd.DataFrame) -> pd.DataFrame:
+    """Suma bloques de 2x2 teselas: conteos del nivel inmediatamente superior."""
+    parent = frame.assign(x=frame["x"] // 2, y=frame["y"] // 2)
+    return parent.groupby(["country", "x", "y"], observed=True, as_index=False)[TECH_COLUMNS].sum()
+
+
+class GridPyramid:
+    """Conteos por tecnología en una grilla jerárquica de teselas."""
+
+    def __init__(self, cells: pd.DataFrame, min_level: int = MIN_LEVEL,
+                 max_level: int = MAX_LEVEL):
+        """
+        Construye todos los niveles a partir de los puntos de celda.
+
+        Args:
+            cells: Puntos con columnas 'radio', 'mcc', 'lat' y 'lon'
+            min_level: Nivel más grueso
+            max_level: Nivel más fino
+        """
+        self.min_level = min_level
+        self.max_level = max_level
+        self.levels: Dict[int, pd.DataFrame] = {}
+
+        self.levels[max_level] = _finest_counts(cells, max_level)
+        self._build_parents()
+
+    @classmethod
+    def from_tile_counts(cls, counts: pd.DataFrame,
+                         min_level: int = MIN_LEVEL) -> "GridPyramid":
+        """
+        Pirámide a partir de conteos ya agrupados por tesela de MAX_LEVEL.
+
+        Args:
+            counts: Celdas por 'mcc', 'radio', 'x', 'y' en la columna 'cells'
+                (p. ej. data.sql.tile_counts())
+            min_level: Nivel más grueso
+
+        Returns:
+            GridPyramid igual a la construida desde los puntos
+        """
+        pyramid = cls.__new__(cls)
+        pyramid.min_level, pyramid.max_level = min_level, MAX_LEVEL
+        pyramid.levels = {MAX_LEVEL: _group_tiles(
+            counts["mcc"], counts["radio"], counts["x"].to_numpy(np.int64),
+            counts["y"].to_numpy(np.int64), counts["cells"].to_numpy(np.int64))}
+        pyramid._build_parents()
+        return pyramid
+
+    def _build_parents(self) -> None:
+        """Cada nivel superior suma bloques de 2x2 teselas del nivel anterior."""
+        for level in range(self.max_level - 1, self.min_level - 1, -1):
+            self.levels[level] = _parent_level(self.levels[level + 1])
+
+    def with_delta(self, changes: pd.DataFrame) -> "GridPyramid":
+        """
+        Pirámide nueva con un delta de celdas aplicado, sin recorrer los puntos.
+
+        En cada nivel sólo se reagrupan las teselas que toca el delta (con sus
+        conteos con signo) y se descartan las que quedan vacías; el resto de
+        las filas se reutiliza. La pirámide original no se modifica.
+
+        Args:
+            changes: Celdas con 'radio', 'mcc', 'lat', 'lon' y 'sign' (+1 alta,
+                -1 baja o versión anterior de una celda modificada)
+
+        Returns:
+            GridPyramid con los mismos niveles actualizados
+        """
+        pyramid = GridPyramid.__new__(GridPyramid)
+        pyramid.min_level, pyramid.max_level = self.min_level, self.max_level
+        pyramid.levels = dict(self.levels)
+        located = changes.dropna(subset=["lat", "lon"])
+        if located.empty:
+            return pyramid
+
+        delta = _finest_counts(located, self.max_level, located["sign"].to_numpy())
+        for level in range(self.max_level, self.min_level - 1, -1):
+            frame = self.levels[level]
+            touched = np.isin(_tile_keys(frame, level), _tile_keys(delta, level))
+            merged = pd.concat([frame[touched], delta], ignore_index=True).groupby(
+                ["country", "x", "y"], observed=True, as_index=False
+            )[TECH_COLUMNS].sum()
+            merged = merged[merged[TECH_COLUMNS].to_numpy().any(axis=1)]
+            pyramid.levels[level] = pd.concat([frame[~touched], merged], ignore_index=True)
+            delta = _parent_level(delta)
+        return pyramid
+
+    def level_for_zoom(self, zoom: float) -> int:
+        """Nivel de la pirámide adecuado para un zoom del mapa."""
+        return int(min(max(round(zoom) + LEVEL_OFFSET, self.min_level), self.max_level))
+
+    def _bins_at(self, level: int, bounds: Optional[Bounds],
+                 countries: Optional[Sequence[str]]) -> pd.DataFrame:
+        """Bins de un nivel filtrados por países y área visible."""
+        frame = self.levels[level]
+        if countries is not None:
+            frame = frame[frame["country"].isin(countries)]
+        if bounds is not None:
+            lat_min, lon_min, lat_max, lon_max = bounds
+            x_min, y_max = tile_coordinates(np.array([lat_min]), np.array([lon_min]), level)
+            x_max, y_min = tile_coordinates(np.array([lat_max]), np.array([lon_max]), level)
+            frame = frame[frame["x"].between(x_min[0], x_max[0])
+                          & frame["y"].between(y_min[0], y_max[0])]
+        # Las teselas de frontera suman los aportes de cada país
+        return frame.groupby(["x", "y"], as_index=False)[TECH_COLUMNS].sum()
+
+    def view_center(self, zoom: float, countries: Optional[Sequence[str]] = None,
+                    width_px: int = 1200,
+                    height_px: int = 600) -> Optional[Dict[str, float]]:
+        """
+        Centro del mapa para una selección, siempre sobre teselas con antenas.
+
+        Si la extensión de las teselas de la selección entra en el área
+        visible, se centra en ella; si no (zoom alto o países lejanos, cuyo
+        punto medio puede caer en el mar), en el bin con más antenas del nivel
+        del zoom.
+
+        Args:
+            zoom: Zoom del mapa
+            countries: Países seleccionados (None = todos)
+            width_px: Ancho del mapa en píxeles
+            height_px: Alto del mapa en píxeles
+
+        Returns:
+            Centro {'lat', 'lon'}, o None si la selección no tiene teselas
+        """
+        frame = self.levels[self.max_level]
+        if countries is not None:
+            frame = frame[frame["country"].isin(countries)]
+        if frame.empty:
+            return None
+        x, y = frame["x"].to_numpy(), frame["y"].to_numpy()
+        lat, lon = tile_centers(np.array([(x.min() + x.max()) / 2]),
+                                np.array([(y.min() + y.max()) / 2]), self.max_level)
+        center = {"lat": float(lat[0]), "lon": float(lon[0])}
+        lat_min, lon_min, lat_max, lon_max = viewport_bounds(center, zoom, width_px, height_px)
+        south, west = tile_centers(x.min(), y.max(), self.max_level)
+        north, east = tile_centers(x.max(), y.min(), self.max_level)
+        if lat_min <= south and north <= lat_max and lon_min <= west and east <= lon_max:
+            return center
+
+        level = self.level_for_zoom(zoom)
+        bins = self._bins_at(level, None, countries)
+        densest = bins.loc[bins[TECH_COLUMNS].sum(axis=1).idxmax()]
+        lat, lon = tile_centers(densest["x"], densest["y"], level)
+        return {"lat": float(lat), "lon": float(lon)}
+
+    def bins(self, zoom: float, bounds: Optional[Bounds] = None,
+             countries: Optional[Sequence[str]] = None,
+             max_bins: int = MAX_MAP_BINS) -> pd.DataFrame:
+        """
+        Bins agregados para el zoom y el área visible del mapa.
+
+        Si el nivel elegido supera max_bins se sube de nivel hasta cumplirlo.
+
+        Args:
+            zoom: Zoom actual del mapa
+            bounds: Área visible (None = todo)
+            countries: Países seleccionados (None = todos)
+            max_bins: Máximo de bins devueltos
+
+        Returns:
+            DataFrame con latitude, longitude, total_cells, conteos por tecnología y level
+        """
+        level = self.level_for_zoom(zoom)
+        frame = self._bins_at(level, bounds, countries)
+        while len(frame) > max_bins and level > self.min_level:
+            level -= 1
+            frame = self._bins_at(level, bounds, countries)
+
+        lat, lon = tile_centers(frame["x"].to_numpy(), frame["y"].to_numpy(), level)
+        frame = frame.assign(latitude=lat, longitude=lon, level=level)
+        frame["total_cells"] = frame[TECH_COLUMNS].sum(axis=1)
+        return frame
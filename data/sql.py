@@ -0,0 +1,524 @@
+"""
+Almacén SQL embebido (SQLite) para consultas con filtros y agregados en la base
+
+Una base SQLite en data/techcom.sqlite con las tablas countries (dataset por
+país), cells (puntos de celda, cargados por lotes desde el Parquet) y rollups
+(agregados por operador y área), con índices en las columnas de filtro. Los
+filtros, agregados y tops (``nlargest``, ``sort_values('nr')``) se resuelven
+con WHERE, GROUP BY, ORDER BY y LIMIT en la base: a pandas sólo llegan las
+filas del resultado, así que las celdas no tienen que caber en memoria.
+
+Con ``TECHCOM_DATA_BACKEND=sqlite``, data.load_expanded_data() lee el
+dataset por país desde la base, con el filtro de regiones en la consulta;
+data.load_cells_data() lee sólo las columnas pedidas de las celdas, y el
+motor (data.engine) resuelve en la base los filtros, agregados y tops.
+Cada celda guarda además su tesela del nivel más fino del mapa (tile_x,
+tile_y): la pirámide de bins (data.spatial) se arma con un GROUP BY por
+tesela, sin cargar los puntos. Las teselas de densidad, la cobertura y las
+consultas de celdas cercanas siguen cargando las columnas de CELL_POINT_COLUMNS
+(data.engine) en memoria.
+La ingesta del dataset expandido reconstruye la base si existe y los deltas
+la actualizan.
+
+Uso:
+    python -m data.sql build
+    python -m data.sql query "SELECT country, nr FROM countries ORDER BY nr DESC LIMIT 5"
+"""
+
+import argparse
+import functools
+import os
+import pathlib
+import re
+import sqlite3
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import pandas as pd
+
+from . import DATA_FILES, add_derived_columns, atomic_write, bump_data_version, get_data_path
+from .partitions import concat_partitions
+from .schema import apply_compact_schema
+
+# Base por defecto
+SQL_PATH = get_data_path(DATA_FILES["sql"])
+
+# Variable de entorno que elige el backend de los cargadores ('sqlite')
+BACKEND_ENV = "TECHCOM_DATA_BACKEND"
+
+# Índices por tabla (columnas de filtro y agrupación habituales)
+TABLE_INDEXES = {
+    "countries": [["region"], ["country"]],
+    "cells": [["mcc", "radio"], ["radio", "mcc", "net", "area", "cell"]],
+    "rollups": [["level", "country", "operator"]]
+}
+
+# Filas insertadas por lote al cargar las celdas
+CELL_BATCH_ROWS = 500_000
+
+# Tesela de cada celda en el nivel más fino de data.spatial (no se devuelven como datos)
+TILE_COLUMNS = ["tile_x", "tile_y"]
+
+# Operadores de comparación aceptados en las claves de filtro ("nr >")
+COMPARISONS = ("=", "!=", "<", "<=", ">", ">=")
+
+# Agregaciones aceptadas por aggregate_rows()
+AGGREGATES = ("sum", "count", "min", "max", "avg")
+
+# Identificadores válidos de columnas y tablas
+_IDENTIFIER = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*$")
+
+Filters = Dict[str, Any]
+
+
+def sql_backend_enabled() -> bool:
+    """Indica si los cargadores deben leer desde la base SQL."""
+    return os.environ.get(BACKEND_ENV, "").lower() == "sqlite"
+
+
+def configured_store(path: str = SQL_PATH) -> Optional[str]:
+    """Base a usar por los cargadores y el motor: ``path`` si el backend está activo y existe."""
+    return path if sql_backend_enabled() and os.path.exists(path) else None
+
+
+def store_of(csv_path: str) -> Optional[str]:
+    """
+    Base SQL que acompaña a un CSV por país, si existe.
+
+    Sólo el dataset expandido se copia a la base; para otros CSV se devuelve
+    None y la ingesta no la reconstruye.
+    """
+    expanded = get_data_path(DATA_FILES["expanded"])
+    if os.path.abspath(csv_path) != os.path.abspath(expanded) or not os.path.exists(SQL_PATH):
+        return None
+    return SQL_PATH
+
+
+def connect(path: str = SQL_PATH, readonly: bool = True) -> sqlite3.Connection:
+    """
+    Abre la base.
+
+    Args:
+        path: Archivo SQLite
+        readonly: Abrir en modo de sólo lectura (consultas ad hoc incluidas)
+
+    Raises:
+        FileNotFoundError: Si se pide sólo lectura y la base no existe
+    """
+    if readonly:
+        if not os.path.exists(path):
+            raise FileNotFoundError(f"No existe la base SQL: {path} (python -m data.sql build)")
+        # La ruta va como URI: espacios, '?' o '#' en el nombre se codifican
+        uri = pathlib.Path(path).resolve().as_uri() + "?mode=ro"
+        return sqlite3.connect(uri, uri=True, check_same_thread=False)
+    return sqlite3.connect(path)
+
+
+def _identifier(name: str) -> str:
+    """Valida un nombre de tabla o columna antes de interpolarlo en SQL."""
+    if not _IDENTIFIER.match(name):
+        raise ValueError(f"Identificador SQL inválido: {name!r}")
+    return f'"{name}"'
+
+
+def table_columns(connection: sqlite3.Connection, table: str) -> List[str]:
+    """Columnas de una tabla (vacío si no existe)."""
+    return [row[1] for row in connection.execute(f"PRAGMA table_info({_identifier(table)})")]
+
+
+@functools.lru_cache(maxsize=32)
+def _cached_columns(path: str, table: str, mtime_ns: int, size: int) -> Tuple[str, ...]:
+    """Columnas de una tabla para una firma (mtime, tamaño) del archivo."""
+    connection = connect(path)
+    try:
+        return tuple(table_columns(connection, table))
+    finally:
+        connection.close()
+
+
+def store_columns(table: str, path: str = SQL_PATH) -> List[str]:
+    """
+    Columnas de una tabla de la base, memorizadas mientras el archivo no cambie.
+
+    Evita un PRAGMA table_info por consulta; reconstruir o actualizar la base
+    cambia su mtime y tamaño.
+    """
+    stat = os.stat(path)
+    return list(_cached_columns(os.path.abspath(path), table, stat.st_mtime_ns, stat.st_size))
+
+
+def where_clause(filters: Optional[Filters], columns: Iterable[str]) -> Tuple[str, List[Any]]:
+    """
+    Cláusula WHERE parametrizada a partir de filtros simples.
+
+    Cada clave es una columna, opcionalmente seguida de un operador de
+    COMPARISONS ("nr >"); un valor lista, tupla o conjunto se traduce a IN y
+    None a IS NULL.
+
+    Args:
+        filters: Diccionario {columna [operador]: valor}
+        columns: Columnas válidas de la tabla
+
+    Returns:
+        Tupla (cláusula, que empieza con ' WHERE ' o es vacía, parámetros)
+    """
+    if not filters:
+        return "", []
+    valid = set(columns)
+    conditions, params = [], []
+    for key, value in filters.items():
+        column, _, operator = key.partition(" ")
+        operator = operator.strip() or "="
+        if column not in valid:
+            raise ValueError(f"Columna desconocida: {column}")
+        if operator not in COMPARISONS:
+            raise ValueError(f"Operador no soportado: {operator}")
+        if isinstance(value, (list, tuple, set, frozenset)):
+            values = list(value)
+            if not values:
+                conditions.append("0")
+                continue
+            negate = "NOT " if operator == "!=" else ""
+            conditions.append(f"{_identifier(column)} {negate}IN ({', '.join('?' * len(values))})")
+            params.extend(values)
+        elif value is None:
+            conditions.append(f"{_identifier(column)} IS {'NOT ' if operator == '!=' else ''}NULL")
+        else:
+            conditions.append(f"{_identifier(column)} {operator} ?")
+            params.append(value)
+    return " WHERE " + " AND ".join(conditions), params
+
+
+def run_query(sql: str, params: Iterable[Any] = (), path: str = SQL_PATH) -> pd.DataFrame:
+    """
+    Consulta ad hoc de sólo lectura.
+
+    Args:
+        sql: Sentencia SELECT (con parámetros '?')
+        params: Valores de los parámetros
+        path: Archivo SQLite
+
+    Returns:
+        DataFrame con el resultado
+    """
+    connection = connect(path)
+    try:
+        return pd.read_sql_query(sql, connection, params=list(params))
+    finally:
+        connection.close()
+
+
+def select_rows(table: str, columns: Optional[List[str]] = None,
+                where: Optional[Filters] = None, order_by: Optional[str] = None,
+                descending: bool = True, limit: Optional[int] = None, offset: int = 0,
+                path: str = SQL_PATH) -> pd.DataFrame:
+    """
+    Filas de una tabla con filtro, orden y límite resueltos en la base.
+
+    Args:
+        table: 'countries', 'cells' o 'rollups'
+        columns: Columnas a devolver (None: todas)
+        where: Filtros (ver where_clause())
+        order_by: Columna de orden
+        descending: Orden descendente
+        limit: Filas como máximo
+        offset: Filas a saltear (paginación)
+        path: Archivo SQLite
+
+    Returns:
+        DataFrame con el esquema compacto
+    """
+    valid = store_columns(table, path)
+    connection = connect(path)
+    try:
+        selected = ", ".join(_identifier(column) for column in columns) if columns else "*"
+        clause, params = where_clause(where, valid)
+        sql = f"SELECT {selected} FROM {_identifier(table)}{clause}"
+        if order_by is not None:
+            if order_by not in valid:
+                raise ValueError(f"Columna desconocida: {order_by}")
+            # Desempate por rowid: el orden de inserción, como el orden estable de pandas
+            sql += f" ORDER BY {_identifier(order_by)} {'DESC' if descending else 'ASC'}, rowid"
+        if limit is not None or offset:
+            sql += " LIMIT ? OFFSET ?"
+            params += [-1 if limit is None else int(limit), int(offset)]
+        return apply_compact_schema(pd.read_sql_query(sql, connection, params=params))
+    finally:
+        connection.close()
+
+
+def top_rows(table: str, column: str, n: int, columns: Optional[List[str]] = None,
+             where: Optional[Filters] = None, path: str = SQL_PATH) -> pd.DataFrame:
+    """Equivalente de ``nlargest(n, column)`` resuelto con ORDER BY ... LIMIT."""
+    return select_rows(table, columns, where, order_by=column, limit=n, path=path)
+
+
+def aggregate_rows(table: str, by: List[str], values: Dict[str, str],
+                   where: Optional[Filters] = None, order_by: Optional[str] = None,
+                   descending: bool = True, limit: Optional[int] = None,
+                   path: str = SQL_PATH) -> pd.DataFrame:
+    """
+    Agregados por grupo resueltos con GROUP BY.
+
+    Args:
+        table: Tabla de origen
+        by: Columnas de agrupación (vacío: un solo total)
+        values: {columna: agregación} con agregaciones de AGGREGATES; la
+            columna '*' con 'count' cuenta filas (resultado 'rows')
+        where: Filtros (ver where_clause())
+        order_by: Columna del resultado por la que ordenar
+        descending: Orden descendente
+        limit: Grupos como máximo
+        path: Archivo SQLite
+
+    Returns:
+        DataFrame con las columnas de ``by`` y una columna por valor
+    """
+    valid = store_columns(table, path)
+    connection = connect(path)
+    try:
+        outputs = [_identifier(column) for column in by]
+        for column, function in values.items():
+            if function not in AGGREGATES:
+                raise ValueError(f"Agregación no soportada: {function}")
+            if column == "*":
+                outputs.append('COUNT(*) AS "rows"')
+                continue
+            if column not in valid:
+                raise ValueError(f"Columna desconocida: {column}")
+            outputs.append(f"{function.upper()}({_identifier(column)}) AS {_identifier(column)}")
+        for column in by:
+            if column not in valid:
+                raise ValueError(f"Columna desconocida: {column}")
+        clause, params = where_clause(where, valid)
+        sql = f"SELECT {', '.join(outputs)} FROM {_identifier(table)}{clause}"
+        if by:
+            sql += " GROUP BY " + ", ".join(_identifier(column) for column in by)
+        if order_by is not None:
+            result_columns = set(by) | set(values) | {"rows"}
+            if order_by not in result_columns:
+                raise ValueError(f"Columna desconocida: {order_by}")
+            sql += f" ORDER BY {_identifier(order_by)} {'DESC' if descending else 'ASC'}"
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(int(limit))
+        return apply_compact_schema(pd.read_sql_query(sql, connection, params=params))
+    finally:
+        connection.close()
+
+
+def load_countries(regions: Optional[Iterable[str]] = None,
+                   path: str = SQL_PATH) -> Optional[pd.DataFrame]:
+    """
+    Dataset por país desde la base, con el filtro de regiones en la consulta.
+
+    Returns:
+        DataFrame con el esquema compacto, o None si no hay base
+    """
+    if not os.path.exists(path):
+        return None
+    regions = list(regions) if regions else None
+    return select_rows("countries", where={"region": regions} if regions else None, path=path)
+
+
+def load_cells(columns: Optional[List[str]] = None,
+               path: str = SQL_PATH) -> Optional[pd.DataFrame]:
+    """
+    Puntos de celda desde la base, sólo con las columnas pedidas.
+
+    Se leen por lotes de CELL_BATCH_ROWS con el esquema compacto aplicado a
+    cada lote, así que el texto de la base nunca está entero en memoria.
+
+    Args:
+        columns: Columnas a leer (None: todas; las que no existan se omiten)
+        path: Archivo SQLite
+
+    Returns:
+        DataFrame con una fila por celda, o None si la base no tiene celdas
+    """
+    valid = [column for column in store_columns("cells", path) if column not in TILE_COLUMNS]
+    if not valid:
+        return None
+    selected = [column for column in columns if column in valid] if columns else valid
+    connection = connect(path)
+    try:
+        sql = f"SELECT {', '.join(_identifier(column) for column in selected)} FROM \"cells\""
+        chunks = [apply_compact_schema(chunk) for chunk in
+                  pd.read_sql_query(sql, connection, chunksize=CELL_BATCH_ROWS)]
+        return concat_partitions(chunks) if chunks else pd.DataFrame(columns=selected)
+    finally:
+        connection.close()
+
+
+def tile_counts(path: str = SQL_PATH) -> Optional[pd.DataFrame]:
+    """
+    Celdas por (MCC, radio, tesela) del nivel más fino, con GROUP BY en la base.
+
+    Returns:
+        DataFrame con mcc, radio, x, y y cells, o None si la base no guarda
+        las teselas (construida antes de TILE_COLUMNS) o no tiene celdas
+    """
+    if not set(TILE_COLUMNS) <= set(store_columns("cells", path)):
+        return None
+    counts = run_query('SELECT "mcc", "radio", "tile_x" AS "x", "tile_y" AS "y", '
+                       'COUNT(*) AS "cells" FROM "cells" WHERE "lat" IS NOT NULL '
+                       'GROUP BY "mcc", "radio", "tile_x", "tile_y"', path=path)
+    return apply_compact_schema(counts)
+
+
+def _with_tiles(cells: pd.DataFrame) -> pd.DataFrame:
+    """Agrega a unas celdas su tesela del nivel más fino de la pirámide."""
+    from .spatial import MAX_LEVEL, tile_coordinates  # pylint: disable=import-outside-toplevel
+
+    x, y = tile_coordinates(cells["lat"].to_numpy(), cells["lon"].to_numpy(), MAX_LEVEL)
+    return cells.assign(tile_x=x, tile_y=y)
+
+
+def _create_indexes(connection: sqlite3.Connection, table: str) -> None:
+    """Crea los índices de TABLE_INDEXES de una tabla."""
+    for columns in TABLE_INDEXES.get(table, []):
+        name = _identifier(f"idx_{table}_{'_'.join(columns)}")
+        connection.execute(f"CREATE INDEX IF NOT EXISTS {name} ON {_identifier(table)} "
+                           f"({', '.join(_identifier(column) for column in columns)})")
+
+
+def _write_table(connection: sqlite3.Connection, table: str, dataframe: pd.DataFrame) -> None:
+    """Reemplaza una tabla con un DataFrame (categóricas como texto)."""
+    dataframe = dataframe.astype({column: str for column in dataframe.columns
+                                  if isinstance(dataframe[column].dtype, pd.CategoricalDtype)})
+    dataframe.to_sql(table, connection, if_exists="replace", index=False)
+    _create_indexes(connection, table)
+
+
+def _load_cells(connection: sqlite3.Connection, cells_path: str) -> int:
+    """Carga el almacén de puntos por lotes, sin leerlo entero en memoria."""
+    from .cellstore import iter_cells  # pylint: disable=import-outside-toplevel
+
+    rows = 0
+    connection.execute('DROP TABLE IF EXISTS "cells"')
+    for chunk in iter_cells(cells_path, batch_size=CELL_BATCH_ROWS):
+        _with_tiles(chunk.astype({"radio": str})).to_sql("cells", connection,
+                                                          if_exists="append", index=False)
+        rows += len(chunk)
+    _create_indexes(connection, "cells")
+    return rows
+
+
+def build_store(path: str = SQL_PATH, countries_path: Optional[str] = None,
+                cells_path: Optional[str] = None,
+                rollups_path: Optional[str] = None) -> Dict[str, int]:
+    """
+    Construye la base desde los archivos de datos (escritura atómica).
+
+    Args:
+        path: Archivo SQLite de salida
+        countries_path: CSV por país (por defecto el dataset expandido)
+        cells_path: Parquet de puntos de celda (se omite si no existe)
+        rollups_path: Parquet de agregados por operador (se omite si no existe)
+
+    Returns:
+        Filas cargadas por tabla
+    """
+    from .cache import read_csv_cached  # pylint: disable=import-outside-toplevel
+
+    countries_path = countries_path or get_data_path(DATA_FILES["expanded"])
+    cells_path = cells_path or get_data_path(DATA_FILES["cells"])
+    rollups_path = rollups_path or get_data_path(DATA_FILES["rollups"])
+    loaded: Dict[str, int] = {}
+
+    def write(tmp_path: str) -> None:
+        connection = connect(tmp_path, readonly=False)
+        try:
+            countries = add_derived_columns(read_csv_cached(countries_path))
+            _write_table(connection, "countries", countries)
+            loaded["countries"] = len(countries)
+            if os.path.exists(cells_path):
+                loaded["cells"] = _load_cells(connection, cells_path)
+            if os.path.exists(rollups_path):
+                rollups = pd.read_parquet(rollups_path)
+                _write_table(connection, "rollups", rollups)
+                loaded["rollups"] = len(rollups)
+            connection.execute("ANALYZE")
+            connection.commit()
+        finally:
+            connection.close()
+
+    atomic_write(path, write)
+    return loaded
+
+
+def sync_store(countries: Optional[pd.DataFrame] = None,
+               changes: Optional[pd.DataFrame] = None,
+               path: str = SQL_PATH) -> bool:
+    """
+    Actualiza una base existente tras un delta.
+
+    Reemplaza el dataset por país, aplica las celdas con signo (borra las
+    versiones anteriores e inserta las nuevas) y vuelve a copiar los
+    agregados por operador si hay archivo.
+
+    Args:
+        countries: Dataset por país actualizado (None: sin cambios)
+        changes: Celdas con signo de data.delta.resolve_changes()
+        path: Archivo SQLite
+
+    Returns:
+        True si había base para actualizar
+    """
+    if not os.path.exists(path):
+        return False
+    rollups_path = get_data_path(DATA_FILES["rollups"])
+    connection = connect(path, readonly=False)
+    try:
+        with connection:
+            if countries is not None:
+                _write_table(connection, "countries", add_derived_columns(countries))
+            cell_columns = table_columns(connection, "cells")
+            if changes is not None and len(changes) and cell_columns:
+                _apply_cell_changes(connection, changes, cell_columns)
+            if os.path.exists(rollups_path):
+                _write_table(connection, "rollups", pd.read_parquet(rollups_path))
+    finally:
+        connection.close()
+    return True
+
+
+def _apply_cell_changes(connection: sqlite3.Connection, changes: pd.DataFrame,
+                        cell_columns: List[str]) -> None:
+    """Borra las celdas con signo -1 (por clave) e inserta las de signo +1."""
+    keys = ["radio", "mcc", "net", "area", "cell"]
+    changes = changes.astype({"radio": str})
+    removed = changes.loc[changes["sign"] < 0, keys].drop_duplicates()
+    connection.executemany(
+        'DELETE FROM "cells" WHERE ' + " AND ".join(f"{_identifier(key)} = ?" for key in keys),
+        removed.astype(object).itertuples(index=False, name=None))
+    added = changes[changes["sign"] > 0]
+    if set(TILE_COLUMNS) <= set(cell_columns):
+        added = _with_tiles(added)
+    added = added[[column for column in cell_columns if column in added.columns]]
+    added.to_sql("cells", connection, if_exists="append", index=False)
+
+
+def main(argv: Optional[list] = None) -> None:
+    """Punto de entrada de línea de comandos."""
+    parser = argparse.ArgumentParser(description="Base SQL embebida del dashboard")
+    parser.add_argument("--path", default=SQL_PATH, help="Archivo SQLite")
+    commands = parser.add_subparsers(dest="command", required=True)
+    build = commands.add_parser("build", help="Construye la base desde los archivos de datos")
+    build.add_argument("--countries", default=None, help="CSV por país")
+    build.add_argument("--cells", default=None, help="Parquet de puntos de celda")
+    ad_hoc = commands.add_parser("query", help="Ejecuta una consulta de sólo lectura")
+    ad_hoc.add_argument("sql", help="Sentencia SELECT")
+    args = parser.parse_args(argv)
+
+    if args.command == "build":
+        loaded = build_store(args.path, args.countries, args.cells)
+        bump_data_version(kind="sql", **loaded)
+        print("✅ " + ", ".join(f"{table}: {rows} filas" for table, rows in loaded.items())
+              + f" en {args.path}")
+    else:
+        with pd.option_context("display.max_rows", 100, "display.width", 160):
+            print(run_query(args.sql, path=args.path))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,248 @@
+"""
+TechComView SA - Instrumentación del camino caliente
+
+Registro en memoria de tiempos por etapa (carga, filtrado, métricas, cada
+figura, tabla), tamaños de payload enviados al navegador y tasas de acierto
+de las cachés. Sin dependencias de Streamlit ni pandas.
+
+Desactivado, cada punto de medición cuesta una lectura de atributo: los
+temporizadores devuelven un contexto nulo compartido y las observaciones
+retornan de inmediato. Se activa con la variable de entorno TECHCOM_METRICS=1
+o desde el panel de administración del sidebar.
+
+El volcado en formato de texto de Prometheus se escribe, si está definida,
+en la ruta de TECHCOM_METRICS_PATH (compatible con el textfile collector de
+node_exporter).
+"""
+
+import contextlib
+import functools
+import os
+import threading
+import time
+from collections import deque
+from typing import Callable, Deque, Dict, Iterator, List, Optional
+
+# Variables de entorno de configuración
+METRICS_ENV = "TECHCOM_METRICS"
+METRICS_PATH_ENV = "TECHCOM_METRICS_PATH"
+
+# Muestras recientes por etapa usadas para los percentiles
+SAMPLE_WINDOW = 512
+
+# Percentiles reportados
+QUANTILES = (0.5, 0.95, 0.99)
+
+# Intervalo mínimo entre escrituras del volcado a disco
+DUMP_INTERVAL_S = 10.0
+
+# Prefijo de las métricas exportadas
+METRIC_PREFIX = "techcom"
+
+# Contexto nulo reutilizable: medir con el registro desactivado no asigna nada
+_NULL_TIMER = contextlib.nullcontext()
+
+# Fuente de estadísticas de caché: {nombre: {"hits": int, "misses": int}}
+CacheStatsGetter = Callable[[], Dict[str, Dict[str, int]]]
+
+
+class _Series:
+    """Conteo, suma, máximo y ventana de muestras recientes de una serie."""
+
+    __slots__ = ("count", "total", "maximum", "last", "samples")
+
+    def __init__(self) -> None:
+        self.count = 0
+        self.total = 0.0
+        self.maximum = 0.0
+        self.last = 0.0
+        self.samples: Deque[float] = deque(maxlen=SAMPLE_WINDOW)
+
+    def add(self, value: float) -> None:
+        self.count += 1
+        self.total += value
+        self.maximum = max(self.maximum, value)
+        self.last = value
+        self.samples.append(value)
+
+    def quantile(self, q: float) -> float:
+        """Percentil sobre la ventana (vecino más cercano)."""
+        ordered = sorted(self.samples)
+        if not ordered:
+            return 0.0
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+class MetricsRegistry:
+    """Registro de métricas del proceso, compartido por todas las sesiones."""
+
+    def __init__(self, enabled: bool = False):
+        """
+        Args:
+            enabled: Registrar desde el inicio
+        """
+        self.enabled = enabled
+        self._timings: Dict[str, _Series] = {}
+        self._sizes: Dict[str, _Series] = {}
+        self._caches: Dict[str, CacheStatsGetter] = {}
+        self._lock = threading.Lock()
+        self._last_dump = 0.0
+
+    # ---------- Registro ----------
+
+    def observe(self, stage: str, seconds: float) -> None:
+        """Registra la duración de una etapa."""
+        if not self.enabled:
+            return
+        with self._lock:
+            self._timings.setdefault(stage, _Series()).add(seconds)
+
+    def observe_size(self, payload: str, size: int) -> None:
+        """Registra el tamaño en bytes de un payload enviado al navegador."""
+        if not self.enabled:
+            return
+        with self._lock:
+            self._sizes.setdefault(payload, _Series()).add(float(size))
+
+    def timer(self, stage: str):
+        """Contexto que mide una etapa; nulo si el registro está desactivado."""
+        if not self.enabled:
+            return _NULL_TIMER
+        return self._timed(stage)
+
+    @contextlib.contextmanager
+    def _timed(self, stage: str) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(stage, time.perf_counter() - start)
+
+    def timed(self, stage: str) -> Callable[[Callable], Callable]:
+        """Decorador que mide cada llamada a la función como una etapa."""
+        def decorator(func: Callable) -> Callable:
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return func(*args, **kwargs)
+                start = time.perf_counter()
+                try:
+                    return func(*args, **kwargs)
+                finally:
+                    self.observe(stage, time.perf_counter() - start)
+            return wrapper
+        return decorator
+
+    def register_cache(self, name: str, getter: CacheStatsGetter) -> None:
+        """Registra (o reemplaza) una fuente de aciertos/fallos de caché."""
+        with self._lock:
+            self._caches[name] = getter
+
+    def reset(self) -> None:
+        """Descarta tiempos y tamaños registrados (las fuentes de caché se mantienen)."""
+        with self._lock:
+            self._timings.clear()
+            self._sizes.clear()
+
+    # ---------- Lectura ----------
+
+    def stage_rows(self) -> List[Dict[str, object]]:
+        """Resumen por etapa en milisegundos, de mayor a menor tiempo total."""
+        with self._lock:
+            rows = [{
+                "stage": stage,
+                "count": item.count,
+                "total_ms": item.total * 1000,
+                "mean_ms": item.total / item.count * 1000,
+                "p50_ms": item.quantile(0.5) * 1000,
+                "p95_ms": item.quantile(0.95) * 1000,
+                "max_ms": item.maximum * 1000
+            } for stage, item in self._timings.items()]
+        return sorted(rows, key=lambda row: row["total_ms"], reverse=True)
+
+    def size_rows(self) -> List[Dict[str, object]]:
+        """Tamaño de los payloads por nombre (último, medio y máximo en KB)."""
+        with self._lock:
+            rows = [{
+                "payload": payload,
+                "count": item.count,
+                "last_kb": item.last / 1024,
+                "mean_kb": item.total / item.count / 1024,
+                "max_kb": item.maximum / 1024
+            } for payload, item in self._sizes.items()]
+        return sorted(rows, key=lambda row: row["max_kb"], reverse=True)
+
+    def cache_rows(self) -> List[Dict[str, object]]:
+        """Aciertos, fallos y tasa de acierto por caché y entrada."""
+        with self._lock:
+            getters = list(self._caches.items())
+        rows = []
+        for cache, getter in getters:
+            for name, stats in sorted(getter().items()):
+                hits, misses = stats.get("hits", 0), stats.get("misses", 0)
+                rows.append({
+                    "cache": cache,
+                    "name": name,
+                    "hits": hits,
+                    "misses": misses,
+                    "hit_rate": hits / (hits + misses) if hits + misses else 0.0
+                })
+        return rows
+
+    # ---------- Exportación ----------
+
+    def to_prometheus(self) -> str:
+        """Volcado en formato de texto de Prometheus."""
+        prefix = METRIC_PREFIX
+        lines = [f"# HELP {prefix}_stage_seconds Duración de las etapas del dashboard",
+                 f"# TYPE {prefix}_stage_seconds summary"]
+        with self._lock:
+            for stage, item in sorted(self._timings.items()):
+                for q in QUANTILES:
+                    lines.append(f'{prefix}_stage_seconds{{stage="{stage}",quantile="{q}"}} '
+                                 f'{item.quantile(q):.6f}')
+                lines.append(f'{prefix}_stage_seconds_sum{{stage="{stage}"}} {item.total:.6f}')
+                lines.append(f'{prefix}_stage_seconds_count{{stage="{stage}"}} {item.count}')
+
+            lines += [f"# HELP {prefix}_payload_bytes "
+                      "Tamaño de los payloads enviados al navegador",
+                      f"# TYPE {prefix}_payload_bytes summary"]
+            for payload, item in sorted(self._sizes.items()):
+                lines.append(f'{prefix}_payload_bytes_sum{{payload="{payload}"}} {item.total:.0f}')
+                lines.append(f'{prefix}_payload_bytes_count{{payload="{payload}"}} {item.count}')
+
+        cache_rows = self.cache_rows()
+        for kind in ("hits", "misses"):
+            lines += [f"# HELP {prefix}_cache_{kind}_total Consultas de caché ({kind})",
+                      f"# TYPE {prefix}_cache_{kind}_total counter"]
+            lines += [f'{prefix}_cache_{kind}_total{{cache="{row["cache"]}",name="{row["name"]}"}} '
+                      f'{row[kind]}' for row in cache_rows]
+        return "\n".join(lines) + "\n"
+
+    def dump(self, path: Optional[str] = None, force: bool = False) -> Optional[str]:
+        """
+        Escribe el volcado de Prometheus a disco de forma atómica.
+
+        Args:
+            path: Ruta destino (por defecto TECHCOM_METRICS_PATH)
+            force: Ignorar el intervalo mínimo entre escrituras
+
+        Returns:
+            Ruta escrita, o None si no hay ruta, el registro está desactivado
+            o la última escritura es reciente
+        """
+        path = path or os.environ.get(METRICS_PATH_ENV)
+        now = time.monotonic()
+        if not path or not self.enabled or (not force and now - self._last_dump < DUMP_INTERVAL_S):
+            return None
+        self._last_dump = now
+
+        temporary = f"{path}.{os.getpid()}.tmp"
+        with open(temporary, "w", encoding="utf-8") as handle:
+            handle.write(self.to_prometheus())
+        os.replace(temporary, path)
+        return path
+
+
+# Registro del proceso, compartido por todas las sesiones
+REGISTRY = MetricsRegistry(enabled=os.environ.get(METRICS_ENV, "") not in ("", "0"))
@@ -0,0 +1,63 @@
+"""
+Configuración común de las pruebas
+
+Los archivos de datos (CSV, Parquet, diario de deltas, fotos, base SQL) y la
+caché columnar se redirigen a un directorio temporal antes de importar el
+paquete data, así que las pruebas nunca tocan data/ del repositorio.
+"""
+
+import os
+import shutil
+import tempfile
+from typing import Dict, List
+
+import pandas as pd
+import pytest
+
+DATA_DIR = tempfile.mkdtemp(prefix="techcom-data-")
+os.environ["TECHCOM_DATA_DIR"] = DATA_DIR
+os.environ["TECHCOM_CACHE_DIR"] = os.path.join(DATA_DIR, ".cache")
+
+# Columnas del volcado de OpenCelliD (mismo orden que data.ingest.OPENCELLID_COLUMNS)
+DUMP_COLUMNS = [
+    "radio", "mcc", "net", "area", "cell", "unit", "lon", "lat", "range",
+    "samples", "changeable", "created", "updated", "averageSignal"
+]
+
+# Países de referencia de las pruebas (MCC 722, 724 y 730)
+REFERENCE = pd.DataFrame({
+    "country": ["Argentina", "Brasil", "Chile"],
+    "total_cells": [0, 0, 0], "gsm": [0, 0, 0], "umts": [0, 0, 0], "lte": [0, 0, 0],
+    "nr": [0, 0, 0],
+    "population_millions": [45.4, 215.3, 19.1],
+    "latitude": [-34.6, -14.2, -35.7],
+    "longitude": [-58.4, -51.9, -71.5],
+    "region": ["South America", "South America", "South America"]
+})
+
+
+@pytest.fixture
+def data_dir() -> str:
+    """Directorio de datos vacío para cada prueba."""
+    for name in os.listdir(DATA_DIR):
+        path = os.path.join(DATA_DIR, name)
+        if os.path.isdir(path):
+            shutil.rmtree(path)
+        else:
+            os.unlink(path)
+    return DATA_DIR
+
+
+def cell(radio: str, mcc: int, net: int, area: int, cell_id: int,
+         lat: float = -34.6, lon: float = -58.4, updated: int = 1_700_000_000,
+         created: int = 1_600_000_000) -> Dict[str, object]:
+    """Fila del volcado con valores por defecto para lo que no importa."""
+    return {"radio": radio, "mcc": mcc, "net": net, "area": area, "cell": cell_id,
+            "unit": 0, "lon": lon, "lat": lat, "range": 1000, "samples": 1,
+            "changeable": 1, "created": created, "updated": updated, "averageSignal": 0}
+
+
+def write_dump(path: str, rows: List[Dict[str, object]]) -> str:
+    """Escribe un volcado (o diff) de OpenCelliD con cabecera."""
+    pd.DataFrame(rows, columns=DUMP_COLUMNS).to_csv(path, index=False)
+    return path
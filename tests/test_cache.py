@@ -0,0 +1,44 @@
+"""Pruebas de la caché columnar (data.cache)."""
+
+import os
+
+import pandas as pd
+
+from data import cache
+
+
+def _write_csv(path, nr):
+    pd.DataFrame({"country": ["Argentina", "Chile"], "region": ["South America"] * 2,
+                  "total_cells": [10, 20], "nr": nr}).to_csv(path, index=False)
+
+
+def test_second_read_uses_parquet(data_dir, monkeypatch):
+    source = os.path.join(data_dir, "countries.csv")
+    _write_csv(source, [1, 2])
+
+    first = cache.read_csv_cached(source)
+    parquet_path, meta_path = cache._cache_paths(source)
+    assert os.path.exists(parquet_path) and os.path.exists(meta_path)
+
+    # Con la caché vigente el CSV no se vuelve a parsear
+    def fail(*args, **kwargs):
+        raise AssertionError("se releyó el CSV")
+
+    monkeypatch.setattr(cache.pd, "read_csv", fail)
+    second = cache.read_csv_cached(source)
+    pd.testing.assert_frame_equal(first, second)
+    assert isinstance(second["country"].dtype, pd.CategoricalDtype)
+
+
+def test_changed_source_invalidates_cache(data_dir):
+    source = os.path.join(data_dir, "countries.csv")
+    _write_csv(source, [1, 2])
+    assert cache.read_csv_cached(source)["nr"].tolist() == [1, 2]
+
+    _write_csv(source, [100, 2000])
+    os.utime(source, ns=(os.stat(source).st_atime_ns, os.stat(source).st_mtime_ns + 10**9))
+
+    assert cache.read_csv_cached(source)["nr"].tolist() == [100, 2000]
+    metadata = cache.get_cached_metadata(source)
+    assert metadata["rows"] == 2
+    assert metadata["source_size"] == os.path.getsize(source)
@@ -0,0 +1,76 @@
+"""Pruebas del almacén de puntos con partes de cambios (data.cellstore)."""
+
+import os
+import shutil
+
+import pandas as pd
+
+from data.cellstore import (compact, iter_cells, list_parts, previous_versions, read_cells,
+                            write_part)
+from data.ingest import CELL_COLUMNS, CellPointWriter
+
+BASE = pd.DataFrame({
+    "radio": ["GSM", "LTE", "LTE", "NR"], "mcc": [722, 722, 730, 730], "net": [1, 1, 1, 2],
+    "area": [10, 10, 30, 30], "cell": [1, 2, 3, 3], "lon": [-58.4, -58.5, -70.6, -70.7],
+    "lat": [-34.6, -34.7, -33.4, -33.5], "range": [1000.0, 500.0, 2000.0, 800.0]
+})
+
+
+def _signed(rows, sign):
+    return rows.assign(sign=sign)
+
+
+def _store(data_dir):
+    path = os.path.join(data_dir, "cells.parquet")
+    writer = CellPointWriter(path)
+    writer.write(BASE)
+    writer.close()
+    # v1: celda 2 reubicada y celda 9 nueva; v2: la 9 se da de baja y la 1 se reubica
+    moved = BASE.iloc[[1]].assign(lat=-31.4)
+    new = BASE.iloc[[0]].assign(radio="LTE", cell=9)
+    write_part(path, 1, pd.concat([_signed(BASE.iloc[[1]], -1), _signed(moved, 1),
+                                   _signed(new, 1)]))
+    write_part(path, 2, pd.concat([_signed(new, -1), _signed(BASE.iloc[[0]], -1),
+                                   _signed(BASE.iloc[[0]].assign(lat=-30.0), 1)]))
+    return path
+
+
+def _expected():
+    expected = BASE.copy()
+    expected.loc[0, "lat"], expected.loc[1, "lat"] = -30.0, -31.4
+    return expected
+
+
+def _sorted(frame):
+    return frame[CELL_COLUMNS].sort_values(["cell", "mcc"], ignore_index=True)
+
+
+def test_reads_apply_the_parts_in_order(data_dir):
+    path = _store(data_dir)
+
+    pd.testing.assert_frame_equal(_sorted(read_cells(path)), _sorted(_expected()),
+                                  check_dtype=False)
+    batches = pd.concat(iter_cells(path, ["cell", "lat"], batch_size=2), ignore_index=True)
+    assert list(batches.columns) == ["cell", "lat"]
+    assert sorted(zip(batches["cell"], batches["lat"])) == sorted(
+        zip(_expected()["cell"], _expected()["lat"]))
+    # Sólo las claves pedidas, con su versión vigente
+    keys = pd.DataFrame({"radio": ["GSM", "LTE"], "mcc": [722, 722], "net": [1, 1],
+                         "area": [10, 10], "cell": [1, 9]})
+    assert previous_versions(path, keys)["lat"].tolist() == [-30.0]
+
+
+def test_compact_rewrites_the_base_once(data_dir):
+    path = _store(data_dir)
+    parts = os.path.join(data_dir, "parts-copy")
+    shutil.copytree(os.path.dirname(list_parts(path)[0]), parts)
+
+    assert compact(path) == len(BASE)
+    assert not list_parts(path)
+    pd.testing.assert_frame_equal(_sorted(pd.read_parquet(path)), _sorted(_expected()),
+                                  check_dtype=False)
+
+    # Un corte antes de borrar las partes: aplicarlas otra vez no cambia nada
+    shutil.copytree(parts, os.path.join(data_dir, "cells-parts"))
+    pd.testing.assert_frame_equal(_sorted(read_cells(path)), _sorted(_expected()),
+                                  check_dtype=False)
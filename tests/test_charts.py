@@ -0,0 +1,53 @@
+"""Pruebas de la caché de figuras serializadas (charts.FigureCache)."""
+
+import plotly.graph_objects as go
+
+from charts import FigureCache, cached_figure
+
+
+def test_evicts_least_recently_used_within_budget():
+    cache = FigureCache(max_bytes=30)
+    cache.put("a", "x" * 10)
+    cache.put("b", "y" * 10)
+    cache.put("c", "z" * 10)
+    assert cache.get("a") == "x" * 10  # 'a' pasa a ser la más reciente
+
+    cache.put("d", "w" * 10)
+
+    assert cache.get("b") is None
+    assert [cache.get(key) is not None for key in ("a", "c", "d")] == [True, True, True]
+    assert cache.bytes == 30 and len(cache) == 3
+    assert cache.stats["evictions"] == 1
+
+
+def test_replacing_a_key_updates_the_budget():
+    cache = FigureCache(max_bytes=30)
+    cache.put("a", "x" * 20)
+    cache.put("a", "x" * 5)
+    cache.put("b", "y" * 25)
+
+    assert cache.bytes == 30 and cache.stats["evictions"] == 0
+
+
+def test_oversized_figure_is_not_cached():
+    cache = FigureCache(max_bytes=10)
+    cache.put("a", "x" * 5)
+    cache.put("big", "y" * 11)
+
+    assert cache.get("big") is None and cache.get("a") == "x" * 5
+
+
+def test_cached_figure_builds_once():
+    cache = FigureCache()
+    builds = []
+
+    def builder():
+        builds.append(1)
+        return go.Figure(go.Bar(x=["a"], y=[1]))
+
+    first = cached_figure("top", ("v1",), builder, cache=cache)
+    second = cached_figure("top", ("v1",), builder, cache=cache)
+
+    assert len(builds) == 1
+    assert first.to_plotly_json()["data"] == second.to_plotly_json()["data"]
+    assert cache.stats["hits"] == 1
@@ -0,0 +1,45 @@
+"""Pruebas del cálculo de cobertura (data.coverage) contra discos de área conocida."""
+
+import numpy as np
+import pandas as pd
+
+from data.coverage import COUNTRY_BOUNDS, compute_coverage, country_coverage
+
+DISC_KM2 = np.pi * 10.0 ** 2
+
+
+def _disc(lat, lon, bounds=None):
+    """Área cubierta por una sola celda LTE de 10 km de radio."""
+    return country_coverage(np.array([lat]), np.array([lon]), np.array([10.0]),
+                            np.array(["lte"]), bounds=bounds)
+
+
+def test_single_disc_has_its_area():
+    areas = _disc(-34.6, -58.4)
+
+    assert abs(areas["total"] - DISC_KM2) / DISC_KM2 < 0.05
+    assert areas["lte"] == areas["total"] and areas["gsm"] == 0
+
+
+def test_disc_is_clipped_to_the_country_bounds():
+    # Celda sobre el borde oeste del rectángulo: sólo cuenta la mitad del disco
+    bounds = (-36.0, -58.4, -33.0, -55.0)
+    clipped = _disc(-34.6, -58.4, bounds)["total"]
+    assert abs(clipped - DISC_KM2 / 2) / DISC_KM2 < 0.05
+    # Celda fuera del rectángulo: no suma nada
+    assert _disc(-34.6, -60.0, bounds)["total"] == 0
+
+
+def test_share_is_capped_and_flagged():
+    cells = pd.DataFrame({
+        "radio": ["LTE", "LTE"], "mcc": [342, 722], "range": [20000, 10000],
+        "lat": [13.19, -34.6], "lon": [-59.54, -58.4]
+    })
+    assert COUNTRY_BOUNDS["Barbados"][0] < 13.19 < COUNTRY_BOUNDS["Barbados"][2]
+
+    coverage = compute_coverage(cells).set_index("country")
+
+    assert coverage.loc["Barbados", "coverage_pct"] == 100.0
+    assert coverage.loc["Barbados", "coverage_capped"]
+    assert not coverage.loc["Argentina", "coverage_capped"]
+    assert coverage.loc["Argentina", "coverage_pct"] < 1.0
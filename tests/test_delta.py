@@ -0,0 +1,72 @@
+"""Pruebas de la actualización incremental (data.delta)."""
+
+import os
+
+import pandas as pd
+
+from conftest import REFERENCE, cell, write_dump
+from data import get_data_version
+from data.cellstore import list_parts, read_cells
+from data.delta import apply_delta, read_journal
+from data.ingest import ingest_opencellid
+
+BASE = [
+    cell("GSM", 722, 1, 10, 1), cell("LTE", 722, 1, 10, 2), cell("LTE", 722, 7, 11, 3),
+    cell("NR", 724, 5, 20, 4), cell("UMTS", 724, 5, 20, 5), cell("UMTS", 730, 1, 30, 6)
+]
+
+# Celda 2 reubicada (mismo conteo), celda 9 nueva en Chile y celda 5 dada de baja
+DIFF = [cell("LTE", 722, 1, 10, 2, lat=-31.4, updated=1_800_000_000),
+        cell("NR", 730, 1, 31, 9, updated=1_800_000_000, created=1_800_000_000)]
+REMOVED = [{"radio": "UMTS", "mcc": 724, "net": 5, "area": 20, "cell": 5}]
+
+
+def _ingest(data_dir, rows, name):
+    """Ingesta completa de ``rows``; devuelve el dataset por país indexado."""
+    source = write_dump(os.path.join(data_dir, f"{name}.csv"), rows)
+    output = os.path.join(data_dir, f"{name}-expanded.csv")
+    ingest_opencellid(source, output, reference=REFERENCE,
+                      cells_output=os.path.join(data_dir, f"{name}-cells.parquet"),
+                      snapshot=False)
+    return output
+
+
+def test_delta_matches_full_reingest(data_dir):
+    aggregates = _ingest(data_dir, BASE, "base")
+    cells_path = os.path.join(data_dir, "base-cells.parquet")
+    diff = write_dump(os.path.join(data_dir, "diff.csv"), DIFF)
+    removed = os.path.join(data_dir, "removed.csv")
+    pd.DataFrame(REMOVED).to_csv(removed, index=False)
+    version = get_data_version()
+
+    summary = apply_delta(diff, removed, aggregates_path=aggregates, cells_path=cells_path)
+
+    final = [row for row in BASE if row["cell"] not in (2, 5)] + DIFF
+    expected = pd.read_csv(_ingest(data_dir, final, "final")).set_index("country").sort_index()
+    updated = pd.read_csv(aggregates).set_index("country").sort_index()
+    columns = ["total_cells", "gsm", "umts", "lte", "nr"]
+    pd.testing.assert_frame_equal(updated[columns], expected[columns])
+
+    # La base no se reescribe: el delta queda en una parte hasta compactar
+    assert sorted(pd.read_parquet(cells_path)["cell"]) == [1, 2, 3, 4, 5, 6]
+    assert len(list_parts(cells_path)) == 1
+    store = read_cells(cells_path)
+    assert sorted(store["cell"]) == [1, 2, 3, 4, 6, 9]
+    assert store.loc[store["cell"] == 2, "lat"].item() == -31.4
+    assert summary["version"] == version + 1 == get_data_version() - 1
+    assert set(summary["countries"]) == {"Brasil", "Chile"}
+
+
+def test_journal_has_signed_changes(data_dir):
+    aggregates = _ingest(data_dir, BASE, "base")
+    diff = write_dump(os.path.join(data_dir, "diff.csv"), DIFF)
+    version = get_data_version()
+
+    summary = apply_delta(diff, aggregates_path=aggregates,
+                          cells_path=os.path.join(data_dir, "base-cells.parquet"))
+
+    changes = read_journal(version, summary["version"])
+    assert changes is not None
+    # La celda 2 resta su versión anterior y suma la nueva; la 9 sólo suma
+    assert changes.groupby("cell")["sign"].sum().to_dict() == {2: 0, 9: 1}
+    assert read_journal(version - 1, summary["version"]) is None
@@ -0,0 +1,65 @@
+"""Pruebas del motor del dashboard (data.engine) contra pandas."""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from data.engine import DashboardEngine, make_filter_spec
+
+RNG = np.random.default_rng(11)
+COUNTRIES = pd.DataFrame({
+    "country": [f"C{i:02d}" for i in range(40)],
+    "region": RNG.choice(["South America", "North America", "Caribbean"], 40),
+    "gsm": RNG.integers(0, 50, 40), "umts": RNG.integers(0, 50, 40),
+    "lte": RNG.integers(0, 5, 40) * 20, "nr": RNG.integers(0, 3, 40),
+    "population_millions": RNG.uniform(1, 100, 40).round(1)
+})
+COUNTRIES["total_cells"] = COUNTRIES[["gsm", "umts", "lte", "nr"]].sum(axis=1)
+
+SELECTIONS = [(["South America", "Caribbean"], None), (["North America"], None),
+              ([], ["C03", "C17", "C29"]), (["Caribbean"], [])]
+
+
+def _engine():
+    return DashboardEngine(COUNTRIES, cells_loader=lambda: None)
+
+
+def _expected(engine, regions, countries):
+    countries = engine.countries(regions) if countries is None else countries
+    spec = make_filter_spec(regions, countries, "Todas")
+    return spec, COUNTRIES[COUNTRIES["country"].isin(countries)]
+
+
+@pytest.mark.parametrize("regions, countries", SELECTIONS)
+def test_metrics_and_top_match_pandas(regions, countries):
+    engine = _engine()
+    spec, selected = _expected(engine, regions, countries)
+
+    metrics = engine.metrics(spec)
+    assert metrics["total"] == selected["total_cells"].sum()
+    assert metrics["5g"] == selected["nr"].sum()
+
+    top = pd.DataFrame(engine.top_countries(spec, 5), columns=["country", "total_cells"])
+    expected = selected.nlargest(5, "total_cells", keep="first")
+    assert top["total_cells"].tolist() == expected["total_cells"].tolist()
+
+    ranking = pd.DataFrame(engine.ranking(spec, "nr"), columns=["country", "nr"])
+    assert ranking["nr"].tolist() == sorted(selected["nr"], reverse=True)
+    assert sorted(ranking["country"]) == sorted(selected["country"])
+
+
+@pytest.mark.parametrize("sort_by, descending", [("total_cells", True), ("lte", False),
+                                                 ("country", True)])
+def test_table_pages_match_sorted_frame(sort_by, descending):
+    engine = _engine()
+    spec, selected = _expected(engine, ["South America", "Caribbean", "North America"], None)
+    expected = selected.sort_values(sort_by, ascending=not descending, kind="stable")
+
+    first = engine.table_page(spec, sort_by, descending, page=1, page_size=15)
+    pages = [first] + [engine.table_page(spec, sort_by, descending, page=page, page_size=15)
+                       for page in range(2, first["pages"] + 2)]
+
+    assert first["total_rows"] == len(selected) and first["pages"] == 3
+    assert pages[-1]["page"] == 3  # fuera de rango se ajusta a la última
+    rows = [row for page in pages[:-1] for row in page["rows"]]
+    assert [row["country"] for row in rows] == expected["country"].tolist()
@@ -0,0 +1,46 @@
+"""Pruebas del índice de bitmaps (data.index)."""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from data.index import BitmapIndex
+
+# 13 filas: el último byte de cada bitmap queda incompleto
+COUNTRIES = pd.DataFrame({
+    "country": [f"C{i}" for i in range(13)],
+    "region": ["South America", "Caribbean", "North America"] * 4 + ["Caribbean"],
+    "gsm": [1, 0] * 6 + [1], "umts": [0] * 13, "lte": list(range(13)), "nr": [0, 0, 3] * 4 + [5]
+}).astype({"country": "category", "region": "category"})
+
+
+@pytest.mark.parametrize("selection", [
+    {},
+    {"countries": ["C1", "C4", "C12", "missing"]},
+    {"regions": ["Caribbean"]},
+    {"regions": ["Caribbean", "North America"], "technologies": ["nr"]},
+    {"countries": [], "regions": ["Caribbean"]},
+    {"technologies": ["gsm", "nr"]}
+])
+def test_mask_matches_pandas(selection):
+    index = BitmapIndex(COUNTRIES)
+    expected = np.ones(len(COUNTRIES), dtype=bool)
+    if "countries" in selection:
+        expected &= COUNTRIES["country"].isin(selection["countries"]).to_numpy()
+    if "regions" in selection:
+        expected &= COUNTRIES["region"].isin(selection["regions"]).to_numpy()
+    if "technologies" in selection:
+        expected &= (COUNTRIES[selection["technologies"]] > 0).any(axis=1).to_numpy()
+
+    assert index.mask(**selection).tolist() == expected.tolist()
+    assert index.rows(**selection).tolist() == np.flatnonzero(expected).tolist()
+
+
+def test_cell_rows_use_the_radio_column():
+    cells = pd.DataFrame({"radio": ["LTE", "NR", "GSM", "LTE", "UMTS"],
+                          "country": ["A", "A", "B", "B", "B"]})
+    index = BitmapIndex(cells)
+
+    selected = index.take(cells, countries=["B"], technologies=["lte"])
+
+    assert selected.index.tolist() == [3]
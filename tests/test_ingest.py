@@ -0,0 +1,52 @@
+"""Pruebas de la ingesta por bloques (data.ingest)."""
+
+import os
+import stat
+
+import pandas as pd
+
+from conftest import REFERENCE, cell, write_dump
+from data.ingest import count_cells, ingest_opencellid
+
+DUMP = [
+    cell("GSM", 722, 1, 10, 1), cell("LTE", 722, 1, 10, 2), cell("LTE", 722, 7, 11, 3),
+    cell("NR", 724, 5, 20, 4), cell("UMTS", 724, 5, 20, 5), cell("UMTS", 730, 1, 30, 6),
+    # Fuera del agregado: CDMA y un MCC fuera de la región
+    cell("CDMA", 722, 1, 10, 7), cell("LTE", 262, 1, 1, 8)
+]
+
+
+def test_count_cells_across_chunks(data_dir):
+    source = write_dump(os.path.join(data_dir, "cells.csv"), DUMP)
+
+    counts = count_cells(source, chunksize=3)
+
+    assert dict(counts) == {(722, "GSM"): 1, (722, "LTE"): 2, (724, "NR"): 1,
+                            (724, "UMTS"): 1, (730, "UMTS"): 1}
+
+
+def test_ingest_writes_country_aggregates(data_dir):
+    source = write_dump(os.path.join(data_dir, "cells.csv"), DUMP)
+    output = os.path.join(data_dir, "expanded_telecom_data.csv")
+
+    ingest_opencellid(source, output, reference=REFERENCE, chunksize=2, snapshot=False)
+
+    written = pd.read_csv(output).set_index("country")
+    assert written.loc["Argentina", ["gsm", "umts", "lte", "nr", "total_cells"]].tolist() == [
+        1, 0, 2, 0, 3]
+    assert written.loc["Brasil", "total_cells"] == 2
+    assert written.loc["Chile", "umts"] == 1
+    assert written["region"].eq("South America").all()
+    assert list(written.index) == ["Argentina", "Brasil", "Chile"]
+
+
+def test_ingest_keeps_output_permissions(data_dir):
+    source = write_dump(os.path.join(data_dir, "cells.csv"), DUMP)
+    output = os.path.join(data_dir, "expanded_telecom_data.csv")
+
+    ingest_opencellid(source, output, reference=REFERENCE, snapshot=False)
+    assert stat.S_IMODE(os.stat(output).st_mode) == 0o644
+
+    os.chmod(output, 0o664)
+    ingest_opencellid(source, output, reference=REFERENCE, snapshot=False)
+    assert stat.S_IMODE(os.stat(output).st_mode) == 0o664
@@ -0,0 +1,99 @@
+"""Pruebas del dataset particionado por región (data.partitions)."""
+
+import os
+
+import pandas as pd
+
+from conftest import REFERENCE, cell, write_dump
+from data import DATA_FILES, get_data_path, load_expanded_data, partitions
+from data.delta import apply_delta
+from data.ingest import ingest_opencellid
+
+COUNTRIES = pd.DataFrame({
+    "country": ["Argentina", "Chile", "Mexico", "Cuba"],
+    "total_cells": [100, 50, 70, 30], "gsm": [10, 5, 7, 3], "umts": [20, 10, 14, 6],
+    "lte": [60, 30, 42, 18], "nr": [10, 5, 7, 3],
+    "population_millions": [45.4, 19.1, 128.9, 11.2],
+    "latitude": [-34.6, -35.7, 23.6, 21.5], "longitude": [-58.4, -71.5, -102.5, -77.8],
+    "region": ["South America", "South America", "North America", "Caribbean"]
+})
+
+
+def _totals(dataframe):
+    return len(dataframe), int(dataframe["total_cells"].sum())
+
+
+def test_repartitioning_replaces_previous_layout(data_dir):
+    root = os.path.join(data_dir, "partitions")
+    partitions.write_partitions(COUNTRIES, root)
+    partitions.write_partitions(COUNTRIES, root, by="country", file_format="parquet")
+
+    files = partitions.list_partitions(root)
+    assert sorted(files) == ["Caribbean", "North America", "South America"]
+    assert all(path.endswith(".parquet") for paths in files.values() for path in paths)
+    assert _totals(partitions.load_partitioned_data(root=root)) == (4, 250)
+    assert partitions.read_layout(root) == {"by": "country", "format": "parquet"}
+    # Sin directorios temporales ni retirados junto a las particiones
+    assert [name for name in os.listdir(data_dir) if name.startswith(".")] in ([], [".cache"])
+
+
+def test_unselected_regions_are_not_read(data_dir, monkeypatch):
+    root = os.path.join(data_dir, "partitions")
+    partitions.write_partitions(COUNTRIES, root, by="country")
+    read = []
+    original = partitions.read_partition
+
+    def spy(path, region):
+        read.append(region)
+        return original(path, region)
+
+    monkeypatch.setattr(partitions, "read_partition", spy)
+    selected = partitions.load_partitioned_data(["South America"], root=root)
+
+    assert set(read) == {"South America"} and len(read) == 2
+    assert sorted(selected["country"].astype(str)) == ["Argentina", "Chile"]
+
+
+def test_sync_partitions_rewrites_only_affected_regions(data_dir):
+    root = os.path.join(data_dir, "partitions")
+    partitions.write_partitions(COUNTRIES, root, by="country")
+    untouched = partitions.list_partitions(root)["Caribbean"][0]
+    before = os.stat(untouched).st_mtime_ns
+
+    updated = COUNTRIES.assign(nr=COUNTRIES["nr"] + (COUNTRIES["country"] == "Chile") * 5)
+    assert partitions.sync_partitions(updated, ["Chile"], root) == ["South America"]
+
+    loaded = partitions.load_partitioned_data(root=root).set_index("country")
+    assert loaded.loc["Chile", "nr"] == 10
+    assert os.stat(untouched).st_mtime_ns == before
+    assert len(partitions.list_partitions(root)["South America"]) == 2
+
+
+def test_delta_after_partitioning_updates_partitions(data_dir):
+    expanded = get_data_path(DATA_FILES["expanded"])
+    source = write_dump(os.path.join(data_dir, "cells.csv"),
+                        [cell("LTE", 722, 1, 10, 1), cell("GSM", 730, 1, 30, 2)])
+    ingest_opencellid(source, expanded, reference=REFERENCE, snapshot=False)
+    partitions.write_partitions(pd.read_csv(expanded), by="country")
+
+    diff = write_dump(os.path.join(data_dir, "diff.csv"),
+                      [cell("NR", 722, 1, 10, 3, updated=1_800_000_000, created=1_800_000_000)])
+    apply_delta(diff)
+
+    from_csv = pd.read_csv(expanded).set_index("country").sort_index()
+    served = load_expanded_data().astype({"country": str}).set_index("country").sort_index()
+    assert served.loc["Argentina", "nr"] == from_csv.loc["Argentina", "nr"] == 1
+    assert served["total_cells"].tolist() == from_csv["total_cells"].tolist()
+
+
+def test_reingest_rewrites_partitions(data_dir):
+    expanded = get_data_path(DATA_FILES["expanded"])
+    source = write_dump(os.path.join(data_dir, "cells.csv"), [cell("LTE", 722, 1, 10, 1)])
+    ingest_opencellid(source, expanded, reference=REFERENCE, snapshot=False)
+    partitions.write_partitions(pd.read_csv(expanded))
+
+    source = write_dump(os.path.join(data_dir, "cells.csv"),
+                        [cell("LTE", 722, 1, 10, 1), cell("LTE", 724, 1, 20, 2)])
+    ingest_opencellid(source, expanded, reference=REFERENCE, snapshot=False)
+
+    assert _totals(load_expanded_data()) == (2, 2)
@@ -0,0 +1,44 @@
+"""Pruebas de las consultas espaciales (data.query) contra fuerza bruta con haversine."""
+
+import numpy as np
+import pandas as pd
+
+from data.query import EARTH_RADIUS_KM, CellTree
+
+RNG = np.random.default_rng(7)
+CELLS = pd.DataFrame({
+    "radio": RNG.choice(["GSM", "LTE", "NR"], 500),
+    "lat": RNG.uniform(-35.0, -33.0, 500),
+    "lon": RNG.uniform(-60.0, -57.0, 500)
+})
+QUERIES = (np.array([-34.6, -33.2]), np.array([-58.4, -59.9]))
+
+
+def _haversine(lat, lon):
+    """Distancias en km de un punto a todas las celdas."""
+    lat1, lon1 = np.radians(lat), np.radians(lon)
+    lat2, lon2 = np.radians(CELLS["lat"].to_numpy()), np.radians(CELLS["lon"].to_numpy())
+    a = (np.sin((lat2 - lat1) / 2) ** 2
+         + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2)
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(a))
+
+
+def test_nearest_matches_brute_force():
+    result = CellTree(CELLS).nearest(*QUERIES, k=3, technologies=["lte", "nr"])
+
+    for query, (lat, lon) in enumerate(zip(*QUERIES)):
+        distances = np.where(CELLS["radio"].isin(["LTE", "NR"]), _haversine(lat, lon), np.inf)
+        expected = np.sort(distances)[:3]
+        found = result.loc[result["query"] == query, "distance_km"].to_numpy()
+        np.testing.assert_allclose(found, expected, rtol=1e-9)
+
+
+def test_within_radius_matches_brute_force():
+    result = CellTree(CELLS).within_radius(*QUERIES, radius_km=25.0)
+
+    for query, (lat, lon) in enumerate(zip(*QUERIES)):
+        expected = np.flatnonzero(_haversine(lat, lon) <= 25.0)
+        found = result[result["query"] == query]
+        assert len(found) == len(expected) > 0
+        assert found["distance_km"].max() <= 25.0
+        assert found["distance_km"].is_monotonic_increasing
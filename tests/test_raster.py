@@ -0,0 +1,43 @@
+"""Pruebas de las teselas de densidad (data.raster)."""
+
+import numpy as np
+import pandas as pd
+
+from data.raster import DensityRasterizer, mcc_key
+from data.spatial import tile_coordinates
+
+# Antenas en Argentina (MCC 722) y Chile (MCC 730) dentro de la misma tesela de zoom 3
+CELLS = pd.DataFrame({
+    "radio": ["LTE", "LTE", "NR", "LTE"], "mcc": [722, 722, 722, 730],
+    "lat": [-34.60, -34.61, -34.62, -33.45], "lon": [-58.40, -58.41, -58.42, -70.66]
+})
+
+
+def _tile(lat, lon, zoom=3):
+    x, y = tile_coordinates(np.array([lat]), np.array([lon]), zoom)
+    return int(x[0]), int(y[0])
+
+
+def test_tiles_only_count_the_selected_countries():
+    rasterizer = DensityRasterizer(CELLS)
+    x, y = _tile(-34.6, -58.4)
+    assert _tile(-33.45, -70.66) == (x, y)
+
+    everything = rasterizer._histogram("total_cells", None, 3, x, y)
+    argentina = rasterizer._histogram("total_cells", mcc_key(["Argentina"]), 3, x, y)
+    chile_lte = rasterizer._histogram("lte", mcc_key(["Chile"]), 3, x, y)
+
+    assert (everything.sum(), argentina.sum(), chile_lte.sum()) == (4, 3, 1)
+    assert rasterizer._histogram("total_cells", mcc_key([]), 3, x, y).sum() == 0
+
+
+def test_tile_cache_is_keyed_by_selection():
+    rasterizer = DensityRasterizer(CELLS)
+    x, y = _tile(-34.6, -58.4)
+
+    argentina = rasterizer.tile("total_cells", 3, x, y, ["Argentina"])
+    chile = rasterizer.tile("total_cells", 3, x, y, ["Chile"])
+
+    assert argentina != chile
+    assert rasterizer.tile("total_cells", 3, x, y, ["Argentina"]) is argentina
+    assert len(rasterizer._tiles) == 2
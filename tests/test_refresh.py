@@ -0,0 +1,65 @@
+"""Pruebas de los motores por conjunto de regiones (data.refresh)."""
+
+import threading
+
+import pandas as pd
+
+from data.engine import DashboardEngine
+from data.refresh import EngineRefresher
+
+COUNTRIES = pd.DataFrame({
+    "country": ["Argentina", "Chile", "Mexico"],
+    "total_cells": [100, 50, 70], "gsm": [10, 5, 7], "umts": [20, 10, 14],
+    "lte": [60, 30, 42], "nr": [10, 5, 7],
+    "population_millions": [45.4, 19.1, 128.9],
+    "latitude": [-34.6, -35.7, 23.6], "longitude": [-58.4, -71.5, -102.5],
+    "region": ["South America", "South America", "North America"]
+})
+
+
+def _refresher(loads, release):
+    def loader(signature, regions):
+        if regions is not None:
+            release.wait(5)
+        return COUNTRIES[COUNTRIES["region"].isin(regions)] if regions else COUNTRIES
+
+    def factory(dataframe, data_version):
+        def cells_loader():
+            loads.append(1)
+            return None
+        return DashboardEngine(dataframe, cells_loader=cells_loader, data_version=data_version,
+                               snapshots_loader=lambda: None, rollups_loader=lambda: None)
+
+    return EngineRefresher(loader, signature=lambda: (1,), engine_factory=factory)
+
+
+def test_region_engine_is_built_in_background():
+    loads, release = [], threading.Event()
+    refresher = _refresher(loads, release)
+    try:
+        full = refresher.engine()
+        # Mientras se construye el motor de la región se sirve el completo
+        assert refresher.engine(["North America"]) is full
+
+        release.set()
+        refresher.stop()
+        region = refresher.engine(["North America"])
+        assert region is not full
+        assert region.countries() == ["Mexico"]
+    finally:
+        release.set()
+        refresher.stop()
+
+
+def test_region_engines_share_cell_state():
+    loads, release = [], threading.Event()
+    release.set()
+    refresher = _refresher(loads, release)
+    full = refresher.engine()
+    refresher.engine(["South America"])
+    refresher.stop()
+
+    region = refresher.engine(["South America"])
+    assert region is not full
+    assert region.coverage() is None and region.pyramid() is None
+    assert len(loads) == 1
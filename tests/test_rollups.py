@@ -0,0 +1,48 @@
+"""Pruebas de los agregados por operador y área (data.rollups)."""
+
+import pandas as pd
+
+from data.rollups import RollupAccumulator, RollupIndex, apply_changes, build_rollups
+
+CELLS = pd.DataFrame({
+    "radio": ["GSM", "LTE", "LTE", "NR", "UMTS", "LTE", "LTE"],
+    "mcc": [722, 722, 722, 722, 730, 730, 730], "net": [7, 7, 7, 34, 1, 1, 1],
+    "area": [10, 10, 11, 20, 30, 30, 31], "cell": [1, 2, 3, 4, 5, 6, 7]
+})
+
+
+def _rollups(cells):
+    accumulator = RollupAccumulator()
+    accumulator.add(cells.iloc[:3])
+    accumulator.add(cells.iloc[3:])
+    return build_rollups(accumulator.area_counts())
+
+
+def _sorted(rollups):
+    return rollups.sort_values(["level", "mcc", "net", "area"], ignore_index=True)
+
+
+def test_apply_changes_matches_a_full_recompute():
+    # Celda 2 pasa a NR en otra área, la 7 (única del área 31) se da de baja
+    # y aparece un operador nuevo
+    moved = CELLS.iloc[[1]].assign(radio="NR", area=12)
+    new = pd.DataFrame({"radio": ["LTE"], "mcc": [730], "net": [9], "area": [40], "cell": [8]})
+    changes = pd.concat([CELLS.iloc[[1, 6]].assign(sign=-1), moved.assign(sign=1),
+                         new.assign(sign=1)], ignore_index=True)
+    final = pd.concat([CELLS.drop(index=[1, 6]), moved, new], ignore_index=True)
+
+    updated = apply_changes(_rollups(CELLS), changes)
+
+    pd.testing.assert_frame_equal(_sorted(updated), _sorted(_rollups(final)), check_dtype=False)
+    assert 31 not in updated["area"].tolist()
+
+
+def test_index_slices_operators_and_areas():
+    index = RollupIndex(_rollups(CELLS))
+
+    operators = index.country_operators("Argentina")
+    assert operators["operator"].tolist() == ["722-07", "722-34"]
+    assert operators["total_cells"].tolist() == [3, 1]
+    areas = index.operator_areas("Argentina", "722-07")
+    assert areas["area"].tolist() == [10, 11] and areas["total_cells"].tolist() == [2, 1]
+    assert index.country_operators("Peru").empty
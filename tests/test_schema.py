@@ -0,0 +1,39 @@
+"""Pruebas del esquema compacto (data.schema)."""
+
+import numpy as np
+import pandas as pd
+
+from data.schema import apply_compact_schema, format_bytes, memory_report
+
+COUNTRIES = pd.DataFrame({
+    "country": ["Argentina", "Chile", "Peru"] * 100,
+    "region": ["South America"] * 300,
+    "total_cells": np.arange(300, dtype=np.int64) * 100,
+    "nr": np.arange(300, dtype=np.int64) % 7,
+    "latitude": np.linspace(-40.0, -10.0, 300),
+    "population_millions": np.linspace(1.0, 50.0, 300)
+})
+
+
+def test_compact_schema_keeps_values_and_shrinks():
+    compact = apply_compact_schema(COUNTRIES)
+
+    assert isinstance(compact["country"].dtype, pd.CategoricalDtype)
+    assert compact["nr"].dtype == np.int8 and compact["total_cells"].dtype == np.int16
+    assert compact["latitude"].dtype == np.float32
+    assert compact["population_millions"].dtype == np.float64
+    pd.testing.assert_frame_equal(compact.astype(COUNTRIES.dtypes.to_dict()), COUNTRIES,
+                                  check_exact=False, rtol=1e-6)
+    assert (memory_report(compact)["bytes"].iloc[-1]
+            < memory_report(COUNTRIES)["bytes"].iloc[-1] / 2)
+    # Aplicarlo dos veces no cambia nada
+    assert apply_compact_schema(compact).dtypes.equals(compact.dtypes)
+
+
+def test_memory_report_adds_up():
+    report = memory_report(COUNTRIES)
+
+    assert report["column"].iloc[0] == "Index" and report["column"].iloc[-1] == "TOTAL"
+    assert report["bytes"].iloc[:-1].sum() == report["bytes"].iloc[-1]
+    assert abs(report["share"].iloc[:-1].sum() - 100) < 1
+    assert format_bytes(1536) == "1.5 KB"
@@ -0,0 +1,86 @@
+"""Pruebas de la historia de fotos (data.snapshots)."""
+
+import os
+
+import pandas as pd
+import pytest
+
+from conftest import REFERENCE, cell, write_dump
+from data import DATA_FILES, get_data_path, snapshots
+from data.ingest import ingest_opencellid
+
+
+def _countries(**cells):
+    names = list(cells)
+    return pd.DataFrame({"country": names, "region": ["South America"] * len(names),
+                         "gsm": 0, "umts": 0, "lte": list(cells.values()), "nr": 0,
+                         "total_cells": list(cells.values())})
+
+
+def _lte(history, day):
+    rows = history[(history["date"] == day) & (history["tech"] == "lte")]
+    return {str(row.country): (row.cells, row.added) for row in rows.itertuples()}
+
+
+def test_missing_country_records_removals(data_dir):
+    root = os.path.join(data_dir, "snapshots")
+    snapshots.append_snapshot(_countries(Argentina=10, Chile=5), "2025-01-01", root)
+    snapshots.append_snapshot(_countries(Argentina=12), "2025-02-01", root)
+    snapshots.append_snapshot(_countries(Argentina=15), "2025-03-01", root)
+
+    history = snapshots.load_history(root)
+    assert _lte(history, pd.Timestamp("2025-02-01")) == {"Argentina": (12, 2), "Chile": (0, -5)}
+    assert _lte(history, pd.Timestamp("2025-03-01")) == {"Argentina": (15, 3)}
+    growth = snapshots.growth_table(history, "lte", 12).set_index("country")
+    assert growth["added"].to_dict() == {"Argentina": 5, "Chile": -5}
+
+
+def test_append_writes_only_the_new_part(data_dir):
+    root = os.path.join(data_dir, "snapshots")
+    snapshots.append_snapshot(_countries(Argentina=10), "2025-01-01", root)
+    first = os.path.join(root, snapshots.HISTORY_DIR, "2025-01-01.parquet")
+    before = os.stat(first).st_mtime_ns
+
+    snapshots.append_snapshot(_countries(Argentina=11), "2025-02-01", root)
+
+    assert os.stat(first).st_mtime_ns == before
+    assert snapshots.latest_snapshot_date(root) == pd.Timestamp("2025-02-01")
+    with pytest.raises(ValueError):
+        snapshots.append_snapshot(_countries(Argentina=9), "2025-01-15", root)
+    snapshots.append_snapshot(_countries(Argentina=20), "2025-02-01", root, replace=True)
+    assert _lte(snapshots.load_history(root), pd.Timestamp("2025-02-01")) == {
+        "Argentina": (20, 10)}
+
+
+def test_single_file_history_is_split(data_dir):
+    root = os.path.join(data_dir, "snapshots")
+    snapshots.append_snapshot(_countries(Argentina=10), "2025-01-01", root)
+    snapshots.append_snapshot(_countries(Argentina=12), "2025-02-01", root)
+    legacy = snapshots.load_history(root)
+    os.makedirs(root, exist_ok=True)
+    legacy.to_parquet(os.path.join(root, snapshots.HISTORY_FILE), index=False)
+    for name in os.listdir(os.path.join(root, snapshots.HISTORY_DIR)):
+        os.unlink(os.path.join(root, snapshots.HISTORY_DIR, name))
+    assert snapshots.load_history(root)["date"].nunique() == 2
+
+    snapshots.append_snapshot(_countries(Argentina=13), "2025-03-01", root)
+
+    assert not os.path.exists(os.path.join(root, snapshots.HISTORY_FILE))
+    assert sorted(os.listdir(os.path.join(root, snapshots.HISTORY_DIR))) == [
+        "2025-01-01.parquet", "2025-02-01.parquet", "2025-03-01.parquet"]
+    assert _lte(snapshots.load_history(root), pd.Timestamp("2025-03-01")) == {
+        "Argentina": (13, 1)}
+
+
+def test_only_the_expanded_dataset_has_history(data_dir):
+    source = write_dump(os.path.join(data_dir, "cells.csv"), [cell("LTE", 722, 1, 10, 1)])
+    other = os.path.join(data_dir, "otro.csv")
+
+    ingest_opencellid(source, other, reference=REFERENCE, snapshot_date="2025-01-01")
+    assert snapshots.snapshots_of(other) is None
+    assert snapshots.load_history(snapshots.SNAPSHOT_DIR) is None
+
+    expanded = get_data_path(DATA_FILES["expanded"])
+    ingest_opencellid(source, expanded, reference=REFERENCE, snapshot_date="2025-01-01")
+    assert snapshots.snapshots_of(expanded) == snapshots.SNAPSHOT_DIR
+    assert snapshots.latest_snapshot_date() == pd.Timestamp("2025-01-01")
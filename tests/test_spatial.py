@@ -0,0 +1,80 @@
+"""Pruebas de la pirámide de bins del mapa (data.spatial) y de la vista del motor."""
+
+import numpy as np
+import pandas as pd
+
+from charts import build_figure
+from data.engine import DashboardEngine, make_filter_spec
+from data.spatial import GridPyramid, viewport_bounds
+
+COUNTRIES = pd.DataFrame({
+    "country": ["Argentina", "Mexico"], "total_cells": [40, 20], "gsm": [0, 0], "umts": [0, 0],
+    "lte": [40, 20], "nr": [0, 0], "population_millions": [45.4, 128.9],
+    "latitude": [-34.6, 23.6], "longitude": [-58.4, -102.5],
+    "region": ["South America", "North America"]
+})
+
+
+def _cells(seed=0):
+    """Dos grupos de antenas: Buenos Aires (MCC 722) y Ciudad de México (MCC 334)."""
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        "radio": ["LTE"] * 60,
+        "mcc": [722] * 40 + [334] * 20,
+        "lat": np.r_[rng.normal(-34.6, 0.01, 40), rng.normal(19.4, 0.01, 20)],
+        "lon": np.r_[rng.normal(-58.4, 0.01, 40), rng.normal(-99.1, 0.01, 20)]
+    })
+
+
+def test_levels_keep_the_totals():
+    pyramid = GridPyramid(_cells())
+
+    for level, frame in pyramid.levels.items():
+        assert frame["lte"].sum() == 60, level
+    bins = pyramid.bins(3, countries=["Mexico"])
+    assert bins["total_cells"].sum() == 20
+
+
+def test_delta_matches_a_rebuild():
+    cells = _cells()
+    changes = pd.concat([cells.iloc[:5].assign(sign=-1),
+                         _cells(seed=1).iloc[40:43].assign(sign=1)], ignore_index=True)
+    final = pd.concat([cells.iloc[5:], _cells(seed=1).iloc[40:43]], ignore_index=True)
+
+    updated = GridPyramid(cells).with_delta(changes)
+    rebuilt = GridPyramid(final)
+
+    for level in rebuilt.levels:
+        columns = ["country", "x", "y", "lte"]
+        left = updated.levels[level][columns].sort_values(columns[:3], ignore_index=True)
+        right = rebuilt.levels[level][columns].sort_values(columns[:3], ignore_index=True)
+        pd.testing.assert_frame_equal(left.astype({"country": str}),
+                                      right.astype({"country": str}), check_dtype=False)
+
+
+def test_view_center_stays_on_the_selection():
+    pyramid = GridPyramid(_cells())
+
+    # A zoom alto el punto medio entre ambos países es mar abierto
+    center = pyramid.view_center(12, ["Argentina", "Mexico"])
+    assert not pyramid.bins(12, viewport_bounds(center, 12), ["Argentina", "Mexico"]).empty
+    assert abs(center["lat"] + 34.6) < 0.1
+    # A zoom bajo entra toda la selección
+    center = pyramid.view_center(2, ["Argentina", "Mexico"])
+    assert len(pyramid.bins(2, viewport_bounds(center, 2), ["Argentina", "Mexico"])) == 2
+    assert pyramid.view_center(12, ["Chile"]) is None
+
+
+def test_map_view_without_bins_renders_empty_map():
+    cells = _cells()
+    engine = DashboardEngine(COUNTRIES, cells_loader=lambda: cells,
+                             snapshots_loader=lambda: None, rollups_loader=lambda: None)
+    spec = make_filter_spec(["South America", "North America"], ["Argentina", "Mexico"],
+                            "Todas")
+
+    view = engine.map_view(spec, 12)
+    assert view["binned"] and view["points"]
+
+    empty = dict(view, points=[])
+    figure = build_figure("map", empty, "Mapa")
+    assert figure.layout.mapbox.zoom == 12
@@ -0,0 +1,111 @@
+"""Pruebas de la base SQL embebida (data.sql) y del motor sobre ella."""
+
+import os
+
+import pandas as pd
+import pytest
+
+from conftest import REFERENCE, cell, write_dump
+from data import load_cells_data, sql
+from data.cache import read_csv_cached
+from data.engine import DashboardEngine, make_filter_spec
+from data.ingest import ingest_opencellid
+
+COUNTRIES = pd.DataFrame({
+    "country": ["Argentina", "Chile", "Mexico", "Cuba", "Peru"],
+    "total_cells": [100, 50, 70, 30, 40], "gsm": [10, 5, 7, 3, 4],
+    "umts": [20, 10, 14, 6, 8], "lte": [60, 30, 42, 18, 23], "nr": [10, 5, 7, 3, 5],
+    "population_millions": [45.4, 19.1, 128.9, 11.2, 33.7],
+    "latitude": [-34.6, -35.7, 23.6, 21.5, -9.2],
+    "longitude": [-58.4, -71.5, -102.5, -77.8, -75.0],
+    "region": ["South America", "South America", "North America", "Caribbean", "South America"]
+})
+
+CELLS = pd.DataFrame({
+    "radio": ["LTE", "NR", "GSM"], "mcc": [722, 722, 730], "net": [1, 1, 1],
+    "area": [10, 10, 30], "cell": [1, 2, 3], "lon": [-58.4, -58.5, -71.5],
+    "lat": [-34.6, -34.7, -35.7], "range": [1000, 500, 2000]
+})
+
+
+def _store(directory):
+    """Base construida desde COUNTRIES y CELLS; devuelve (ruta, CSV por país)."""
+    os.makedirs(directory, exist_ok=True)
+    countries_path = os.path.join(directory, "countries.csv")
+    cells_path = os.path.join(directory, "cells.parquet")
+    COUNTRIES.to_csv(countries_path, index=False)
+    CELLS.to_parquet(cells_path, index=False)
+    path = os.path.join(directory, "techcom.sqlite")
+    sql.build_store(path, countries_path, cells_path)
+    return path, countries_path
+
+
+def test_connect_quotes_the_path(data_dir):
+    path, _ = _store(os.path.join(data_dir, "base sql #1?"))
+
+    result = sql.run_query("SELECT COUNT(*) AS n FROM countries", path=path)
+
+    assert result["n"].item() == len(COUNTRIES)
+    with pytest.raises(FileNotFoundError):
+        sql.connect(os.path.join(data_dir, "missing #2.sqlite"))
+
+
+@pytest.mark.parametrize("regions, countries", [
+    (["Caribbean", "North America", "South America"], None),
+    (["South America"], None),
+    ([], ["Peru", "Chile", "Mexico"]),
+    (["South America"], [])
+])
+def test_engine_pushdown_matches_pandas(data_dir, regions, countries):
+    path, countries_path = _store(data_dir)
+    dataframe = read_csv_cached(countries_path)
+    # Los bins del mapa salen de la base sin cargar los puntos de celda
+    in_memory = DashboardEngine(dataframe, cells_loader=lambda: CELLS)
+    pushed = DashboardEngine(dataframe, cells_loader=lambda: None, store=path)
+    assert in_memory.store is None and pushed.store == path
+
+    spec = make_filter_spec(regions, in_memory.countries(regions) if countries is None
+                            else countries, "Todas")
+    for name, *args in [("metrics",), ("leader",), ("top_countries", 3), ("ranking", "nr"),
+                        ("comparison_rows",), ("map_view",)]:
+        assert getattr(pushed, name)(spec, *args) == getattr(in_memory, name)(spec, *args), name
+    for kind in ("top3", "5g"):
+        assert pushed.quick_selection(kind) == in_memory.quick_selection(kind)
+    assert pushed.map_view(spec)["binned"] == bool(spec[1])
+
+
+def test_ingest_rebuilds_only_the_expanded_store(data_dir):
+    path, countries_path = _store(data_dir)
+    columns = sql.store_columns("countries", path)
+    hits = sql._cached_columns.cache_info().hits
+    assert sql.store_columns("countries", path) == columns
+    assert sql._cached_columns.cache_info().hits == hits + 1
+    assert sql.store_of(countries_path) is None
+    expanded = os.path.join(data_dir, "expanded_telecom_data.csv")
+    COUNTRIES.to_csv(expanded, index=False)
+    assert sql.store_of(expanded) == sql.SQL_PATH == path
+
+    source = write_dump(os.path.join(data_dir, "cells.csv"), [cell("LTE", 722, 1, 10, 1)])
+    ingest_opencellid(source, os.path.join(data_dir, "otro.csv"), reference=REFERENCE,
+                      snapshot=False)
+    assert len(sql.run_query("SELECT * FROM countries", path=path)) == len(COUNTRIES)
+
+    assert "tile_x" in sql.store_columns("cells", path)
+
+    os.unlink(os.path.join(data_dir, "cells.parquet"))
+    ingest_opencellid(source, expanded, reference=REFERENCE, snapshot=False)
+    rebuilt = sql.run_query("SELECT country, total_cells FROM countries", path=path)
+    assert rebuilt.values.tolist() == [["Argentina", 1]]
+    # La base nueva no tiene celdas: las columnas memorizadas se vuelven a leer
+    assert sql.store_columns("cells", path) == []
+
+
+def test_cells_are_read_with_projection(data_dir, monkeypatch):
+    _store(data_dir)
+    monkeypatch.setenv(sql.BACKEND_ENV, "sqlite")
+    assert sql.configured_store() == sql.SQL_PATH
+
+    cells = load_cells_data(["radio", "lat", "lon", "missing"])
+
+    assert list(cells.columns) == ["radio", "lat", "lon"]
+    assert sorted(cells["radio"].astype(str)) == ["GSM", "LTE", "NR"]